@@ -18,12 +18,22 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import sys
 from pathlib import Path
 
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
+
 FFMPEG_REPO_NAME = 'FFmpeg'
 
 FFMPEG_REPO_DIR = options.get('REPOS_DIR') / FFMPEG_REPO_NAME
-BUILD_NUM = get_commit_number(FFMPEG_REPO_DIR)
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=FFMPEG_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
 FFMPEG_VERSION = manifest.get_component(FFMPEG_REPO_NAME.lower()).version + f'.{BUILD_NUM}'
 
 DEPENDENCIES = [
@@ -50,88 +60,108 @@ FFMPEG_LIB_INSTALL_DIRS = {
     'deb': 'lib/x86_64-linux-gnu'
 }
 
+
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
 # Prepare dependencies
 # Libva
-LIBVA_PATH = options['DEPENDENCIES_DIR'] / 'libva' / 'usr' / 'local'
+LIBVA_PATH = helpers.sysroot_dir / 'libva'
 LIBVA_PKG_CONFIG_PATH = LIBVA_PATH / 'lib64' / 'pkgconfig'
-LIBVA_PKG_CONFIG_RPM_PATTERN = {
-    '^prefix=.+': f'prefix={LIBVA_PATH}',
-}
 
-action('LibVA: change pkgconfigs',
+action('LibVA: prepare sysroot',
        stage=stage.EXTRACT,
-       callfunc=(update_config, [LIBVA_PKG_CONFIG_PATH, LIBVA_PKG_CONFIG_RPM_PATTERN], {}))
+       callfunc=(helpers.prepare_dependency_sysroot, ['libva'], {}))
 
 # Build ffmpeg
+ffmpeg_configure = f'{FFMPEG_REPO_DIR}/configure --disable-x86asm'
+if helpers.compiler_cache:
+    action('ffmpeg: enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
+    # configure of ffmpeg does not read compilers from CC and CXX variables
+    ffmpeg_configure += ' --cc="{ENV[CC]}" --cxx="{ENV[CXX]}"'
+
 action('ffmpeg: configure',
        work_dir=options['BUILD_DIR'],
-       cmd=f'{FFMPEG_REPO_DIR}/configure --disable-x86asm',
+       cmd=ffmpeg_configure,
        env={'PKG_CONFIG_PATH': f'{LIBVA_PKG_CONFIG_PATH}'})
 
 action('ffmpeg: make',
-       cmd='make -j`nproc`')
+       cmd=helpers.with_compiler_cache_stats('make -j`nproc`'))
 
 action('ffmpeg: make install',
        stage=stage.INSTALL,
        work_dir=options['BUILD_DIR'],
        cmd=f'make DESTDIR={options["INSTALL_DIR"]} install')
 
+action('ffmpeg: track binary sizes',
+       stage=stage.INSTALL,
+       callfunc=(helpers.track_binary_sizes, [['lib*.so*']], {}))
+
 # ffmpeg: pkgconfig for OS Ubuntu
 # Update pkgconfig prefix
 pkgconfig_deb_pattern = {
     f'{FFMPEG_DEB_PREFIX}/lib': f'{FFMPEG_DEB_PREFIX / FFMPEG_LIB_INSTALL_DIRS["deb"]}',
 }
 
-action('ffmpeg: change pkgconfig for deb',
-       stage=stage.PACK,
-       callfunc=(update_config, [options["INSTALL_DIR"] / FFMPEG_DEB_PREFIX.relative_to(FFMPEG_DEB_PREFIX.root) / PKGCONFIG,
-                                 pkgconfig_deb_pattern], {}))
-
-# Get package installation dir for ffmpeg
-pack_dir = options['INSTALL_DIR'] / FFMPEG_DEB_PREFIX.relative_to(FFMPEG_DEB_PREFIX.root)
-lib_install_to = FFMPEG_DEB_PREFIX / FFMPEG_LIB_INSTALL_DIRS['deb']
-include_install_to = FFMPEG_DEB_PREFIX
-
-FFMPEG_PACK_DIRS = [
-    f'{pack_dir}/lib/={lib_install_to}/',
-    f'{pack_dir}/include/={include_install_to}/include',
-    f'{pack_dir}/bin/={include_install_to}/bin',
-    f'{pack_dir}/share/={include_install_to}/share',
-]
-
-action('ffmpeg: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb',  FFMPEG_PACK_DIRS, ENABLE_RUBY24, FFMPEG_VERSION, FFMPEG_REPO_NAME))
-
 # ffmpeg: pkgconfig for OS CentOS
-# Update pkgconfig prefix
+# Update pkgconfig prefix, applied over pkgconfigs updated for deb
 pkgconfig_rpm_pattern = {
     '^prefix=.+': 'prefix=/usr',
     f'{FFMPEG_DEB_PREFIX}/include': f'{FFMPEG_CENTOS_PREFIX}/include',
     f'{FFMPEG_DEB_PREFIX / FFMPEG_LIB_INSTALL_DIRS["deb"]}': f'{FFMPEG_CENTOS_PREFIX / FFMPEG_LIB_INSTALL_DIRS["rpm"]}',
 }
 
-action('ffmpeg: change pkgconfigs for rpm',
-       stage=stage.PACK,
-       callfunc=(update_config, [options["INSTALL_DIR"] / FFMPEG_DEB_PREFIX.relative_to(FFMPEG_DEB_PREFIX.root) / PKGCONFIG,
-                                 pkgconfig_rpm_pattern], {}))
+FFMPEG_INSTALL_PKGCONFIG_DIR = options["INSTALL_DIR"] / FFMPEG_DEB_PREFIX.relative_to(FFMPEG_DEB_PREFIX.root) / PKGCONFIG
 
-# Get package installation dir for FFMPEG
-lib_install_to = FFMPEG_CENTOS_PREFIX / FFMPEG_LIB_INSTALL_DIRS['rpm']
-include_install_to = FFMPEG_CENTOS_PREFIX
+# Get package installation dir for ffmpeg
+pack_dir = options['INSTALL_DIR'] / FFMPEG_DEB_PREFIX.relative_to(FFMPEG_DEB_PREFIX.root)
+
+FFMPEG_DEB_PACK_DIRS = [
+    f'{pack_dir}/lib/={FFMPEG_DEB_PREFIX / FFMPEG_LIB_INSTALL_DIRS["deb"]}/',
+    f'{pack_dir}/include/={FFMPEG_DEB_PREFIX}/include',
+    f'{pack_dir}/bin/={FFMPEG_DEB_PREFIX}/bin',
+    f'{pack_dir}/share/={FFMPEG_DEB_PREFIX}/share',
+]
 
-FFMPEG_PACK_DIRS = [
-    f'{pack_dir}/lib/={lib_install_to}/',
-    f'{pack_dir}/include/={include_install_to}/include',
-    f'{pack_dir}/bin/={include_install_to}/bin',
-    f'{pack_dir}/share/={include_install_to}/share',
+FFMPEG_RPM_PACK_DIRS = [
+    f'{pack_dir}/lib/={FFMPEG_CENTOS_PREFIX / FFMPEG_LIB_INSTALL_DIRS["rpm"]}/',
+    f'{pack_dir}/include/={FFMPEG_CENTOS_PREFIX}/include',
+    f'{pack_dir}/bin/={FFMPEG_CENTOS_PREFIX}/bin',
+    f'{pack_dir}/share/={FFMPEG_CENTOS_PREFIX}/share',
 ]
 
-action('ffmpeg: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', FFMPEG_PACK_DIRS, ENABLE_RUBY24, FFMPEG_VERSION, FFMPEG_REPO_NAME))
+if helpers.parallel_pack:
+    action('ffmpeg: create deb and rpm pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [[
+               {'type': 'deb', 'pack_dirs': FFMPEG_DEB_PACK_DIRS, 'version': FFMPEG_VERSION, 'name': FFMPEG_REPO_NAME,
+                'updates': [(FFMPEG_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern, {})]},
+               {'type': 'rpm', 'pack_dirs': FFMPEG_RPM_PACK_DIRS, 'version': FFMPEG_VERSION, 'name': FFMPEG_REPO_NAME,
+                'updates': [(FFMPEG_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern, {}),
+                            (FFMPEG_INSTALL_PKGCONFIG_DIR, pkgconfig_rpm_pattern, {})]},
+           ], ENABLE_RUBY24], {}))
+else:
+    action('ffmpeg: change pkgconfig for deb',
+           stage=stage.PACK,
+           callfunc=(update_config, [FFMPEG_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern], {}))
+
+    action('ffmpeg: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb',  FFMPEG_DEB_PACK_DIRS, ENABLE_RUBY24, FFMPEG_VERSION, FFMPEG_REPO_NAME))
+
+    action('ffmpeg: change pkgconfigs for rpm',
+           stage=stage.PACK,
+           callfunc=(update_config, [FFMPEG_INSTALL_PKGCONFIG_DIR, pkgconfig_rpm_pattern], {}))
+
+    action('ffmpeg: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', FFMPEG_RPM_PACK_DIRS, ENABLE_RUBY24, FFMPEG_VERSION, FFMPEG_REPO_NAME))
 
 INSTALL_PKG_DATA_TO_ARCHIVE.extend([
     {
@@ -18,12 +18,22 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import sys
 from pathlib import Path
 
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
+
 GMMLIB_REPO_NAME = 'gmmlib'
 
 GMMLIB_REPO_DIR = options.get('REPOS_DIR') / GMMLIB_REPO_NAME
-BUILD_NUM = get_commit_number(GMMLIB_REPO_DIR)
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=GMMLIB_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
 GMMLIB_VERSION = manifest.get_component(GMMLIB_REPO_NAME).version + f'.{BUILD_NUM}'
 
 
@@ -46,27 +56,63 @@ GMMLIB_LIB_INSTALL_DIRS = {
 }
 
 
-cmake_command = ['cmake3']
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
+cmake_command = ['cmake3', f'-G "{helpers.build_backend["generator"]}"']
 cmake_command.append('-DCMAKE_SHARED_LINKER_FLAGS="-pie -z noexecstack -z relro -z now"')
+# compile_commands.json is used to verify SDL flags
+cmake_command.append('-DCMAKE_EXPORT_COMPILE_COMMANDS=ON')
 cmake_command.append(str(GMMLIB_REPO_DIR))
 cmake = ' '.join(cmake_command)
 
 # Build gmmlib
+if helpers.build_cache_dir:
+    action('gmmlib: look up build cache',
+           callfunc=(helpers.lookup_build_cache, [[GMMLIB_REPO_DIR], cmake, []], {}))
+
+if helpers.compiler_cache:
+    action('gmmlib: enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
 action('gmmlib: cmake',
        work_dir=options['BUILD_DIR'],
-       cmd=cmake)
+       cmd=helpers.skip_on_build_cache_hit(cmake))
 
 action('gmmlib: build',
-       cmd='make -j`nproc`')
+       cmd=helpers.skip_on_build_cache_hit(
+           helpers.with_compiler_cache_stats(helpers.build_backend['build'].format(jobs='`nproc`'))))
+
+if helpers.build_backend['timing_log']:
+    action('gmmlib: build timing',
+           callfunc=(helpers.log_build_timing, [options['BUILD_DIR'], options['LOGS_DIR'] / 'build_timing.json'], {}))
+
+GMMLIB_SDL_POLICY = {
+    'compile': [],
+    'link': ['-z noexecstack', '-z relro', '-z now'],
+    'shared_only': True,
+}
+action('gmmlib: verify SDL flags',
+       callfunc=(helpers.verify_sdl_flags, ['gmmlib', options['BUILD_DIR'], GMMLIB_SDL_POLICY], {}))
 
 action('gmmlib: list artifacts',
-         cmd=f'echo " " && ls ./Source/GmmLib',
+         cmd=helpers.skip_on_build_cache_hit(f'echo " " && ls ./Source/GmmLib'),
          verbose=True)
 
 action('gmmlib: make install',
        stage=stage.INSTALL,
        work_dir=options['BUILD_DIR'],
-       cmd=f'make DESTDIR={options["INSTALL_DIR"]} install')
+       cmd=helpers.skip_on_build_cache_hit(helpers.build_backend['install'].format(destdir=options['INSTALL_DIR'])))
+
+if helpers.build_cache_dir:
+    action('gmmlib: sync build cache',
+           stage=stage.INSTALL,
+           callfunc=(helpers.sync_build_cache, [], {}))
+
+action('gmmlib: track binary sizes',
+       stage=stage.INSTALL,
+       callfunc=(helpers.track_binary_sizes, [['libigdgmm.so*']], {}))
 
 # gmmlib: pkgconfig for OS Ubuntu
 # Update pkgconfig prefix
@@ -74,52 +120,58 @@ pkgconfig_deb_pattern = {
     '/lib64': f"/{GMMLIB_LIB_INSTALL_DIRS['deb']}",
 }
 
-action('gmmlib: change pkgconfig for deb',
-       stage=stage.PACK,
-       callfunc=(update_config, [options["INSTALL_DIR"] / GMMLIB_DEB_PREFIX.relative_to(GMMLIB_DEB_PREFIX.root) / PKGCONFIG,
-                                 pkgconfig_deb_pattern], {}))
-
-# Get package installation dir for gmmlib
-pack_dir = options['INSTALL_DIR'] / GMMLIB_DEB_PREFIX.relative_to(GMMLIB_DEB_PREFIX.root)
-lib_install_to = GMMLIB_DEB_PREFIX / GMMLIB_LIB_INSTALL_DIRS['deb']
-include_install_to = GMMLIB_DEB_PREFIX
-
-GMMLIB_PACK_DIRS = [
-    f'{pack_dir}/lib64/={lib_install_to}/',
-    f'{pack_dir}/include/={include_install_to}/include',
-]
-
-action('gmmlib: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb',  GMMLIB_PACK_DIRS, ENABLE_RUBY24, GMMLIB_VERSION, GMMLIB_REPO_NAME))
-
 # gmmlib: pkgconfig for OS CentOS
-# Update pkgconfig prefix
+# Update pkgconfig prefix, applied over pkgconfigs updated for deb
 pkgconfig_rpm_pattern = {
     '^prefix=.+': 'prefix=/usr',
     f'{GMMLIB_DEB_PREFIX}/include': f'{GMMLIB_CENTOS_PREFIX}/include',
     f'{GMMLIB_DEB_PREFIX / GMMLIB_LIB_INSTALL_DIRS["deb"]}': f'{GMMLIB_CENTOS_PREFIX / GMMLIB_LIB_INSTALL_DIRS["rpm"]}',
 }
 
-action('gmmlib: change pkgconfigs for rpm',
-       stage=stage.PACK,
-       callfunc=(update_config, [options["INSTALL_DIR"] / GMMLIB_DEB_PREFIX.relative_to(GMMLIB_DEB_PREFIX.root) / PKGCONFIG,
-                                 pkgconfig_rpm_pattern], {}))
+GMMLIB_INSTALL_PKGCONFIG_DIR = options["INSTALL_DIR"] / GMMLIB_DEB_PREFIX.relative_to(GMMLIB_DEB_PREFIX.root) / PKGCONFIG
+
+# Get package installation dir for gmmlib
+pack_dir = options['INSTALL_DIR'] / GMMLIB_DEB_PREFIX.relative_to(GMMLIB_DEB_PREFIX.root)
 
-# Get package installation dir for GMMLIB
-lib_install_to = GMMLIB_CENTOS_PREFIX / GMMLIB_LIB_INSTALL_DIRS['rpm']
-include_install_to = GMMLIB_CENTOS_PREFIX
+GMMLIB_DEB_PACK_DIRS = [
+    f'{pack_dir}/lib64/={GMMLIB_DEB_PREFIX / GMMLIB_LIB_INSTALL_DIRS["deb"]}/',
+    f'{pack_dir}/include/={GMMLIB_DEB_PREFIX}/include',
+]
 
-GMMLIB_PACK_DIRS = [
-    f'{pack_dir}/lib64/={lib_install_to}/',
-    f'{pack_dir}/include/={include_install_to}/include',
+GMMLIB_RPM_PACK_DIRS = [
+    f'{pack_dir}/lib64/={GMMLIB_CENTOS_PREFIX / GMMLIB_LIB_INSTALL_DIRS["rpm"]}/',
+    f'{pack_dir}/include/={GMMLIB_CENTOS_PREFIX}/include',
 ]
 
-action('gmmlib: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', GMMLIB_PACK_DIRS, ENABLE_RUBY24, GMMLIB_VERSION, GMMLIB_REPO_NAME))
+if helpers.parallel_pack:
+    action('gmmlib: create deb and rpm pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [[
+               {'type': 'deb', 'pack_dirs': GMMLIB_DEB_PACK_DIRS, 'version': GMMLIB_VERSION, 'name': GMMLIB_REPO_NAME,
+                'updates': [(GMMLIB_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern, {})]},
+               {'type': 'rpm', 'pack_dirs': GMMLIB_RPM_PACK_DIRS, 'version': GMMLIB_VERSION, 'name': GMMLIB_REPO_NAME,
+                'updates': [(GMMLIB_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern, {}),
+                            (GMMLIB_INSTALL_PKGCONFIG_DIR, pkgconfig_rpm_pattern, {})]},
+           ], ENABLE_RUBY24], {}))
+else:
+    action('gmmlib: change pkgconfig for deb',
+           stage=stage.PACK,
+           callfunc=(update_config, [GMMLIB_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern], {}))
+
+    action('gmmlib: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb',  GMMLIB_DEB_PACK_DIRS, ENABLE_RUBY24, GMMLIB_VERSION, GMMLIB_REPO_NAME))
+
+    action('gmmlib: change pkgconfigs for rpm',
+           stage=stage.PACK,
+           callfunc=(update_config, [GMMLIB_INSTALL_PKGCONFIG_DIR, pkgconfig_rpm_pattern], {}))
+
+    action('gmmlib: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', GMMLIB_RPM_PACK_DIRS, ENABLE_RUBY24, GMMLIB_VERSION, GMMLIB_REPO_NAME))
 
 
 # TODO: Define where to copy
@@ -155,6 +155,30 @@ Here we add options[ENV][API_VERSION] to 'lib_path'
 """
 lib_path = str(lib_path).format_map(options)
 
+"""
+Helpers shared by configurations (build cache, compiler cache, parallel packing, tracing of actions and so on)
+are in `config_helpers.py`. Product-configs repository is extracted next to infrastructure, so import them as:
+"""
+import sys
+
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
+"""
+Values which need populated sandbox or are expensive to compute (for example commit numbers) should not be
+computed during loading of configuration. Put their providers to `options['DEFERRED']` and refer to them
+in commands as `{DEFERRED[<name>]}`, they are computed on the first formatting of command:
+"""
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=MEDIA_SDK_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+action('print build number', cmd='echo {DEFERRED[build_num]}')
+"""
+Actions of configuration can be listed without sandbox by `python3 tools/dry_run.py <configuration>`
+"""
+
 # ==============================================================================
 # Configuration: archiving
 # ==============================================================================
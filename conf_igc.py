@@ -18,14 +18,23 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import sys
 from pathlib import Path
 
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues, get_build_env, hash_local_changes, run_git, strip_root_dir
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
 
 IGC_REPO_NAME = 'intel-graphics-compiler'
 IGC_PACK_NAME = 'intel-igc-opencl'
 
 IGC_REPO_DIR = options.get('REPOS_DIR') / IGC_REPO_NAME
-BUILD_NUM = get_commit_number(IGC_REPO_DIR)
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=IGC_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
 IGC_VERSION = manifest.get_component(IGC_REPO_NAME).version + f'.{BUILD_NUM}'
 
 
@@ -57,8 +66,130 @@ IGC_LIB_INSTALL_DIRS = {
 }
 
 
+# Prebuilt LLVM toolchain for IGC: llvm-project with clang, opencl-clang and SPIRV-LLVM-Translator
+# patched by llvm-patches
+# Install tree of the toolchain is cached in LLVM_CACHE_DIR, keyed on revisions and local changes of these
+# repositories and applied patches, so builds of IGC changes do not rebuild LLVM
+LLVM_CACHE_DIR = args.get('llvm_cache_dir')
+LLVM_CACHE_MAX_ENTRIES = int(args.get('llvm_cache_max_entries', 3))
+LLVM_VERSION = '9.0.0'
+LLVM_REPO_NAMES = ['llvm-project', 'opencl-clang', 'SPIRV-LLVM-Translator', 'llvm-patches']
+LLVM_PATCHES_DIR = options['REPOS_DIR'] / 'llvm-patches' / 'releases' / LLVM_VERSION / 'patches_external'
+LLVM_BUILD_DIR = options['ROOT_DIR'] / 'build_llvm'
+LLVM_PREFIX = options['ROOT_DIR'] / 'llvm_prebuilt'
+LLVM_CACHE_KEY_FILE = LLVM_BUILD_DIR / '.llvm_cache_key'
+LLVM_CACHE_HIT_MARKER = LLVM_BUILD_DIR / '.llvm_cache_hit'
+
+
+def skip_on_llvm_cache_hit(cmd):
+    # LLVM is not needed if IGC is restored from build cache too
+    return helpers.skip_on_build_cache_hit(f'test -f {LLVM_CACHE_HIT_MARKER} || ({cmd})')
+
+
+def lookup_llvm_cache(repo_dirs, build_cmd):
+    """
+    Restores prebuilt LLVM toolchain from LLVM_CACHE_DIR to LLVM_PREFIX and marks LLVM build as cached
+    Cache key is computed from HEAD revisions and local changes of LLVM repositories,
+    content of patches from LLVM_PATCHES_DIR, build command and build variables of ENV without ROOT_DIR
+    LLVM is not needed if IGC is restored from build cache, so the lookup is skipped then
+
+    :param repo_dirs: repositories of LLVM toolchain
+    :param build_cmd: cmake command of LLVM toolchain
+    :return: None
+    """
+
+    import hashlib
+    import json
+    import pathlib
+    import shutil
+    import subprocess
+
+    if helpers.build_cache_hit_marker.exists():
+        log.info('IGC is restored from build cache, LLVM cache lookup is skipped')
+        return
+
+    key_data = {
+        'revisions': {
+            repo_dir.name: [run_git(repo_dir, 'rev-parse', 'HEAD').decode().strip(), hash_local_changes(repo_dir)]
+            for repo_dir in repo_dirs
+        },
+        # Patches can be untracked, so they are hashed in addition to diff of llvm-patches
+        'patches': {
+            patch.name: hashlib.sha256(patch.read_bytes()).hexdigest()
+            for patch in sorted(LLVM_PATCHES_DIR.glob('*.patch'))
+        },
+        'build_cmd': strip_root_dir(build_cmd, options['ROOT_DIR']),
+        'env': get_build_env(options['ENV'], options['ROOT_DIR']),
+    }
+    cache_key = hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+    shutil.rmtree(LLVM_PREFIX, ignore_errors=True)
+    LLVM_BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    LLVM_CACHE_KEY_FILE.write_text(cache_key)
+    if LLVM_CACHE_HIT_MARKER.exists():
+        LLVM_CACHE_HIT_MARKER.unlink()
+
+    cache_entry = pathlib.Path(LLVM_CACHE_DIR) / cache_key
+    if not cache_entry.exists():
+        log.info(f'LLVM cache miss: {cache_key}, revisions: {key_data["revisions"]}')
+        return
+
+    # Touch entry to keep it in cache, eviction removes least recently used entries
+    cache_entry.touch()
+    subprocess.run(['cp', '-a', '-T', '--reflink=auto', str(cache_entry), str(LLVM_PREFIX)], check=True)
+    LLVM_CACHE_HIT_MARKER.touch()
+    log.info(f'LLVM cache hit: {cache_key}, LLVM build is skipped')
+
+
+def store_llvm_cache():
+    """
+    Stores LLVM_PREFIX to LLVM_CACHE_DIR after LLVM build, the oldest entries over LLVM_CACHE_MAX_ENTRIES are removed
+
+    :return: None
+    """
+
+    import pathlib
+    import shutil
+    import subprocess
+    import tempfile
+
+    if LLVM_CACHE_HIT_MARKER.exists() or helpers.build_cache_hit_marker.exists():
+        return
+
+    cache_dir = pathlib.Path(LLVM_CACHE_DIR)
+    cache_entry = cache_dir / LLVM_CACHE_KEY_FILE.read_text()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_entry = pathlib.Path(tempfile.mkdtemp(dir=cache_dir, prefix='.tmp_'))
+    subprocess.run(['cp', '-a', '--reflink=auto', f'{LLVM_PREFIX}/.', str(tmp_entry)], check=True)
+    try:
+        tmp_entry.rename(cache_entry)
+        log.info(f'Store {LLVM_PREFIX} to {cache_entry}')
+    except OSError:
+        # Entry was stored by concurrent build
+        shutil.rmtree(tmp_entry)
+
+    entries = sorted((entry for entry in cache_dir.iterdir() if not entry.name.startswith('.tmp_')),
+                     key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[LLVM_CACHE_MAX_ENTRIES:]:
+        if entry != cache_entry:
+            log.info(f'Evict {entry} from LLVM cache')
+            shutil.rmtree(entry)
+
+
+# Layout of dependency structure in BUILD_DIR:
+# copy - full copy of repositories
+# reflink - copy-on-write clones of repositories files, requires filesystem support (btrfs, xfs)
+# hardlink - hard links to repositories files, files from other filesystem are copied
+# auto - reflink, falls back to hardlink
+# Directories are created in BUILD_DIR in all layouts, so moves inside the structure do not change repositories.
+# Patches replace files instead of modifying them in place, so hard linked files of repositories are not changed
+DEPENDENCY_LAYOUT = args.get('igc_layout', 'auto')
+if DEPENDENCY_LAYOUT not in ('copy', 'reflink', 'hardlink', 'auto'):
+    raise Exception(f"Unknown igc_layout '{DEPENDENCY_LAYOUT}', possible: copy, reflink, hardlink, auto")
+
+
 # Copy directory according to dependency structure
-def build_dependency_structure(src_dir, dst_dir, dependency_structure):
+def build_dependency_structure(src_dir, dst_dir, dependency_structure, layout='auto'):
     '''
     Creates directory structure regarding source_path as follows:
     source_path: options.get('REPOS_DIR')
@@ -72,47 +203,238 @@ def build_dependency_structure(src_dir, dst_dir, dependency_structure):
         igc
     }
 
+    In reflink and hardlink layouts files are cloned or linked, which is faster than copy and takes no space.
+    Files of other filesystem than dst_dir are copied with a warning.
     '''
 
-    for repo_name, link_name in dependency_structure.items():
-        copytree(str(src_dir / repo_name), str(dst_dir / link_name), symlinks=True, ignore_dangling_symlinks=True)
+    import os
+    import shutil
+    import subprocess
 
+    if layout == 'copy':
+        for repo_name, link_name in dependency_structure.items():
+            copytree(str(src_dir / repo_name), str(dst_dir / link_name), symlinks=True, ignore_dangling_symlinks=True)
+        return
 
-cmake_command = ['cmake3']
+    stats = {'copied': 0, 'hard linked': 0, 'reflinked': 0}
+
+    def link_or_copy(src, dst):
+        try:
+            os.link(src, dst)
+            stats['hard linked'] += os.lstat(src).st_size
+        except OSError:
+            # Hard links are not possible between filesystems
+            shutil.copy2(src, dst)
+            stats['copied'] += os.lstat(src).st_size
+
+    use_reflinks = layout in ('reflink', 'auto')
+    for repo_name, link_name in dependency_structure.items():
+        src, dst = src_dir / repo_name, dst_dir / link_name
+        dst.parent.mkdir(parents=True, exist_ok=True)
+
+        if use_reflinks:
+            # -T copies content of src to dst, existing dst does not get src dir inside
+            result = subprocess.run(['cp', '-a', '-T', '--reflink=always', str(src), str(dst)],
+                                    stderr=subprocess.PIPE, universal_newlines=True)
+            if not result.returncode:
+                stats['reflinked'] += sum(os.lstat(os.path.join(root, name)).st_size
+                                          for root, _, files in os.walk(src) for name in files)
+                continue
+            if layout == 'reflink':
+                raise Exception(f"Reflink of {src} failed: {result.stderr}")
+            log.warning(f"Reflinks are not supported, hard links are used: {result.stderr.splitlines()[0]}")
+            use_reflinks = False
+            if dst.exists():
+                shutil.rmtree(dst)
+
+        shutil.copytree(str(src), str(dst), symlinks=True, copy_function=link_or_copy)
+
+    if stats['copied']:
+        log.warning(f"{stats['copied'] / 1024 ** 2:.1f} MB of {src_dir} are copied, "
+                    f"hard links to {dst_dir} are not possible from other filesystem")
+    log.info(', '.join(f'{size / 1024 ** 2:.1f} MB {kind}' for kind, size in stats.items()))
+
+
+# Split debug info of binaries to separate -dbg (deb) and -debuginfo (rpm) packages instead of shipping it
+SPLIT_DEBUGINFO = args.get('split_debuginfo', False)
+DEBUGINFO_DIR = options['ROOT_DIR'] / 'debuginfo'
+
+
+def split_debuginfo(binaries_dir, debuginfo_dir):
+    """
+    Moves debug info of ELF files from binaries_dir to compressed files in debuginfo_dir/usr/lib/debug in parallel
+    Debug files are named by build-id (.build-id/xx/yyyy.debug), binaries are linked to them by .gnu_debuglink
+
+    :param binaries_dir: dir with installed binaries
+    :param debuginfo_dir: staging dir of debug info package
+    :return: None
+    """
+
+    import re
+    import shutil
+    import subprocess
+    from concurrent.futures import ThreadPoolExecutor
+
+    def is_elf(path):
+        with path.open('rb') as binary:
+            return binary.read(4) == b'\x7fELF'
+
+    def split(binary):
+        size = binary.stat().st_size
+        notes = subprocess.run(['readelf', '-n', str(binary)], check=True, stdout=subprocess.PIPE,
+                               universal_newlines=True).stdout
+        build_id = re.search(r'Build ID: ([0-9a-f]+)', notes)
+        if build_id:
+            debug_file = debug_dir / '.build-id' / build_id.group(1)[:2] / f'{build_id.group(1)[2:]}.debug'
+        else:
+            debug_file = debug_dir / f'{binary.relative_to(binaries_dir)}.debug'
+        debug_file.parent.mkdir(parents=True, exist_ok=True)
+
+        subprocess.run(['objcopy', '--only-keep-debug', '--compress-debug-sections=zlib',
+                        str(binary), str(debug_file)], check=True)
+        subprocess.run(['objcopy', '--strip-debug', f'--add-gnu-debuglink={debug_file}', str(binary)], check=True)
+        return binary, size, binary.stat().st_size, debug_file.stat().st_size
+
+    debug_dir = debuginfo_dir / 'usr' / 'lib' / 'debug'
+    shutil.rmtree(debug_dir, ignore_errors=True)
+    binaries = [path for path in binaries_dir.rglob('*')
+                if path.is_file() and not path.is_symlink() and is_elf(path)]
+    with ThreadPoolExecutor(max_workers=options['CPU_CORES']) as executor:
+        results = list(executor.map(split, binaries))
+
+    for binary, size, stripped_size, debug_size in sorted(results, key=lambda result: -result[1]):
+        log.info(f'{binary.relative_to(binaries_dir)}: {size / 1024 ** 2:.1f}MB -> {stripped_size / 1024 ** 2:.1f}MB, '
+                 f'debug info {debug_size / 1024 ** 2:.1f}MB')
+    log.info(f'{len(results)} binaries: {sum(result[1] for result in results) / 1024 ** 2:.1f}MB -> '
+             f'{sum(result[2] for result in results) / 1024 ** 2:.1f}MB, '
+             f'debug info {sum(result[3] for result in results) / 1024 ** 2:.1f}MB')
+
+
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
+cmake_command = ['cmake3', f'-G "{helpers.build_backend["generator"]}"']
 
 IGC_REPO_DIR = options['BUILD_DIR'] / f'{DEPENDENCY_STRUCTURE[IGC_REPO_NAME]}/IGC'
 
 cmake_command.append('-Who-dev')
+if LLVM_CACHE_DIR:
+    # IGC finds LLVM, clang, opencl-clang and SPIRV-LLVM-Translator in LLVM_PREFIX instead of building them
+    cmake_command.extend([
+        '-DIGC_OPTION__FORCE_SYSTEM_LLVM=ON',
+        f'-DIGC_PREFERRED_LLVM_VERSION={LLVM_VERSION}',
+        '-DCCLANG_FROM_SYSTEM=ON',
+        f'-DCMAKE_PREFIX_PATH={LLVM_PREFIX}',
+    ])
 cmake_command.append(str(IGC_REPO_DIR))
 cmake = ' '.join(cmake_command)
 
+llvm_cmake = ' '.join([
+    'cmake3', f'-G "{helpers.build_backend["generator"]}"', '-Who-dev',
+    '-DCMAKE_BUILD_TYPE=Release',
+    f'-DCMAKE_INSTALL_PREFIX={LLVM_PREFIX}',
+    '-DLLVM_TARGETS_TO_BUILD=X86',
+    '-DLLVM_INCLUDE_TESTS=OFF',
+    '-DLLVM_INCLUDE_EXAMPLES=OFF',
+    '-DLLVM_ENABLE_TERMINFO=OFF',
+    str(options['BUILD_DIR'] / DEPENDENCY_STRUCTURE['llvm-project'] / 'llvm'),
+])
+
 # Make Structure
 action('igc: create repos structure',
        stage=stage.EXTRACT,
        work_dir=options['BUILD_DIR'],
-       callfunc=(build_dependency_structure, [options['REPOS_DIR'], options['BUILD_DIR'], DEPENDENCY_STRUCTURE], {}))
+       callfunc=(build_dependency_structure, [options['REPOS_DIR'], options['BUILD_DIR'], DEPENDENCY_STRUCTURE],
+                 {'layout': DEPENDENCY_LAYOUT}))
 
 action('igc: move clang dir',
        stage=stage.EXTRACT,
        cmd="mv llvm-project/clang llvm-project/llvm/tools/",
        work_dir=options['BUILD_DIR'])
 
+# IGC build cache is looked up first, LLVM toolchain is not built or restored on its hit
+if helpers.build_cache_dir:
+    action('igc: look up build cache',
+           callfunc=(helpers.lookup_build_cache,
+                     [[options['REPOS_DIR'] / repo_name for repo_name in DEPENDENCY_STRUCTURE], cmake, []], {}))
+
+# Build LLVM toolchain or take it from LLVM cache
+if LLVM_CACHE_DIR:
+    action('igc: look up LLVM cache',
+           callfunc=(lookup_llvm_cache, [[options['REPOS_DIR'] / repo_name for repo_name in LLVM_REPO_NAMES],
+                                         llvm_cmake], {}))
+
+    # Every patch is checked before it is applied, so a patch which does not apply changes nothing
+    git_apply = f'git -C {DEPENDENCY_STRUCTURE["llvm-project"]} apply --directory=llvm'
+    action('igc: apply LLVM patches',
+           work_dir=options['BUILD_DIR'],
+           cmd=skip_on_llvm_cache_hit(
+               f'for patch in {DEPENDENCY_STRUCTURE["llvm-patches"]}/releases/{LLVM_VERSION}/patches_external/*.patch; '
+               f'do {git_apply} --check $PWD/$patch && {git_apply} $PWD/$patch || exit 1; done'))
+
+    action('igc: LLVM cmake',
+           work_dir=LLVM_BUILD_DIR,
+           cmd=skip_on_llvm_cache_hit(llvm_cmake))
+
+    action('igc: LLVM build',
+           work_dir=LLVM_BUILD_DIR,
+           cmd=skip_on_llvm_cache_hit(helpers.build_backend['build'].format(jobs='`nproc`')))
+
+    action('igc: LLVM install',
+           work_dir=LLVM_BUILD_DIR,
+           cmd=skip_on_llvm_cache_hit(helpers.build_backend['install'].format(destdir='')))
+
+    action('igc: store LLVM cache',
+           callfunc=(store_llvm_cache, [], {}))
+
 # Build igc
+if helpers.compiler_cache:
+    action('igc: enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
 action('igc: cmake',
        work_dir=options['BUILD_DIR'],
-       cmd=cmake)
+       cmd=helpers.skip_on_build_cache_hit(cmake))
 
 action('igc: build',
-       cmd='make -j`nproc`')
+       cmd=helpers.skip_on_build_cache_hit(
+           helpers.with_compiler_cache_stats(helpers.build_backend['build'].format(jobs='`nproc`'))))
+
+if helpers.build_backend['timing_log']:
+    action('igc: build timing',
+           callfunc=(helpers.log_build_timing, [options['BUILD_DIR'], options['LOGS_DIR'] / 'build_timing.json'], {}))
 
 action('igc: list artifacts',
-         cmd=f'echo " " && ls {options["BUILD_DIR"]}/Release',
+         cmd=helpers.skip_on_build_cache_hit(f'echo " " && ls {options["BUILD_DIR"]}/Release'),
          verbose=True)
 
 action('igc: make install',
        stage=stage.INSTALL,
        work_dir=options['BUILD_DIR'],
-       cmd=f'make DESTDIR={options["INSTALL_DIR"]} install')
+       cmd=helpers.skip_on_build_cache_hit(helpers.build_backend['install'].format(destdir=options['INSTALL_DIR'])))
+
+if LLVM_CACHE_DIR:
+    # opencl-clang is shipped in IGC package, but it is not installed by IGC built with prebuilt LLVM
+    igc_install_lib_dir = options['INSTALL_DIR'] / IGC_DEB_PREFIX.relative_to(IGC_DEB_PREFIX.root) / 'lib64'
+    action('igc: install opencl-clang from LLVM prefix',
+           stage=stage.INSTALL,
+           cmd=helpers.skip_on_build_cache_hit(f'mkdir -p {igc_install_lib_dir} && '
+                                               f'cp -a {LLVM_PREFIX}/lib/libopencl-clang.so* {igc_install_lib_dir}/'))
+
+if helpers.build_cache_dir:
+    action('igc: sync build cache',
+           stage=stage.INSTALL,
+           callfunc=(helpers.sync_build_cache, [], {}))
+
+if SPLIT_DEBUGINFO:
+    action('igc: split debug info',
+           stage=stage.INSTALL,
+           callfunc=(split_debuginfo, [options['INSTALL_DIR'], DEBUGINFO_DIR], {}))
+
+action('igc: track binary sizes',
+       stage=stage.INSTALL,
+       callfunc=(helpers.track_binary_sizes, [['lib*.so*']], {}))
 
 # igc: pkgconfig for OS Ubuntu
 # Update pkgconfig prefix
@@ -120,53 +442,81 @@ pkgconfig_deb_pattern = {
     '/lib': f"/{IGC_LIB_INSTALL_DIRS['deb']}",
 }
 
-action('igc: change pkgconfig for deb',
-       stage=stage.PACK,
-       callfunc=(update_config, [options["INSTALL_DIR"] / IGC_DEB_PREFIX.relative_to(IGC_DEB_PREFIX.root) / PKGCONFIG,
-                                 pkgconfig_deb_pattern], {}))
-
-# Get package installation dir for igc
-pack_dir = options['INSTALL_DIR'] / IGC_DEB_PREFIX.relative_to(IGC_DEB_PREFIX.root)
-lib_install_to = IGC_DEB_PREFIX / IGC_LIB_INSTALL_DIRS['deb']
-include_install_to = IGC_DEB_PREFIX
-
-IGC_PACK_DIRS = [
-    f'{pack_dir}/lib64/={lib_install_to}/',
-    f'{pack_dir}/include/={include_install_to}/include',
-    f'{pack_dir}/bin/={include_install_to}/bin',
-]
-
-action('igc: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb',  IGC_PACK_DIRS, ENABLE_RUBY24, IGC_VERSION, IGC_PACK_NAME))
-
 # igc: pkgconfig for OS CentOS
-# Update pkgconfig prefix
+# Update pkgconfig prefix, applied over pkgconfigs updated for deb
 pkgconfig_rpm_pattern = {
     '^prefix=.+': 'prefix=/usr',
     f'{IGC_LIB_INSTALL_DIRS["deb"]}': f'{IGC_LIB_INSTALL_DIRS["rpm"]}',
 }
 
-action('igc: change pkgconfigs for rpm',
-       stage=stage.PACK,
-       callfunc=(update_config, [options["INSTALL_DIR"] / IGC_DEB_PREFIX.relative_to(IGC_DEB_PREFIX.root) / PKGCONFIG,
-                                 pkgconfig_rpm_pattern], {}))
+IGC_INSTALL_PKGCONFIG_DIR = options["INSTALL_DIR"] / IGC_DEB_PREFIX.relative_to(IGC_DEB_PREFIX.root) / PKGCONFIG
 
 # Get package installation dir for igc
-lib_install_to = IGC_CENTOS_PREFIX / IGC_LIB_INSTALL_DIRS['rpm']
-include_install_to = IGC_CENTOS_PREFIX
+pack_dir = options['INSTALL_DIR'] / IGC_DEB_PREFIX.relative_to(IGC_DEB_PREFIX.root)
+
+IGC_DEB_PACK_DIRS = [
+    f'{pack_dir}/lib64/={IGC_DEB_PREFIX / IGC_LIB_INSTALL_DIRS["deb"]}/',
+    f'{pack_dir}/include/={IGC_DEB_PREFIX}/include',
+    f'{pack_dir}/bin/={IGC_DEB_PREFIX}/bin',
+]
 
-IGC_PACK_DIRS = [
-    f'{pack_dir}/lib64/={lib_install_to}/',
-    f'{pack_dir}/include/={include_install_to}/include',
-    f'{pack_dir}/bin/={include_install_to}/bin',
+IGC_RPM_PACK_DIRS = [
+    f'{pack_dir}/lib64/={IGC_CENTOS_PREFIX / IGC_LIB_INSTALL_DIRS["rpm"]}/',
+    f'{pack_dir}/include/={IGC_CENTOS_PREFIX}/include',
+    f'{pack_dir}/bin/={IGC_CENTOS_PREFIX}/bin',
 ]
 
-action('igc: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', IGC_PACK_DIRS, ENABLE_RUBY24, IGC_VERSION, IGC_PACK_NAME))
+# Debug info packages, the same paths are used by deb and rpm
+IGC_DEBUGINFO_PACK_DIRS = [
+    f'{DEBUGINFO_DIR}/usr/lib/debug/=/usr/lib/debug',
+]
+IGC_DEBUGINFO_PACK_NAMES = {
+    'deb': f'{IGC_PACK_NAME}-dbg',
+    'rpm': f'{IGC_PACK_NAME}-debuginfo',
+}
+
+if helpers.parallel_pack:
+    IGC_PACK_JOBS = [
+        {'type': 'deb', 'pack_dirs': IGC_DEB_PACK_DIRS, 'version': IGC_VERSION, 'name': IGC_PACK_NAME,
+         'updates': [(IGC_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern, {})]},
+        {'type': 'rpm', 'pack_dirs': IGC_RPM_PACK_DIRS, 'version': IGC_VERSION, 'name': IGC_PACK_NAME,
+         'updates': [(IGC_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern, {}),
+                     (IGC_INSTALL_PKGCONFIG_DIR, pkgconfig_rpm_pattern, {})]},
+    ]
+    if SPLIT_DEBUGINFO:
+        IGC_PACK_JOBS.extend(
+            {'type': pack_type, 'pack_dirs': IGC_DEBUGINFO_PACK_DIRS, 'version': IGC_VERSION, 'name': pack_name}
+            for pack_type, pack_name in IGC_DEBUGINFO_PACK_NAMES.items())
+
+    action('igc: create deb and rpm pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [IGC_PACK_JOBS, ENABLE_RUBY24], {}))
+else:
+    action('igc: change pkgconfig for deb',
+           stage=stage.PACK,
+           callfunc=(update_config, [IGC_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern], {}))
+
+    action('igc: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb',  IGC_DEB_PACK_DIRS, ENABLE_RUBY24, IGC_VERSION, IGC_PACK_NAME))
+
+    action('igc: change pkgconfigs for rpm',
+           stage=stage.PACK,
+           callfunc=(update_config, [IGC_INSTALL_PKGCONFIG_DIR, pkgconfig_rpm_pattern], {}))
+
+    action('igc: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', IGC_RPM_PACK_DIRS, ENABLE_RUBY24, IGC_VERSION, IGC_PACK_NAME))
+
+    if SPLIT_DEBUGINFO:
+        for pack_type, pack_name in IGC_DEBUGINFO_PACK_NAMES.items():
+            action(f'igc: create {pack_type} debug info pkg',
+                   stage=stage.PACK,
+                   work_dir=options['PACK_DIR'],
+                   cmd=get_packing_cmd(pack_type, IGC_DEBUGINFO_PACK_DIRS, ENABLE_RUBY24, IGC_VERSION, pack_name))
 
 
 INSTALL_PKG_DATA_TO_ARCHIVE.extend([
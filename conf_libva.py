@@ -18,14 +18,22 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-
+import sys
 from pathlib import Path
 
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
 
 LIBVA_REPO_NAME = 'libva'
 
 LIBVA_REPO_DIR = options.get('REPOS_DIR') / LIBVA_REPO_NAME
-BUILD_NUM = get_commit_number(LIBVA_REPO_DIR)
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=LIBVA_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
 LIBVA_VERSION = manifest.get_component(LIBVA_REPO_NAME).version + f'.{BUILD_NUM}'
 
 
@@ -52,30 +60,56 @@ LIBVA_LIB_INSTALL_DIRS = {
 LIBVA_REPO_DIR = options.get('REPOS_DIR') / LIBVA_REPO_NAME
 
 
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
 cmd = []
 cmd.append('--buildtype=release')
 cmd.append('-Ddriverdir=/opt/intel/mediasdk/lib64')
 cmd.append('-Dc_args="-O2 -fPIC -fPIE -D_FORTIFY_SOURCE=2 -DNDEBUG -fstack-protector-strong -Wno-dev"')
 cmd.append('-Dc_link_args="-z noexecstack -z relro -z now"')
 
+meson = f'meson {(" ").join(cmd)} {LIBVA_REPO_DIR}'
+
 # Build LibVA
+if helpers.build_cache_dir:
+    action('LibVA: look up build cache',
+           callfunc=(helpers.lookup_build_cache, [[LIBVA_REPO_DIR], meson, []], {}))
+
+if helpers.compiler_cache:
+    action('LibVA: enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
 action('LibVA: meson',
        work_dir=options['BUILD_DIR'],
-       cmd=f'meson {(" ").join(cmd)} {LIBVA_REPO_DIR}')
+       cmd=helpers.skip_on_build_cache_hit(meson))
 
 action('LibVA: ninja-build',
        work_dir=options['BUILD_DIR'],
-       cmd=f'ninja-build -j`nproc`')
+       cmd=helpers.skip_on_build_cache_hit(helpers.with_compiler_cache_stats(f'ninja-build -j`nproc`')))
+
+LIBVA_SDL_POLICY = {
+    'compile': ['-D_FORTIFY_SOURCE=2', '-fstack-protector-strong'],
+    'link': ['-z noexecstack', '-z relro', '-z now'],
+}
+action('LibVA: verify SDL flags',
+       callfunc=(helpers.verify_sdl_flags, ['libva', options['BUILD_DIR'], LIBVA_SDL_POLICY], {}))
 
 action('LibVA: list artifacts',
        work_dir=options['BUILD_DIR'],
-       cmd=f'echo " " && ls ./va',
+       cmd=helpers.skip_on_build_cache_hit(f'echo " " && ls ./va'),
        verbose=True)
 
 action('LibVA: ninja-build install',
        stage=stage.INSTALL,
        work_dir=options['BUILD_DIR'],
-       cmd=f'DESTDIR={options["INSTALL_DIR"]} ninja-build install')
+       cmd=helpers.skip_on_build_cache_hit(f'DESTDIR={options["INSTALL_DIR"]} ninja-build install'))
+
+if helpers.build_cache_dir:
+    action('LibVA: sync build cache',
+           stage=stage.INSTALL,
+           callfunc=(helpers.sync_build_cache, [], {}))
 
 
 # Create fake LibVA pkgconfigs to build MediaSDK from custom location
@@ -94,50 +128,57 @@ pkgconfig_deb_pattern = {
     '^includedir=.*/include': 'includedir=${prefix}/include'
 }
 
-action('LibVA: change pkgconfig for deb',
-       stage=stage.PACK,
-       callfunc=(update_config, [options["INSTALL_DIR"] / LIBVA_PKGCONFIG_DIR.relative_to(LIBVA_PKGCONFIG_DIR.root),
-                                 pkgconfig_deb_pattern], {}))
-
-# Get package installation dirs for LibVA
-pack_dir = options['INSTALL_DIR'] / LIBVA_DEB_PREFIX.relative_to(LIBVA_DEB_PREFIX.root)
-lib_install_to = LIBVA_DEB_PREFIX / LIBVA_LIB_INSTALL_DIRS['deb']
-include_install_to = LIBVA_DEB_PREFIX
-
-LIBVA_PACK_DIRS = [
-    f'{pack_dir}/lib64/={lib_install_to}/',
-    f'{pack_dir}/include/={include_install_to}/include'
-]
-
-action('LibVA: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb',  LIBVA_PACK_DIRS, ENABLE_RUBY24, LIBVA_VERSION, LIBVA_REPO_NAME))
-
 # LibVA: pkgconfig for OS CentOS
+# Applied over pkgconfigs updated for deb
 pkgconfig_rpm_pattern = {
     '^prefix=.+': 'prefix=/usr',
     f'/{LIBVA_LIB_INSTALL_DIRS["deb"]}': f'/{LIBVA_LIB_INSTALL_DIRS["rpm"]}',
 }
 
-action('LibVA: change pkgconfigs for rpm',
-       stage=stage.PACK,
-       callfunc=(update_config, [options["INSTALL_DIR"] / LIBVA_PKGCONFIG_DIR.relative_to(LIBVA_PKGCONFIG_DIR.root),
-                                 pkgconfig_rpm_pattern], {}))
+LIBVA_INSTALL_PKGCONFIG_DIR = options["INSTALL_DIR"] / LIBVA_PKGCONFIG_DIR.relative_to(LIBVA_PKGCONFIG_DIR.root)
+
+# Get package installation dirs for LibVA
+pack_dir = options['INSTALL_DIR'] / LIBVA_DEB_PREFIX.relative_to(LIBVA_DEB_PREFIX.root)
 
-# Get package installation dir for LibVA
-lib_install_to = LIBVA_CENTOS_PREFIX / LIBVA_LIB_INSTALL_DIRS['rpm']
-include_install_to = LIBVA_CENTOS_PREFIX
+LIBVA_DEB_PACK_DIRS = [
+    f'{pack_dir}/lib64/={LIBVA_DEB_PREFIX / LIBVA_LIB_INSTALL_DIRS["deb"]}/',
+    f'{pack_dir}/include/={LIBVA_DEB_PREFIX}/include'
+]
 
-LIBVA_PACK_DIRS = [
-    f'{pack_dir}/lib64/={lib_install_to}/',
-    f'{pack_dir}/include/={include_install_to}/include'
+LIBVA_RPM_PACK_DIRS = [
+    f'{pack_dir}/lib64/={LIBVA_CENTOS_PREFIX / LIBVA_LIB_INSTALL_DIRS["rpm"]}/',
+    f'{pack_dir}/include/={LIBVA_CENTOS_PREFIX}/include'
 ]
 
-action('LibVA: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', LIBVA_PACK_DIRS, ENABLE_RUBY24, LIBVA_VERSION, LIBVA_REPO_NAME))
+if helpers.parallel_pack:
+    action('LibVA: create deb and rpm pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [[
+               {'type': 'deb', 'pack_dirs': LIBVA_DEB_PACK_DIRS, 'version': LIBVA_VERSION, 'name': LIBVA_REPO_NAME,
+                'updates': [(LIBVA_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern, {})]},
+               {'type': 'rpm', 'pack_dirs': LIBVA_RPM_PACK_DIRS, 'version': LIBVA_VERSION, 'name': LIBVA_REPO_NAME,
+                'updates': [(LIBVA_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern, {}),
+                            (LIBVA_INSTALL_PKGCONFIG_DIR, pkgconfig_rpm_pattern, {})]},
+           ], ENABLE_RUBY24], {}))
+else:
+    action('LibVA: change pkgconfig for deb',
+           stage=stage.PACK,
+           callfunc=(update_config, [LIBVA_INSTALL_PKGCONFIG_DIR, pkgconfig_deb_pattern], {}))
+
+    action('LibVA: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb',  LIBVA_DEB_PACK_DIRS, ENABLE_RUBY24, LIBVA_VERSION, LIBVA_REPO_NAME))
+
+    action('LibVA: change pkgconfigs for rpm',
+           stage=stage.PACK,
+           callfunc=(update_config, [LIBVA_INSTALL_PKGCONFIG_DIR, pkgconfig_rpm_pattern], {}))
+
+    action('LibVA: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', LIBVA_RPM_PACK_DIRS, ENABLE_RUBY24, LIBVA_VERSION, LIBVA_REPO_NAME))
 
 
 INSTALL_PKG_DATA_TO_ARCHIVE.extend([
@@ -18,13 +18,22 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-
+import sys
 from pathlib import Path
 
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
+
 LIBVA_UTILS_REPO_NAME = 'libva-utils'
 
 LIBVA_UTILS_REPO_DIR = options.get('REPOS_DIR') / LIBVA_UTILS_REPO_NAME
-BUILD_NUM = get_commit_number(LIBVA_UTILS_REPO_DIR)
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=LIBVA_UTILS_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
 LIBVA_UTILS_VERSION = manifest.get_component(LIBVA_UTILS_REPO_NAME).version + f'.{BUILD_NUM}'
 
 DEPENDENCIES = [
@@ -46,16 +55,17 @@ LIBVA_UTILS_INSTALL_DIRS = {
 }
 
 
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
 # Prepare dependencies
 # Libva
-LIBVA_PATH = options['DEPENDENCIES_DIR'] / 'libva' / 'usr' / 'local'
+LIBVA_PATH = helpers.sysroot_dir / 'libva'
 LIBVA_PKG_CONFIG_PATH = LIBVA_PATH / 'lib64' / 'pkgconfig'
-LIBVA_PKG_CONFIG_RPM_PATTERN = {
-    '^prefix=.+': f'prefix={LIBVA_PATH}',
-}
-action('LibVA: change pkgconfigs',
+action('LibVA: prepare sysroot',
        stage=stage.EXTRACT,
-       callfunc=(update_config, [LIBVA_PKG_CONFIG_PATH, LIBVA_PKG_CONFIG_RPM_PATTERN], {}))
+       callfunc=(helpers.prepare_dependency_sysroot, ['libva'], {}))
 
 
 # Build libva-utils
@@ -65,6 +75,10 @@ LIBVA_UTILS_REPO_DIR = options.get('REPOS_DIR') / LIBVA_UTILS_REPO_NAME
 cflags = '-fstack-protector-strong -fPIC -pie -O2 -D_FORTIFY_SOURCE=2'
 meson_args = f'-D c_args="{cflags}" -D c_link_args="{cflags}" -D cpp_args="{cflags}" -D cpp_link_args="{cflags}"'
 
+if helpers.compiler_cache:
+    action('libva-utils: enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
 action('libva-utils: meson',
        work_dir=LIBVA_UTILS_BUILD_DIR,
        cmd=f'meson {meson_args} {LIBVA_UTILS_REPO_DIR}',
@@ -72,9 +86,16 @@ action('libva-utils: meson',
 
 action('libva-utils: ninja-build',
        work_dir=LIBVA_UTILS_BUILD_DIR,
-       cmd='ninja-build -j`nproc`',
+       cmd=helpers.with_compiler_cache_stats('ninja-build -j`nproc`'),
        env={'PKG_CONFIG_PATH': f'{LIBVA_PKG_CONFIG_PATH}'})
 
+LIBVA_UTILS_SDL_POLICY = {
+    'compile': ['-D_FORTIFY_SOURCE=2', '-fstack-protector-strong'],
+    'link': ['-fstack-protector-strong', '-pie'],
+}
+action('libva-utils: verify SDL flags',
+       callfunc=(helpers.verify_sdl_flags, ['libva-utils', LIBVA_UTILS_BUILD_DIR, LIBVA_UTILS_SDL_POLICY], {}))
+
 action('libva-utils: ninja-build install',
        stage=stage.INSTALL,
        work_dir=LIBVA_UTILS_BUILD_DIR,
@@ -82,29 +103,37 @@ action('libva-utils: ninja-build install',
 
 # Get package installation dirs for LibVA
 pack_dir = options['INSTALL_DIR'] / LIBVA_UTILS_DEB_PREFIX.relative_to(LIBVA_UTILS_DEB_PREFIX.root)
-install_to = LIBVA_UTILS_DEB_PREFIX
-
-LIBVA_PACK_DIRS = [
-    f'{pack_dir}/bin/={install_to}/bin'
-]
 
 # libva-utils: pkgconfig for OS Ubuntu
-action('libva-utils: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb',  LIBVA_PACK_DIRS, ENABLE_RUBY24, LIBVA_UTILS_VERSION, LIBVA_UTILS_REPO_NAME))
+LIBVA_DEB_PACK_DIRS = [
+    f'{pack_dir}/bin/={LIBVA_UTILS_DEB_PREFIX}/bin'
+]
 
 # libva-utils: pkgconfig for OS CentOS
-install_to = LIBVA_UTILS_CENTOS_PREFIX
-
-LIBVA_PACK_DIRS = [
-    f'{pack_dir}/bin/={install_to}/bin'
+LIBVA_RPM_PACK_DIRS = [
+    f'{pack_dir}/bin/={LIBVA_UTILS_CENTOS_PREFIX}/bin'
 ]
 
-action('libva-utils: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', LIBVA_PACK_DIRS, ENABLE_RUBY24, LIBVA_UTILS_VERSION, LIBVA_UTILS_REPO_NAME))
+if helpers.parallel_pack:
+    action('libva-utils: create deb and rpm pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [[
+               {'type': 'deb', 'pack_dirs': LIBVA_DEB_PACK_DIRS,
+                'version': LIBVA_UTILS_VERSION, 'name': LIBVA_UTILS_REPO_NAME},
+               {'type': 'rpm', 'pack_dirs': LIBVA_RPM_PACK_DIRS,
+                'version': LIBVA_UTILS_VERSION, 'name': LIBVA_UTILS_REPO_NAME},
+           ], ENABLE_RUBY24], {}))
+else:
+    action('libva-utils: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb',  LIBVA_DEB_PACK_DIRS, ENABLE_RUBY24, LIBVA_UTILS_VERSION, LIBVA_UTILS_REPO_NAME))
+
+    action('libva-utils: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', LIBVA_RPM_PACK_DIRS, ENABLE_RUBY24, LIBVA_UTILS_VERSION, LIBVA_UTILS_REPO_NAME))
 
 
 INSTALL_PKG_DATA_TO_ARCHIVE.extend([
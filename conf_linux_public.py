@@ -18,6 +18,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import sys
+
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+
 MEDIA_SDK_REPO_NAME = 'MediaSDK'
 
 DEPENDENCIES = [
@@ -32,8 +38,8 @@ options["STRIP_BINARIES"] = True
 MEDIA_SDK_REPO_DIR = options.get('REPOS_DIR') / MEDIA_SDK_REPO_NAME
 MEDIA_SDK_BUILD_DIR = options.get('BUILD_DIR')
 
-# Full build log for checking SDL options
-VERBOSE_BUILD_OUTPUT = True
+# Full build log, SDL options are verified in compile_commands.json by verify_sdl_flags without it
+VERBOSE_BUILD_OUTPUT = args.get('verbose_build', False)
 
 # Max size = current fastboot lib size + ~50Kb
 FASTBOOT_LIB_MAX_SIZE = 1 * 1024 * 1024 + 256 * 1024  # byte
@@ -44,10 +50,145 @@ MSDK_LIB_INSTALL_DIRS = {
     'deb': '/opt/intel/mediasdk'
 }
 
+# MediaSDK variants: full build and fastboot build
+MEDIA_SDK_VARIANT = 'fastboot' if args.get('fastboot') else 'full'
+
+# Additional variants built in the same job, for example: build_variants: ['fastboot']
+# They are built in sibling dirs of BUILD_DIR through shared compiler cache,
+# so translation units with the same flags are compiled only once
+EXTRA_VARIANTS = [variant for variant in args.get('build_variants', []) if variant != MEDIA_SDK_VARIANT]
+for variant in EXTRA_VARIANTS:
+    if variant not in ('full', 'fastboot'):
+        raise Exception(f"Unknown MediaSDK variant '{variant}', possible: full, fastboot")
+
+# Additional variants are always compiled through ccache to reuse objects of the main build
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd,
+                        compiler_cache=bool(EXTRA_VARIANTS))
+
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
+# Output of actions is compressed to LOGS_DIR/build_log.gz instead of build log of infrastructure,
+# only errors, summary and tail of failed actions are printed to build log
+COMPRESSED_LOGS = args.get('compressed_logs', False)
+COMPRESSED_LOG_PATH = options['LOGS_DIR'] / 'build_log.gz'
+COMPRESSED_LOG_INDEX_PATH = options['LOGS_DIR'] / 'build_log.index.jsonl'
+
+# Runs cmd of action and writes its output to compressed log by frames of ~1MB, every frame is a separate gzip member,
+# so it can be decompressed alone from its offset. Index is JSON lines with records of types:
+#   frame - offset and size of gzip member, its first line and count of lines
+#   action - name, exit code, the first frame and count of frames of action output
+#   error, warning - line with error or warning and its frame
+# Memory use does not depend on size of output. Cmd of action is read from stdin.
+LOG_SINK = """
+import collections, gzip, json, re, subprocess, sys
+log_path, index_path, name = sys.argv[1:]
+cmd = sys.stdin.read()
+frame_size = 1024 * 1024
+markers = [('error', re.compile(rb'\\berror\\b', re.IGNORECASE)),
+           ('warning', re.compile(rb'\\bwarning\\b', re.IGNORECASE))]
+
+next_line, next_frame = 0, 0
+try:
+    with open(index_path) as index_file:
+        for record in index_file:
+            record = json.loads(record)
+            if record['type'] == 'frame':
+                next_line, next_frame = record['first_line'] + record['lines'], record['frame'] + 1
+except FileNotFoundError:
+    pass
+
+with open(log_path, 'ab') as log_file, open(index_path, 'a') as index_file:
+    first_frame, line_number = next_frame, next_line
+    stats = dict(frames=0, size=0, compressed_size=0, error=0, warning=0)
+    buffer, buffer_lines, buffer_first_line = [], 0, line_number
+    tail = collections.deque(maxlen=50)
+
+    def write_frame():
+        global buffer, buffer_lines, buffer_first_line, next_frame
+        data = b''.join(buffer)
+        compressed = gzip.compress(data, compresslevel=6)
+        index_file.write(json.dumps(dict(type='frame', frame=next_frame, offset=log_file.tell(), size=len(compressed),
+                                         first_line=buffer_first_line, lines=buffer_lines)) + '\\n')
+        log_file.write(compressed)
+        stats['frames'] += 1
+        stats['size'] += len(data)
+        stats['compressed_size'] += len(compressed)
+        buffer, buffer_lines, buffer_first_line, next_frame = [], 0, line_number, next_frame + 1
+
+    process = subprocess.Popen(cmd, shell=True, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    buffered = 0
+    for line in process.stdout:
+        for marker, regex in markers:
+            if regex.search(line):
+                stats[marker] += 1
+                index_file.write(json.dumps(dict(type=marker, line=line_number, frame=next_frame)) + '\\n')
+                if marker == 'error':
+                    sys.stdout.buffer.write(line)
+                break
+        tail.append(line)
+        buffer.append(line)
+        buffer_lines += 1
+        line_number += 1
+        buffered += len(line)
+        if buffered >= frame_size:
+            write_frame()
+            buffered = 0
+    exit_code = process.wait()
+    if buffer or not stats['frames']:
+        write_frame()
+    index_file.write(json.dumps(dict(type='action', name=name, exit_code=exit_code, first_frame=first_frame,
+                                     frames=stats['frames'], first_line=next_line,
+                                     lines=line_number - next_line)) + '\\n')
+
+if exit_code:
+    sys.stdout.buffer.write(b''.join(tail))
+print('Output of %s: %d lines, %.1fMB compressed to %.1fMB in %s, %d errors, %d warnings' % (
+    name, line_number - next_line, stats['size'] / 1024 ** 2, stats['compressed_size'] / 1024 ** 2, log_path,
+    stats['error'], stats['warning']))
+sys.stdout.flush()
+sys.exit(exit_code)
+"""
+# Delimiter of here-document which passes cmd of action to LOG_SINK, it differs from the one of traced actions
+SINK_CMD_DELIMITER = 'COMPRESSED_LOG_CMD'
+
+
+def compress_action_logs(action):
+    """
+    Wraps action function to write output of cmd actions to COMPRESSED_LOG_PATH by LOG_SINK
+    Actions with verbose output are not wrapped, as their output is intended for build log
+
+    :param action: action function of build infrastructure
+    :return: wrapped action function
+    """
+
+    import shlex
+
+    def sink_action(name, **action_kwargs):
+        if action_kwargs.get('cmd') and not action_kwargs.get('verbose'):
+            COMPRESSED_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            # Cmd is formatted by format_map(options) when action runs, so it is passed verbatim by here-document
+            # instead of quoting, and braces of the wrapper are escaped
+            sink = ' '.join(shlex.quote(str(arg)) for arg in [
+                'python3', '-c', LOG_SINK, COMPRESSED_LOG_PATH, COMPRESSED_LOG_INDEX_PATH, name])
+            sink = sink.replace('{', '{{').replace('}', '}}')
+            action_kwargs['cmd'] = f"{sink} <<'{SINK_CMD_DELIMITER}'\n{action_kwargs['cmd']}\n{SINK_CMD_DELIMITER}"
+        return action(name, **action_kwargs)
+
+    return sink_action
+
+
+if COMPRESSED_LOGS:
+    action = compress_action_logs(action)
+
 
 def set_env(repo_path, gcc_latest, clang_version):
-    build_num = get_commit_number(repo_path)
-    api_major_ver, api_minor_ver = get_api_version(f'{repo_path.name}/api')
+    build_num = helpers.get_cached_commit_number(repo_path)
+    api_path = f'{repo_path.name}/api'
+    api_major_ver, api_minor_ver = helpers.get_cached_git_metadata(repo_path, f'api_version:{api_path}',
+                                                                   lambda: get_api_version(api_path))
 
     plugin_version = f'{api_major_ver}.{api_minor_ver}.3.{build_num}'
     options["ENV"]["API_VERSION"] = f'{api_major_ver}.{api_minor_ver}'
@@ -89,6 +230,81 @@ def check_lib_size(threshold_size, lib_path):
         raise Exception(f"{lib_path.name} size = {current_lib_size}byte exceeds max_size = {threshold_size}byte")
 
 
+# Build fails if libraries are not built by compiler from `compiler` argument, compilers are only reported by default
+CHECK_COMPILER = args.get('check_compiler', False)
+
+
+# Release profile with link time and profile guided optimizations, profile is collected by unit tests.
+# Baseline build without them is built in ROOT_DIR/build_baseline for comparison
+PGO_LTO = args.get('pgo_lto', False)
+if PGO_LTO and args.get('compiler', 'gcc') != 'gcc':
+    raise Exception('LTO and PGO release profile is supported for gcc only')
+PGO_BASELINE_BUILD_DIR = options['ROOT_DIR'] / 'build_baseline'
+# Profile data (*.gcda) is written next to object files, so instrumented and optimized builds use the same build dir
+PGO_GENERATE_FLAGS = ['-fprofile-generate', '-fprofile-update=atomic']
+PGO_USE_FLAGS = [
+    '-fprofile-use', '-fprofile-correction', '-Wno-missing-profile', '-Wno-error=coverage-mismatch',
+    # Fat objects keep static libraries usable by tools without LTO plugin
+    f'-flto={options["CPU_CORES"]}', '-ffat-lto-objects',
+]
+
+
+def compare_release_profiles(baseline_dir, optimized_dir, report_path):
+    """
+    Compares CPU time of unit tests and sizes of libraries of baseline and optimized builds
+
+    :param baseline_dir: build dir of baseline build
+    :param optimized_dir: build dir of optimized build
+    :param report_path: path to json report
+    :return: None
+    """
+
+    import json
+    import re
+    import resource
+    import subprocess
+
+    def get_tests_cpu_time(build_dir):
+        listing = subprocess.run(['ctest', '-N'], cwd=build_dir, check=True, stdout=subprocess.PIPE,
+                                 universal_newlines=True).stdout
+        cpu_times = {}
+        # Tests are run one by one to avoid influence on each other
+        for index, name in re.findall(r'^\s*Test\s+#(\d+): (.+)$', listing, re.MULTILINE):
+            # Tests are run one after another, so CPU time of children is CPU time of the test
+            usage_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+            process = subprocess.run(['ctest', '-I', f'{index},{index}'], cwd=build_dir,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            # CPU time of failed run is not comparable, the test is skipped
+            if process.returncode:
+                log.warning(f'{name} failed in {build_dir} with exit code {process.returncode}, it is not compared')
+                continue
+            cpu_times[name] = round(usage.ru_utime + usage.ru_stime - usage_start.ru_utime - usage_start.ru_stime, 3)
+        return cpu_times
+
+    def get_libs_size(build_dir):
+        return {lib.name: lib.stat().st_size for lib in (build_dir / '__bin' / 'release').glob('lib*.so*')
+                if lib.is_file() and not lib.is_symlink()}
+
+    report = {
+        'tests_cpu_time': {'baseline': get_tests_cpu_time(baseline_dir),
+                           'optimized': get_tests_cpu_time(optimized_dir)},
+        'libs_size': {'baseline': get_libs_size(baseline_dir), 'optimized': get_libs_size(optimized_dir)},
+    }
+
+    lines = [f"{'':<48}{'baseline':>14}{'optimized':>14}{'change':>10}"]
+    for title, data in (('CPU time of tests, s', report['tests_cpu_time']), ('size of libraries', report['libs_size'])):
+        lines.append(title)
+        for name in sorted(data['baseline']):
+            baseline, optimized = data['baseline'][name], data['optimized'].get(name)
+            change = f'{optimized / baseline - 1:+.1%}' if baseline and optimized is not None else '-'
+            lines.append(f"  {name:<46}{baseline:>14}{optimized if optimized is not None else '-':>14}{change:>10}")
+    log.info('\n'.join(lines))
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=4))
+
+
 # Choose repository in accordance with prefix of product type
 if product_type.startswith("public"):
     repo_name = 'MediaSDK'
@@ -97,144 +313,292 @@ elif product_type.startswith("private"):
 else:
     raise IOError(f"Unknown product type '{product_type}'")
 
+
 # Prepare dependencies
-LIBVA_PATH = options['DEPENDENCIES_DIR'] / 'libva' / 'usr' / 'local'
+LIBVA_PATH = helpers.sysroot_dir / 'libva'
 LIBVA_PKG_CONFIG_PATH = LIBVA_PATH / 'lib64' / 'pkgconfig'
-LIBVA_PKG_CONFIG_RPM_PATTERN = {
-    '^prefix=.+': f'prefix={LIBVA_PATH}',
-}
 
-action('LibVA: change pkgconfigs',
+action('LibVA: prepare sysroot',
        stage=stage.EXTRACT,
-       callfunc=(update_config, [LIBVA_PKG_CONFIG_PATH, LIBVA_PKG_CONFIG_RPM_PATTERN], {}))
+       callfunc=(helpers.prepare_dependency_sysroot, ['libva'], {}))
 
 
 action('count api version and build number',
        callfunc=(set_env, [MEDIA_SDK_REPO_DIR, GCC_LATEST, CLANG_VERSION], {}))
 
+if helpers.compiler_cache:
+    action('enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
+
+def get_cmake(fastboot, compiler=args.get('compiler'), compiler_version=args.get('compiler_version'), extra_flags=()):
+    cmake_command = ['cmake3', '--no-warn-unused-cli', f'-Wno-dev -G "{helpers.build_backend["generator"]}"', '-LA']
+
+    # Default parameters (default flow):
+    release_flags = ' '.join(
+        ['-O2 -Wformat -Wformat-security -Wall -Werror -D_FORTIFY_SOURCE=2 -fstack-protector-strong', *extra_flags])
+    cmake_command.append(f'-DCMAKE_C_FLAGS_RELEASE="{release_flags}"')
+    cmake_command.append(f'-DCMAKE_CXX_FLAGS_RELEASE="{release_flags}"')
+    # Optimization and instrumentation flags are needed by linker as well
+    if extra_flags:
+        for linker_flags in ('CMAKE_EXE_LINKER_FLAGS_RELEASE', 'CMAKE_SHARED_LINKER_FLAGS_RELEASE',
+                             'CMAKE_MODULE_LINKER_FLAGS_RELEASE'):
+            cmake_command.append(f'-D{linker_flags}="{" ".join(extra_flags)}"')
+
+    cmake_command.append('-DBUILD_TESTS=ON ')
+    # compile_commands.json is used to verify SDL flags
+    cmake_command.append('-DCMAKE_EXPORT_COMPILE_COMMANDS=ON')
+
+    # In all builders except Fastboot or clang build use parameter `-DENABLE_TOOLS=ON`:
+    if 'defconfig' not in product_type and not fastboot:
+        cmake_command.append('-DBUILD_ALL=ON')
+        cmake_command.append('-DENABLE_ALL=ON')
+        cmake_command.append('-DENABLE_ITT=ON')
+
+    # Additional (custom) options (they extend default parameters):
+    if fastboot:
+        fastboot_cmake_path = MEDIA_SDK_REPO_DIR / 'builder/profiles/fastboot.cmake'
+        cmake_command.append(f'-DMFX_CONFIG_FILE={fastboot_cmake_path}')
+
+    if args.get('api_latest') or compiler == "clang" or \
+        (compiler == "gcc" and compiler_version == GCC_LATEST and not fastboot):
+        cmake_command.append('-DAPI:STRING=latest')
+
+    cmake_command.append(str(MEDIA_SDK_REPO_DIR))
 
-cmake_command = ['cmake3', '--no-warn-unused-cli', '-Wno-dev -G "Unix Makefiles"', '-LA']
+    return ' '.join(cmake_command)
 
 
-# Default parameters (default flow):
-cmake_command.append(
-    '-DCMAKE_C_FLAGS_RELEASE="-O2 -Wformat -Wformat-security -Wall -Werror -D_FORTIFY_SOURCE=2 -fstack-protector-strong"')
-cmake_command.append(
-    '-DCMAKE_CXX_FLAGS_RELEASE="-O2 -Wformat -Wformat-security -Wall -Werror -D_FORTIFY_SOURCE=2 -fstack-protector-strong"')
+BUILD_CMD = helpers.build_backend['verbose_build' if VERBOSE_BUILD_OUTPUT else 'build'].format(
+    jobs=options["CPU_CORES"])
 
-cmake_command.append('-DBUILD_TESTS=ON ')
+if PGO_LTO:
+    action('pgo: cmake instrumented',
+           cmd=get_cmake(args.get('fastboot'), extra_flags=PGO_GENERATE_FLAGS),
+           env={'PKG_CONFIG_PATH': str(LIBVA_PKG_CONFIG_PATH)})
 
-# In all builders except Fastboot or clang build use parameter `-DENABLE_TOOLS=ON`:
-if 'defconfig' not in product_type and not args.get('fastboot'):
-    cmake_command.append('-DBUILD_ALL=ON')
-    cmake_command.append('-DENABLE_ALL=ON')
-    cmake_command.append('-DENABLE_ITT=ON')
+    action('pgo: build instrumented',
+           cmd=helpers.with_compiler_cache_stats(BUILD_CMD))
 
-# Additional (custom) options (they extend default parameters):
-if args.get('fastboot'):
-    fastboot_cmake_path = MEDIA_SDK_REPO_DIR / 'builder/profiles/fastboot.cmake'
-    cmake_command.append(f'-DMFX_CONFIG_FILE={fastboot_cmake_path}')
+    action('pgo: collect profile by unit tests',
+           cmd=f'ctest --output-on-failure')
 
-if args.get('api_latest') or args.get('compiler') == "clang" or \
-    (args.get('compiler') == "gcc" and args.get('compiler_version') == GCC_LATEST and not args.get('fastboot')):
-    cmake_command.append('-DAPI:STRING=latest')
+    action('pgo: cmake baseline',
+           cmd=f'rm -rf {PGO_BASELINE_BUILD_DIR} && mkdir -p {PGO_BASELINE_BUILD_DIR} && '
+               f'cd {PGO_BASELINE_BUILD_DIR} && {get_cmake(args.get("fastboot"))}',
+           env={'PKG_CONFIG_PATH': str(LIBVA_PKG_CONFIG_PATH)})
 
-cmake_command.append(str(MEDIA_SDK_REPO_DIR))
+    action('pgo: build baseline',
+           work_dir=PGO_BASELINE_BUILD_DIR,
+           cmd=helpers.with_compiler_cache_stats(BUILD_CMD))
 
-cmake = ' '.join(cmake_command)
+cmake = get_cmake(args.get('fastboot'), extra_flags=PGO_USE_FLAGS if PGO_LTO else ())
 
 action('cmake',
        cmd=cmake,
        env={'PKG_CONFIG_PATH': str(LIBVA_PKG_CONFIG_PATH)})
 
-BUILD_VERBOSE = 'VERBOSE=1' if VERBOSE_BUILD_OUTPUT else ''
 action('build',
-       cmd=f'make {BUILD_VERBOSE} -j{options["CPU_CORES"]}')
+       cmd=helpers.with_compiler_cache_stats(BUILD_CMD))
+
+if helpers.build_backend['timing_log']:
+    action('build timing',
+           callfunc=(helpers.log_build_timing, [MEDIA_SDK_BUILD_DIR, options['LOGS_DIR'] / 'build_timing.json'], {}))
+
+MEDIA_SDK_SDL_POLICY = {
+    'compile': ['-D_FORTIFY_SOURCE=2', '-fstack-protector-strong', '-Wformat-security'],
+    'link': [],
+}
+action('verify SDL flags',
+       callfunc=(helpers.verify_sdl_flags, ['MediaSDK', MEDIA_SDK_BUILD_DIR, MEDIA_SDK_SDL_POLICY], {}))
 
 action('list artifacts',
        cmd=f'echo " " && ls ./__bin/release',
        verbose=True)
 
-# TODO: add check for clang compiler
-if args.get('compiler') == "gcc":
-    action('used compiler',
-           cmd=f'echo " " && strings -f ./__bin/release/*.so | grep GCC',
-           verbose=True)
+if PGO_LTO:
+    action('pgo: compare with baseline',
+           callfunc=(compare_release_profiles, [PGO_BASELINE_BUILD_DIR, MEDIA_SDK_BUILD_DIR,
+                                                options['LOGS_DIR'] / 'pgo_report.json'], {}))
 
-# TODO: `|| echo` is a temporary fix in situations if nothing found by grep (return code 1)
-action('binary versions',
-       cmd=f'echo " " && strings -f ./__bin/release/*.so | grep mediasdk || echo',
-       verbose=True)
+action('used compiler and binary versions',
+       callfunc=(helpers.inspect_binaries,
+                 [MEDIA_SDK_BUILD_DIR / '__bin/release', options['LOGS_DIR'] / 'binaries_info.json'],
+                 {'expected_compiler': args.get('compiler') if CHECK_COMPILER else None}))
 
 if build_event != 'klocwork':
-    action('run_unit_tests',
-           cmd=f'ctest --verbose',
-           verbose=True)
+    # Tests are run in parallel, the longest tests from previous runs are started first
+    if helpers.ctest_jobs:
+        action('run_unit_tests',
+               callfunc=(helpers.run_ctest_concurrently, [MEDIA_SDK_BUILD_DIR], {}))
+    else:
+        action('run_unit_tests',
+               cmd=f'ctest --verbose',
+               verbose=True)
 
 action('install',
        stage=stage.INSTALL,
-       cmd=f'make DESTDIR={options["INSTALL_DIR"]} install')
+       cmd=helpers.build_backend['install'].format(destdir=options['INSTALL_DIR']))
+
+action('track binary sizes',
+       stage=stage.INSTALL,
+       callfunc=(helpers.track_binary_sizes, [['libmfx*.so*']], {}))
+
+# Build additional variants
+for variant in EXTRA_VARIANTS:
+    variant_build_dir = options['ROOT_DIR'] / f'build_{variant}'
+    variant_install_dir = options['ROOT_DIR'] / f'install_{variant}'
+
+    action(f'{variant}: cmake',
+           cmd=f'rm -rf {variant_build_dir} && mkdir -p {variant_build_dir} && '
+               f'cd {variant_build_dir} && {get_cmake(variant == "fastboot")}',
+           env={'PKG_CONFIG_PATH': str(LIBVA_PKG_CONFIG_PATH)})
+
+    action(f'{variant}: build',
+           work_dir=variant_build_dir,
+           cmd=helpers.with_compiler_cache_stats(BUILD_CMD))
 
-if args.get('fastboot'):
+    action(f'{variant}: list artifacts',
+           work_dir=variant_build_dir,
+           cmd=f'echo " " && ls ./__bin/release',
+           verbose=True)
+
+    action(f'{variant}: install',
+           stage=stage.INSTALL,
+           work_dir=variant_build_dir,
+           cmd=f'rm -rf {variant_install_dir} && '
+               f'{helpers.build_backend["install"].format(destdir=variant_install_dir)}')
+
+# Build by compilers from matrix, the system compiler is not the compiler of the job
+if helpers.compiler_matrix:
+    action('compiler matrix: build',
+           callfunc=(helpers.build_compiler_matrix, [
+               {compiler: get_cmake(args.get('fastboot'),
+                                    *(compiler.split('-', 1) if compiler != 'system' else (None, None)))
+                for compiler in helpers.compiler_matrix},
+               {'PKG_CONFIG_PATH': str(LIBVA_PKG_CONFIG_PATH)}], {}))
+
+for compiler in helpers.compiler_matrix:
+    compiler_build_dir = options['ROOT_DIR'] / f'build_{compiler}'
+    compiler_install_dir = options['ROOT_DIR'] / f'install_{compiler}'
+
+    action(f'{compiler}: install',
+           stage=stage.INSTALL,
+           work_dir=compiler_build_dir,
+           cmd=f'rm -rf {compiler_install_dir} && '
+               f'{helpers.build_backend["install"].format(destdir=compiler_install_dir)}')
+
+if 'fastboot' in [MEDIA_SDK_VARIANT] + EXTRA_VARIANTS:
     # TODO: Pass data between stages with pickle in build scripts instead
     action('count api version and build number',
             stage=stage.INSTALL,
             callfunc=(set_env, [MEDIA_SDK_REPO_DIR, GCC_LATEST, CLANG_VERSION], {}))
 
+    fastboot_build_dir = MEDIA_SDK_BUILD_DIR if args.get('fastboot') else options['ROOT_DIR'] / 'build_fastboot'
     action('check fastboot lib size',
            stage=stage.INSTALL,
-           callfunc=(check_lib_size, [FASTBOOT_LIB_MAX_SIZE, MEDIA_SDK_BUILD_DIR / '__bin/release/libmfxhw64-fastboot.so.{ENV[API_VERSION]}'], {}))
+           callfunc=(check_lib_size, [FASTBOOT_LIB_MAX_SIZE, fastboot_build_dir / '__bin/release/libmfxhw64-fastboot.so.{ENV[API_VERSION]}'], {}))
 
 
 # Create configuration files
 # TODO: Should be a part of Cmake config
 intel_mediasdk_conf = options["INSTALL_DIR"] / 'intel-mediasdk.conf'
-data = f'{MSDK_LIB_INSTALL_DIRS["rpm"]}/lib64'
+intel_mediasdk_conf_data = f'{MSDK_LIB_INSTALL_DIRS["rpm"]}/lib64'
 action('create intel-mediasdk.conf',
        stage=stage.INSTALL,
-       callfunc=(create_file, [intel_mediasdk_conf, data], {}))
+       callfunc=(create_file, [intel_mediasdk_conf, intel_mediasdk_conf_data], {}))
 
 intel_mdf_conf = options["INSTALL_DIR"] / 'intel-mdf.conf'
-data = '/opt/intel/msdk_driver/lib64'
+intel_mdf_conf_data = '/opt/intel/msdk_driver/lib64'
 
 action('create intel-mdf.conf',
        stage=stage.INSTALL,
-       callfunc=(create_file, [intel_mdf_conf, data], {}))
+       callfunc=(create_file, [intel_mdf_conf, intel_mdf_conf_data], {}))
+
+for variant in EXTRA_VARIANTS:
+    variant_install_dir = options['ROOT_DIR'] / f'install_{variant}'
+
+    action(f'{variant}: create intel-mediasdk.conf',
+           stage=stage.INSTALL,
+           callfunc=(create_file, [variant_install_dir / 'intel-mediasdk.conf', intel_mediasdk_conf_data], {}))
+
+    action(f'{variant}: create intel-mdf.conf',
+           stage=stage.INSTALL,
+           callfunc=(create_file, [variant_install_dir / 'intel-mdf.conf', intel_mdf_conf_data], {}))
 
 # Get api version for MediaSDK package
 action('count api version and build number',
        stage=stage.PACK,
        callfunc=(set_env, [MEDIA_SDK_REPO_DIR, GCC_LATEST, CLANG_VERSION], {}))
 
-# Get package installation dirs for MediaSDK
-pack_dir = options['INSTALL_DIR'] / 'opt/intel/mediasdk'
+def get_mediasdk_pack_dirs(install_dir):
+    # Get package installation dirs for MediaSDK
+    pack_dir = install_dir / 'opt/intel/mediasdk'
 
-MEDIASDK_PACK_DIRS = [
-    f'{pack_dir}/={MSDK_LIB_INSTALL_DIRS["rpm"]}/',
-    f'{options["INSTALL_DIR"]}/intel-mediasdk.conf=/etc/ld.so.conf.d/',
-    f'{options["INSTALL_DIR"]}/intel-mdf.conf=/etc/ld.so.conf.d/',
-]
+    return [
+        f'{pack_dir}/={MSDK_LIB_INSTALL_DIRS["rpm"]}/',
+        f'{install_dir}/intel-mediasdk.conf=/etc/ld.so.conf.d/',
+        f'{install_dir}/intel-mdf.conf=/etc/ld.so.conf.d/',
+    ]
 
-BUILD_NUM = get_commit_number(MEDIA_SDK_REPO_DIR)
 
-action('MediaSDK: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', MEDIASDK_PACK_DIRS, ENABLE_RUBY24, '{ENV[API_VERSION]}' + f'.{BUILD_NUM}', MEDIA_SDK_REPO_NAME.lower()))
+MEDIASDK_PACK_DIRS = get_mediasdk_pack_dirs(options['INSTALL_DIR'])
 
-action('MediaSDK: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb', MEDIASDK_PACK_DIRS, ENABLE_RUBY24, '{ENV[API_VERSION]}' + f'.{BUILD_NUM}', MEDIA_SDK_REPO_NAME.lower()))
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=MEDIA_SDK_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
+MEDIASDK_PKG_VERSION = '{ENV[API_VERSION]}' + f'.{BUILD_NUM}'
+
+# Packages of additional variants are named as mediasdk-<variant>
+MEDIASDK_VARIANT_PACKAGES = {
+    f'{MEDIA_SDK_REPO_NAME.lower()}-{variant}': get_mediasdk_pack_dirs(options['ROOT_DIR'] / f'install_{variant}')
+    for variant in EXTRA_VARIANTS
+}
+
+if helpers.parallel_pack:
+    action('MediaSDK: create rpm and deb pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [[
+               {'type': pkg_type, 'pack_dirs': pack_dirs,
+                'version': MEDIASDK_PKG_VERSION, 'name': pkg_name}
+               for pkg_name, pack_dirs in [(MEDIA_SDK_REPO_NAME.lower(), MEDIASDK_PACK_DIRS),
+                                           *MEDIASDK_VARIANT_PACKAGES.items()]
+               for pkg_type in ('rpm', 'deb')
+           ], ENABLE_RUBY24], {}))
+else:
+    action('MediaSDK: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', MEDIASDK_PACK_DIRS, ENABLE_RUBY24, MEDIASDK_PKG_VERSION, MEDIA_SDK_REPO_NAME.lower()))
+
+    action('MediaSDK: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb', MEDIASDK_PACK_DIRS, ENABLE_RUBY24, MEDIASDK_PKG_VERSION, MEDIA_SDK_REPO_NAME.lower()))
 
+    for pkg_name, pack_dirs in MEDIASDK_VARIANT_PACKAGES.items():
+        action(f'{pkg_name}: create rpm pkg',
+               stage=stage.PACK,
+               work_dir=options['PACK_DIR'],
+               cmd=get_packing_cmd('rpm', pack_dirs, ENABLE_RUBY24, MEDIASDK_PKG_VERSION, pkg_name))
 
-DEV_PKG_DATA_TO_ARCHIVE.extend([
+        action(f'{pkg_name}: create deb pkg',
+               stage=stage.PACK,
+               work_dir=options['PACK_DIR'],
+               cmd=get_packing_cmd('deb', pack_dirs, ENABLE_RUBY24, MEDIASDK_PKG_VERSION, pkg_name))
+
+
+MEDIASDK_DEV_PKG_DATA = [
     {
         'from_path': options['BUILD_DIR'],
         'relative': [
             {
                 'path': '__bin',
-                'pack_as': 'bin'
+                'pack_as': 'bin',
+                # Used only by stream_archive
+                'exclude': ['*.o', '*.d'],
             },
             {
                 'path': 'plugins.cfg',
@@ -242,9 +606,9 @@ DEV_PKG_DATA_TO_ARCHIVE.extend([
             },
         ]
     }
-])
+]
 
-INSTALL_PKG_DATA_TO_ARCHIVE.extend([
+MEDIASDK_INSTALL_PKG_DATA = [
     {
         'from_path': options['INSTALL_DIR'],
         'relative': [
@@ -253,4 +617,60 @@ INSTALL_PKG_DATA_TO_ARCHIVE.extend([
             }
         ]
     },
-])
+]
+
+for variant in EXTRA_VARIANTS:
+    MEDIASDK_DEV_PKG_DATA.append({
+        'from_path': options['ROOT_DIR'] / f'build_{variant}',
+        'relative': [
+            {
+                'path': '__bin',
+                'pack_as': f'{variant}/bin',
+                'exclude': ['*.o', '*.d'],
+            },
+        ]
+    })
+
+    MEDIASDK_INSTALL_PKG_DATA.append({
+        'from_path': options['ROOT_DIR'] / f'install_{variant}',
+        'relative': [
+            {
+                'path': 'opt',
+                'pack_as': f'{variant}/opt'
+            }
+        ]
+    })
+
+for compiler in helpers.compiler_matrix:
+    MEDIASDK_DEV_PKG_DATA.append({
+        'from_path': options['ROOT_DIR'] / f'build_{compiler}',
+        'relative': [
+            {
+                'path': '__bin',
+                'pack_as': f'{compiler}/bin',
+                'exclude': ['*.o', '*.d'],
+            },
+        ]
+    })
+
+    MEDIASDK_INSTALL_PKG_DATA.append({
+        'from_path': options['ROOT_DIR'] / f'install_{compiler}',
+        'relative': [
+            {
+                'path': 'opt',
+                'pack_as': f'{compiler}/opt'
+            }
+        ]
+    })
+
+if helpers.archive_streaming:
+    action('MediaSDK: archive developer package',
+           stage=stage.PACK,
+           callfunc=(helpers.stream_archive, ['developer_package', MEDIASDK_DEV_PKG_DATA], {}))
+
+    action('MediaSDK: archive install package',
+           stage=stage.PACK,
+           callfunc=(helpers.stream_archive, ['install_pkg', MEDIASDK_INSTALL_PKG_DATA], {}))
+else:
+    DEV_PKG_DATA_TO_ARCHIVE.extend(MEDIASDK_DEV_PKG_DATA)
+    INSTALL_PKG_DATA_TO_ARCHIVE.extend(MEDIASDK_INSTALL_PKG_DATA)
@@ -18,12 +18,20 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import sys
 from pathlib import Path
 
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+
 DRIVER_REPO_NAME = 'media-driver'
 
 DRIVER_REPO_DIR = options.get('REPOS_DIR') / DRIVER_REPO_NAME
-BUILD_NUM = get_commit_number(DRIVER_REPO_DIR)
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=DRIVER_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
 
 DRIVER_VERSION = manifest.get_component(DRIVER_REPO_NAME).version
 DRIVER_PKG_VERSION = DRIVER_VERSION + f'.{BUILD_NUM}'
@@ -44,6 +52,35 @@ DRIVER_INSTALL_PREFIX = Path('/opt/intel/msdk_driver')
 # Installation by default: /opt/intel/msdk_driver/lib64
 DRIVER_LIB_DIR = 'lib64'
 
+# Driver variants and their cmake options
+DRIVER_VARIANTS = {
+    'full': [],
+    'kernels_off': ['-DENABLE_KERNELS=OFF'],
+    'nonfree_kernels_off': ['-DENABLE_NONFREE_KERNELS=OFF'],
+}
+
+if product_type == 'public_linux_driver_kernels_off':
+    DRIVER_VARIANT = 'kernels_off'
+elif product_type == 'public_linux_driver_nonfree_kernels_off':
+    DRIVER_VARIANT = 'nonfree_kernels_off'
+else:
+    DRIVER_VARIANT = 'full'
+
+# Additional variants built in the same job, for example: build_variants: ['kernels_off', 'nonfree_kernels_off']
+# They are built in sibling dirs of BUILD_DIR through shared compiler cache,
+# so translation units with the same flags are compiled only once
+EXTRA_VARIANTS = [variant for variant in args.get('build_variants', []) if variant != DRIVER_VARIANT]
+for variant in EXTRA_VARIANTS:
+    if variant not in DRIVER_VARIANTS:
+        raise Exception(f"Unknown media-driver variant '{variant}', possible: {', '.join(DRIVER_VARIANTS)}")
+
+# Additional variants are always compiled through ccache to reuse objects of the main build
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd,
+                        compiler_cache=bool(EXTRA_VARIANTS))
+
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
 
 def set_env(gcc_latest, clang_version):
     # TODO: remove compiler version
@@ -64,6 +101,7 @@ action('set CC and CXX environment variables',
 
 cmake_command = [
     'cmake3',
+    f'-G "{helpers.build_backend["generator"]}"',
     f'-DMEDIA_VERSION="{DRIVER_VERSION}"',
     f'-DCMAKE_INSTALL_PREFIX={DRIVER_INSTALL_PREFIX}',
     # By default install driver to /opt/intel/msdk_driver
@@ -74,57 +112,127 @@ cmake_command = [
     f'-DBUILD_TYPE={options["BUILD_TYPE"]}',
 ]
 
-if product_type == 'public_linux_driver_kernels_off':
-    cmake_command.append('-DENABLE_KERNELS=OFF')
-elif product_type == 'public_linux_driver_nonfree_kernels_off':
-    cmake_command.append('-DENABLE_NONFREE_KERNELS=OFF')
 
-cmake_command.append(str(DRIVER_REPO_DIR))
+def get_cmake(variant):
+    return ' '.join(cmake_command + DRIVER_VARIANTS[variant] + [str(DRIVER_REPO_DIR)])
+
+
+cmake = get_cmake(DRIVER_VARIANT)
 
-cmake = ' '.join(cmake_command)
 
 # Prepare dependencies
 # Libva
-LIBVA_PATH = options['DEPENDENCIES_DIR'] / 'libva' / 'usr' / 'local'
+LIBVA_PATH = helpers.sysroot_dir / 'libva'
 LIBVA_PKG_CONFIG_PATH = LIBVA_PATH / 'lib64' / 'pkgconfig'
-LIBVA_PKG_CONFIG_RPM_PATTERN = {
-    '^prefix=.+': f'prefix={LIBVA_PATH}',
-}
-action('LibVA: change pkgconfigs',
+action('LibVA: prepare sysroot',
        stage=stage.EXTRACT,
-       callfunc=(update_config, [LIBVA_PKG_CONFIG_PATH, LIBVA_PKG_CONFIG_RPM_PATTERN], {}))
+       callfunc=(helpers.prepare_dependency_sysroot, ['libva'], {}))
 
 # Gmmlib
-GMMLIB_PATH = options['DEPENDENCIES_DIR'] / 'gmmlib' / 'usr' / 'local'
+GMMLIB_PATH = helpers.sysroot_dir / 'gmmlib'
 GMMLIB_PKG_CONFIG_PATH = GMMLIB_PATH / 'lib64' / 'pkgconfig'
-GMMLIB_PKG_CONFIG_RPM_PATTERN = {
-    '^prefix=.+': f'prefix={GMMLIB_PATH}',
-    '^includedir=.+': f'includedir={GMMLIB_PATH}/include/igdgmm',
-    '^libdir=.+': f'libdir={GMMLIB_PATH}/lib64'
+GMMLIB_PKG_CONFIG_UPDATES = {
+    '^includedir=.+': 'includedir=${prefix}/include/igdgmm',
+    '^libdir=.+': 'libdir=${prefix}/lib64'
 }
 
-action('Gmmlib: change pkgconfigs',
+action('Gmmlib: prepare sysroot',
        stage=stage.EXTRACT,
-       callfunc=(update_config, [GMMLIB_PKG_CONFIG_PATH, GMMLIB_PKG_CONFIG_RPM_PATTERN], {}))
+       callfunc=(helpers.prepare_dependency_sysroot, ['gmmlib', GMMLIB_PKG_CONFIG_UPDATES], {}))
 
 
+# TODO: Define where to copy
+DRIVER_DEV_PKG_DATA = [
+    {
+        'from_path': options['BUILD_DIR'],
+        'relative': [
+            {
+                'path': '',
+                'pack_as': '',
+                # Used only by stream_archive
+                'exclude': ['*.o', '*.d', 'CMakeFiles'],
+            },
+        ]
+    }
+]
+
 # Build Media Driver
+if helpers.build_cache_dir:
+    action('media-driver: look up build cache',
+           callfunc=(helpers.lookup_build_cache, [[DRIVER_REPO_DIR], cmake, DEPENDENCIES], {}))
+
+# After the lookup, settings of compiler cache are not a part of build cache key
+if helpers.compiler_cache:
+    action('enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
 action('media-driver: cmake',
        work_dir=options['BUILD_DIR'],
-       cmd=cmake,
+       cmd=helpers.skip_on_build_cache_hit(cmake),
        env={'PKG_CONFIG_PATH': f'{LIBVA_PKG_CONFIG_PATH}:{GMMLIB_PKG_CONFIG_PATH}'})
 
 action('media-driver: build',
-       cmd=f'make -j`nproc`')
+       cmd=helpers.skip_on_build_cache_hit(
+           helpers.with_compiler_cache_stats(helpers.build_backend['build'].format(jobs='`nproc`'))))
+
+if helpers.build_backend['timing_log']:
+    action('media-driver: build timing',
+           callfunc=(helpers.log_build_timing, [options['BUILD_DIR'], options['LOGS_DIR'] / 'build_timing.json'], {}))
 
 action('media-driver: list artifacts',
-       cmd=f'echo " " && ls ./media_driver',
+       cmd=helpers.skip_on_build_cache_hit(f'echo " " && ls ./media_driver'),
        verbose=True)
 
 action('media-driver: make install',
        stage=stage.INSTALL,
        work_dir=options['BUILD_DIR'],
-       cmd=f'make DESTDIR={options["INSTALL_DIR"]} install')
+       cmd=helpers.skip_on_build_cache_hit(helpers.build_backend['install'].format(destdir=options['INSTALL_DIR'])))
+
+if helpers.build_cache_dir:
+    action('media-driver: sync build cache',
+           stage=stage.INSTALL,
+           callfunc=(helpers.sync_build_cache, [DRIVER_DEV_PKG_DATA], {}))
+
+action('media-driver: track binary sizes',
+       stage=stage.INSTALL,
+       callfunc=(helpers.track_binary_sizes, [['iHD_drv_video.so']], {}))
+
+# Build additional variants
+for variant in EXTRA_VARIANTS:
+    variant_build_dir = options['ROOT_DIR'] / f'build_{variant}'
+    variant_install_dir = options['ROOT_DIR'] / f'install_{variant}'
+
+    action(f'media-driver {variant}: cmake',
+           cmd=f'rm -rf {variant_build_dir} && mkdir -p {variant_build_dir} && '
+               f'cd {variant_build_dir} && {get_cmake(variant)}',
+           env={'PKG_CONFIG_PATH': f'{LIBVA_PKG_CONFIG_PATH}:{GMMLIB_PKG_CONFIG_PATH}'})
+
+    action(f'media-driver {variant}: build',
+           work_dir=variant_build_dir,
+           cmd=helpers.with_compiler_cache_stats(helpers.build_backend['build'].format(jobs='`nproc`')))
+
+    action(f'media-driver {variant}: make install',
+           stage=stage.INSTALL,
+           work_dir=variant_build_dir,
+           cmd=f'rm -rf {variant_install_dir} && '
+               f'{helpers.build_backend["install"].format(destdir=variant_install_dir)}')
+
+# Build by compilers from matrix
+if helpers.compiler_matrix:
+    action('media-driver compiler matrix: build',
+           callfunc=(helpers.build_compiler_matrix, [
+               {compiler: get_cmake(DRIVER_VARIANT) for compiler in helpers.compiler_matrix},
+               {'PKG_CONFIG_PATH': f'{LIBVA_PKG_CONFIG_PATH}:{GMMLIB_PKG_CONFIG_PATH}'}], {}))
+
+for compiler in helpers.compiler_matrix:
+    compiler_build_dir = options['ROOT_DIR'] / f'build_{compiler}'
+    compiler_install_dir = options['ROOT_DIR'] / f'install_{compiler}'
+
+    action(f'media-driver {compiler}: make install',
+           stage=stage.INSTALL,
+           work_dir=compiler_build_dir,
+           cmd=f'rm -rf {compiler_install_dir} && '
+               f'{helpers.build_backend["install"].format(destdir=compiler_install_dir)}')
 
 # Create configuration files
 intel_mediasdk_file = options["INSTALL_DIR"] / 'intel-mediasdk.sh'
@@ -136,28 +244,67 @@ action('create intel-mediasdk.sh',
        stage=stage.INSTALL,
        callfunc=(create_file, [intel_mediasdk_file, data], {}))
 
-# Get package installation dir for media-driver
-pack_dir = options['INSTALL_DIR'] / DRIVER_INSTALL_PREFIX.relative_to(DRIVER_INSTALL_PREFIX.root)
+for variant in EXTRA_VARIANTS:
+    action(f'media-driver {variant}: create intel-mediasdk.sh',
+           stage=stage.INSTALL,
+           callfunc=(create_file, [options['ROOT_DIR'] / f'install_{variant}' / 'intel-mediasdk.sh', data], {}))
 
-DRIVER_PACK_DIRS = [
-    f'{pack_dir}/lib64/={DRIVER_INSTALL_PREFIX / DRIVER_LIB_DIR }',
-    f'{pack_dir}/include/={DRIVER_INSTALL_PREFIX}/include',
-    f'{options["INSTALL_DIR"]}/intel-mediasdk.sh=/etc/profile.d/',
-]
 
-action('media-driver: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', DRIVER_PACK_DIRS, ENABLE_RUBY24, DRIVER_PKG_VERSION, DRIVER_REPO_NAME.lower()))
+def get_driver_pack_dirs(install_dir):
+    # Get package installation dir for media-driver
+    pack_dir = install_dir / DRIVER_INSTALL_PREFIX.relative_to(DRIVER_INSTALL_PREFIX.root)
+
+    return [
+        f'{pack_dir}/lib64/={DRIVER_INSTALL_PREFIX / DRIVER_LIB_DIR }',
+        f'{pack_dir}/include/={DRIVER_INSTALL_PREFIX}/include',
+        f'{install_dir}/intel-mediasdk.sh=/etc/profile.d/',
+    ]
 
 
-action('media-driver: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb', DRIVER_PACK_DIRS, ENABLE_RUBY24, DRIVER_PKG_VERSION, DRIVER_REPO_NAME.lower()))
+DRIVER_PACK_DIRS = get_driver_pack_dirs(options['INSTALL_DIR'])
+
+# Packages of additional variants are named as media-driver-<variant>
+DRIVER_VARIANT_PACKAGES = {
+    f"{DRIVER_REPO_NAME.lower()}-{variant.replace('_', '-')}":
+        get_driver_pack_dirs(options['ROOT_DIR'] / f'install_{variant}')
+    for variant in EXTRA_VARIANTS
+}
+
+if helpers.parallel_pack:
+    action('media-driver: create rpm and deb pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [[
+               {'type': pkg_type, 'pack_dirs': pack_dirs,
+                'version': DRIVER_PKG_VERSION, 'name': pkg_name}
+               for pkg_name, pack_dirs in [(DRIVER_REPO_NAME.lower(), DRIVER_PACK_DIRS),
+                                           *DRIVER_VARIANT_PACKAGES.items()]
+               for pkg_type in ('rpm', 'deb')
+           ], ENABLE_RUBY24], {}))
+else:
+    action('media-driver: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', DRIVER_PACK_DIRS, ENABLE_RUBY24, DRIVER_PKG_VERSION, DRIVER_REPO_NAME.lower()))
+
+    action('media-driver: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb', DRIVER_PACK_DIRS, ENABLE_RUBY24, DRIVER_PKG_VERSION, DRIVER_REPO_NAME.lower()))
+
+    for pkg_name, pack_dirs in DRIVER_VARIANT_PACKAGES.items():
+        action(f'{pkg_name}: create rpm pkg',
+               stage=stage.PACK,
+               work_dir=options['PACK_DIR'],
+               cmd=get_packing_cmd('rpm', pack_dirs, ENABLE_RUBY24, DRIVER_PKG_VERSION, pkg_name))
+
+        action(f'{pkg_name}: create deb pkg',
+               stage=stage.PACK,
+               work_dir=options['PACK_DIR'],
+               cmd=get_packing_cmd('deb', pack_dirs, ENABLE_RUBY24, DRIVER_PKG_VERSION, pkg_name))
 
 # TODO: Define where to copy
-INSTALL_PKG_DATA_TO_ARCHIVE.extend([
+DRIVER_INSTALL_PKG_DATA = [
     {
         'from_path': options['INSTALL_DIR'],
         'relative': [
@@ -166,17 +313,49 @@ INSTALL_PKG_DATA_TO_ARCHIVE.extend([
             }
         ]
     },
-])
+]
 
-# TODO: Define where to copy
-DEV_PKG_DATA_TO_ARCHIVE.extend([
-    {
-        'from_path': options['BUILD_DIR'],
+for variant in EXTRA_VARIANTS:
+    DRIVER_INSTALL_PKG_DATA.append({
+        'from_path': options['ROOT_DIR'] / f'install_{variant}',
+        'relative': [
+            {
+                'path': 'opt',
+                'pack_as': f'{variant}/opt'
+            }
+        ]
+    })
+
+    DRIVER_DEV_PKG_DATA.append({
+        'from_path': options['ROOT_DIR'] / f'build_{variant}',
         'relative': [
             {
                 'path': '',
-                'pack_as': ''
+                'pack_as': variant,
+                'exclude': ['*.o', '*.d', 'CMakeFiles'],
             },
         ]
-    }
-])
+    })
+
+for compiler in helpers.compiler_matrix:
+    DRIVER_INSTALL_PKG_DATA.append({
+        'from_path': options['ROOT_DIR'] / f'install_{compiler}',
+        'relative': [
+            {
+                'path': 'opt',
+                'pack_as': f'{compiler}/opt'
+            }
+        ]
+    })
+
+if helpers.archive_streaming:
+    action('media-driver: archive install package',
+           stage=stage.PACK,
+           callfunc=(helpers.stream_archive, ['install_pkg', DRIVER_INSTALL_PKG_DATA], {}))
+
+    action('media-driver: archive developer package',
+           stage=stage.PACK,
+           callfunc=(helpers.stream_archive, ['developer_package', DRIVER_DEV_PKG_DATA], {}))
+else:
+    INSTALL_PKG_DATA_TO_ARCHIVE.extend(DRIVER_INSTALL_PKG_DATA)
+    DEV_PKG_DATA_TO_ARCHIVE.extend(DRIVER_DEV_PKG_DATA)
@@ -18,17 +18,25 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import sys
+
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
 INSTALL = ['libva', 'libva-utils', 'gmmlib', 'ffmpeg', 'metrics-calc-lite', 'media-driver', 'mediasdk']
 
 MEDIA_SDK_REPO_DIR = options.get('REPOS_DIR') / 'MediaSDK'
 
 TEST_SCRIPT_PATH = infra_path / 'driver_tests'
+MFX_SAMPLES_DIR = '/opt/intel/mediasdk/share/mfx/samples'
 TEST_ENV = {
     'MFX_HOME': '/opt/intel/mediasdk',
     'LD_LIBRARY_PATH': '/opt/intel/mediasdk/lib64',
     'LIBVA_DRIVERS_PATH': '/opt/intel/msdk_driver/lib64',
     'LIBVA_DRIVER_NAME': 'iHD',
-    'PATH': f'{PATH}:/opt/intel/mediasdk/share/mfx/samples'
+    'PATH': f'{PATH}:{MFX_SAMPLES_DIR}'
 }
 
 DRIVER_TESTS = [
@@ -45,26 +53,124 @@ ARTIFACTS_LAYOUT = {
     str(infra_path / 'smoke_test' / 'hevc_fei_tests_res.log'): 'hevc_fei_tests.log'
 }
 
-action(f'Create temp dir for driver tests',
-       work_dir=TEST_SCRIPT_PATH,
-       cmd=f'mkdir -p temp',
-       verbose=True)
+# Run tests in a pool of workers instead of one after another
+TEST_WORKERS = int(args.get('test_workers', 0))
+TEST_SANDBOXES_DIR = options['ROOT_DIR'] / 'test_sandboxes'
+TEST_LOGS_DIR = options['LOGS_DIR'] / 'tests'
+
+
+def run_tests_concurrently(tests, workers):
+    """
+    Runs independent tests in a bounded pool of workers
+    Output of every test is written to TEST_LOGS_DIR/<test name>.log
+
+    :param tests: list of dicts with keys:
+        name - test name
+        cmd - test command
+        work_dir - test work dir
+        isolate - (optional) run test in a copy of work_dir made of symlinks with its own `temp` dir
+        exclusive - (optional) run test alone after the pool, for tests which can't be isolated
+    :param workers: max count of tests running at the same time
+    :return: None
+    """
+
+    import os
+    import shutil
+    import subprocess
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    TEST_LOGS_DIR.mkdir(parents=True, exist_ok=True)
+
+    def prepare_sandbox(test):
+        sandbox = TEST_SANDBOXES_DIR / test['name']
+        if sandbox.exists():
+            shutil.rmtree(sandbox)
+        sandbox.mkdir(parents=True)
+        for item in test['work_dir'].iterdir():
+            if item.name != 'temp':
+                (sandbox / item.name).symlink_to(item)
+        (sandbox / 'temp').mkdir()
+        return sandbox
+
+    def run_test(test):
+        work_dir = test['work_dir']
+        env = os.environ.copy()
+        env.update(options['ENV'])
+        env.update(TEST_ENV)
+        # PATH of TEST_ENV is expanded by infrastructure for actions only, tests of the pool are run here
+        env['PATH'] = f"{os.environ['PATH']}:{MFX_SAMPLES_DIR}"
+        if test.get('isolate'):
+            work_dir = prepare_sandbox(test)
+            env['TMPDIR'] = str(work_dir / 'temp')
+
+        start_time = time.monotonic()
+        with (TEST_LOGS_DIR / f"{test['name']}.log").open('w') as test_log:
+            result = subprocess.run(test['cmd'], shell=True, cwd=work_dir, env=env,
+                                    stdout=test_log, stderr=subprocess.STDOUT)
+        return result.returncode, time.monotonic() - start_time
 
-for test_id in DRIVER_TESTS:
-    action(f'Run media-driver test {test_id}',
+    pooled_tests = [test for test in tests if not test.get('exclusive')]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = dict(zip((test['name'] for test in pooled_tests), executor.map(run_test, pooled_tests)))
+    for test in tests:
+        if test.get('exclusive'):
+            results[test['name']] = run_test(test)
+
+    failed = []
+    for test in tests:
+        return_code, duration = results[test['name']]
+        status = 'PASSED' if not return_code else f'FAILED (exit code {return_code})'
+        log.info(f"{test['name']:<20} {duration:8.1f}s  {status}")
+        if return_code:
+            failed.append(test['name'])
+    if failed:
+        raise Exception(f"Failed tests: {', '.join(failed)}. Logs: {TEST_LOGS_DIR}")
+
+
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
+if TEST_WORKERS:
+    tests = [
+        {
+            'name': test_id,
+            'cmd': f'python3 run_test.py {test_id}',
+            'work_dir': TEST_SCRIPT_PATH,
+            'isolate': True,
+        }
+        for test_id in DRIVER_TESTS
+    ]
+    # TED and fei test write results to their work dirs which are collected as artifacts, they are not isolated
+    tests.append({'name': 'mediasdk_ted', 'cmd': 'python3 tests/ted.py', 'work_dir': MEDIA_SDK_REPO_DIR,
+                  'exclusive': True})
+    tests.append({'name': 'mediasdk_fei', 'cmd': 'python3 smoke_test/hevc_fei_smoke_test.py', 'work_dir': infra_path,
+                  'exclusive': True})
+
+    action(f'Run tests in {TEST_WORKERS} workers',
+           callfunc=(run_tests_concurrently, [tests, TEST_WORKERS], {}))
+else:
+    action(f'Create temp dir for driver tests',
            work_dir=TEST_SCRIPT_PATH,
-           cmd=f'python3 run_test.py {test_id}',
+           cmd=f'mkdir -p temp',
+           verbose=True)
+
+    for test_id in DRIVER_TESTS:
+        action(f'Run media-driver test {test_id}',
+               work_dir=TEST_SCRIPT_PATH,
+               cmd=f'python3 run_test.py {test_id}',
+               env=TEST_ENV,
+               verbose=True)
+
+    action(f'Run MediaSDK TED test',
+           work_dir=MEDIA_SDK_REPO_DIR,
+           cmd=f'python3 tests/ted.py',
            env=TEST_ENV,
            verbose=True)
 
-action(f'Run MediaSDK TED test',
-       work_dir=MEDIA_SDK_REPO_DIR,
-       cmd=f'python3 tests/ted.py',
-       env=TEST_ENV,
-       verbose=True)
-
-action(f'Run MediaSDK fei test',
-       work_dir=infra_path,
-       cmd=f'python3 smoke_test/hevc_fei_smoke_test.py',
-       env=TEST_ENV,
-       verbose=True)
+    action(f'Run MediaSDK fei test',
+           work_dir=infra_path,
+           cmd=f'python3 smoke_test/hevc_fei_smoke_test.py',
+           env=TEST_ENV,
+           verbose=True)
@@ -18,13 +18,23 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import sys
 from pathlib import Path
 
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
+
 CALC_REPO_NAME = 'tools'
 PRODUCT_NAME = 'metrics-calc-lite'
 
 CALC_REPO_DIR = options.get('REPOS_DIR') / CALC_REPO_NAME / 'metrics_calc_lite'
-BUILD_NUM = get_commit_number(CALC_REPO_DIR)
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=CALC_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
 CALC_VERSION = manifest.get_component(PRODUCT_NAME).version + f'.{BUILD_NUM}'
 
 
@@ -45,40 +55,189 @@ CALC_LIB_INSTALL_DIRS = {
 }
 
 
+# Throughput benchmark of built metrics_calc_lite on synthetic I420 sequences, it needs CPU only
+CALC_BENCHMARK = args.get('calc_benchmark', False)
+CALC_BENCHMARK_JOBS = int(args.get('calc_benchmark_jobs', 1))
+CALC_BENCHMARK_RESOLUTIONS = [(352, 288), (1280, 720), (1920, 1080)]
+CALC_BENCHMARK_FRAMES = 30
+CALC_BENCHMARK_METRICS = ['psnr', 'ssim']
+# History of results must outlive the sandbox, so it has no default in ROOT_DIR, results are only reported without it.
+# Sequences and logs are stored to ROOT_DIR/calc_benchmark then
+CALC_BENCHMARK_HISTORY_DIR = args.get('calc_benchmark_dir')
+CALC_BENCHMARK_DIR = Path(CALC_BENCHMARK_HISTORY_DIR or options['ROOT_DIR'] / 'calc_benchmark')
+# Baseline is median of the last results, so a single slow or fast run does not move it
+CALC_BENCHMARK_HISTORY_LENGTH = 9
+# Build fails if frames/s of any case drops more than this ratio against the baseline
+CALC_BENCHMARK_REGRESSION_THRESHOLD = float(args.get('calc_benchmark_regression_threshold', 0.1))
+
+
+def generate_yuv_sequences(width, height, frames):
+    """
+    Generates reference and distorted I420 sequences with moving gradient, they are reused by next runs
+
+    :return: tuple (reference path, distorted path)
+    """
+
+    sequences_dir = CALC_BENCHMARK_DIR / 'sequences'
+    reference_path = sequences_dir / f'reference_{width}x{height}_{frames}.yuv'
+    distorted_path = sequences_dir / f'distorted_{width}x{height}_{frames}.yuv'
+    if reference_path.exists() and distorted_path.exists():
+        return reference_path, distorted_path
+
+    sequences_dir.mkdir(parents=True, exist_ok=True)
+    # Rows of planes are slices of repeated gradient, so sequences are generated without per-pixel loops
+    gradient = bytes(range(256)) * (width // 256 + 2)
+    with open(f'{reference_path}.tmp', 'wb') as reference, open(f'{distorted_path}.tmp', 'wb') as distorted:
+        for frame in range(frames):
+            planes = b''.join(
+                b''.join(gradient[(row + frame * step) % 256:][:plane_width] for row in range(plane_height))
+                for plane_width, plane_height, step in ((width, height, 2), (width // 2, height // 2, 1),
+                                                        (width // 2, height // 2, 3)))
+            reference.write(planes)
+            # Distortion differs between frames, values are clipped to [0, 255]
+            distortion = frame % 5 + 1
+            distorted.write(planes.translate(bytes(min(value + distortion, 255) for value in range(256))))
+    Path(f'{reference_path}.tmp').replace(reference_path)
+    Path(f'{distorted_path}.tmp').replace(distorted_path)
+    return reference_path, distorted_path
+
+
+def run_calc_benchmark(calc_path, results_path):
+    """
+    Runs metrics_calc_lite for every resolution and metric, CALC_BENCHMARK_JOBS cases at the same time
+    Frames/s and peak RSS of every case are written to results_path, frames/s are compared with median
+    of the previous results from calc_benchmark_dir
+
+    :param calc_path: path to metrics_calc_lite binary
+    :param results_path: path to json results
+    :return: None
+    """
+
+    import json
+    import os
+    import statistics
+    import subprocess
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    sequences = {(width, height): generate_yuv_sequences(width, height, CALC_BENCHMARK_FRAMES)
+                 for width, height in CALC_BENCHMARK_RESOLUTIONS}
+
+    def run_case(case):
+        (width, height), metric = case
+        reference_path, distorted_path = sequences[(width, height)]
+        log_path = CALC_BENCHMARK_DIR / f'{metric}_{width}x{height}.log'
+        with log_path.open('w') as log_file:
+            start = time.monotonic()
+            process = subprocess.Popen([str(calc_path), '-i1', str(reference_path), '-i2', str(distorted_path),
+                                        '-w', str(width), '-h', str(height), '-st', 'i420', metric],
+                                       stdout=log_file, stderr=subprocess.STDOUT)
+            # wait4 returns peak RSS of the process which is not available from subprocess
+            _, status, usage = os.wait4(process.pid, 0)
+            duration = time.monotonic() - start
+            # Negative code is a signal as in subprocess
+            process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        if process.returncode:
+            raise Exception(f'{calc_path.name} {metric} {width}x{height} failed with exit code {process.returncode}, '
+                            f'log: {log_path}')
+        return {'case': f'{metric} {width}x{height}', 'fps': round(CALC_BENCHMARK_FRAMES / duration, 2),
+                'peak_rss_mb': round(usage.ru_maxrss / 1024, 1)}
+
+    cases = [(resolution, metric) for resolution in CALC_BENCHMARK_RESOLUTIONS for metric in CALC_BENCHMARK_METRICS]
+    with ThreadPoolExecutor(max_workers=CALC_BENCHMARK_JOBS) as executor:
+        results = list(executor.map(run_case, cases))
+
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    results_path.write_text(json.dumps(results, indent=4))
+
+    lines = [f"{'case':<20}{'frames/s':>12}{'baseline':>12}{'peak RSS, MB':>14}  ({CALC_BENCHMARK_JOBS} jobs)"]
+    if not CALC_BENCHMARK_HISTORY_DIR:
+        lines += [f"{result['case']:<20}{result['fps']:>12}{'-':>12}{result['peak_rss_mb']:>14}" for result in results]
+        log.info('\n'.join(lines))
+        log.warning(f'Results are written to {results_path}, they are not compared as calc_benchmark_dir is not set')
+        return
+
+    # Format of history: list of {case: frames/s} of the last runs, results of every run are added,
+    # so baseline follows accepted changes of throughput
+    history_path = CALC_BENCHMARK_DIR / 'history.json'
+    history = json.loads(history_path.read_text()) if history_path.exists() else []
+
+    regressions = []
+    for result in results:
+        previous_fps = [run[result['case']] for run in history if result['case'] in run]
+        baseline_fps = round(statistics.median(previous_fps), 2) if previous_fps else None
+        lines.append(f"{result['case']:<20}{result['fps']:>12}{baseline_fps or '-':>12}{result['peak_rss_mb']:>14}")
+        if baseline_fps and result['fps'] < baseline_fps * (1 - CALC_BENCHMARK_REGRESSION_THRESHOLD):
+            regressions.append(f"{result['case']}: {baseline_fps} -> {result['fps']} frames/s")
+    log.info('\n'.join(lines))
+
+    history = (history + [{result['case']: result['fps'] for result in results}])[-CALC_BENCHMARK_HISTORY_LENGTH:]
+    history_path.write_text(json.dumps(history, indent=4))
+    if regressions:
+        raise Exception(f'Throughput dropped more than {CALC_BENCHMARK_REGRESSION_THRESHOLD:.0%} '
+                        f'against median of {len(history) - 1} previous runs:\n' + '\n'.join(regressions))
+
+
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
+if helpers.compiler_cache:
+    action('metrics calc: enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
 action('metrics calc: cmake',
        work_dir=options['BUILD_DIR'],
-       cmd=f'cmake {CALC_REPO_DIR}')
+       cmd=f'cmake -G "{helpers.build_backend["generator"]}" {CALC_REPO_DIR}')
 
 action('metrics calc: make',
-       cmd='make -j`nproc`')
+       cmd=helpers.with_compiler_cache_stats(helpers.build_backend['build'].format(jobs='`nproc`')))
+
+if helpers.build_backend['timing_log']:
+    action('metrics calc: build timing',
+           callfunc=(helpers.log_build_timing, [options['BUILD_DIR'], options['LOGS_DIR'] / 'build_timing.json'], {}))
 
 action('metrics calc: make install',
        stage=stage.INSTALL,
        work_dir=options['BUILD_DIR'],
-       cmd=f'make DESTDIR={options["INSTALL_DIR"]} install')
+       cmd=helpers.build_backend['install'].format(destdir=options['INSTALL_DIR']))
 
 
 # Get package installation dir for metrics calc
 pack_dir = options['INSTALL_DIR'] / CALC_DEB_PREFIX.relative_to(CALC_DEB_PREFIX.root)
 
-CALC_PACK_DIRS = [
+CALC_DEB_PACK_DIRS = [
     f'{pack_dir}/bin/={CALC_DEB_PREFIX}/bin'
 ]
 
-action('metrics calc: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb',  CALC_PACK_DIRS, ENABLE_RUBY24, CALC_VERSION, PRODUCT_NAME))
-
-
-CALC_PACK_DIRS = [
+CALC_RPM_PACK_DIRS = [
     f'{pack_dir}/bin/={CALC_CENTOS_PREFIX}/bin'
 ]
 
-action('metrics calc: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', CALC_PACK_DIRS, ENABLE_RUBY24, CALC_VERSION, PRODUCT_NAME))
+if helpers.parallel_pack:
+    action('metrics calc: create deb and rpm pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [[
+               {'type': 'deb', 'pack_dirs': CALC_DEB_PACK_DIRS, 'version': CALC_VERSION, 'name': PRODUCT_NAME},
+               {'type': 'rpm', 'pack_dirs': CALC_RPM_PACK_DIRS, 'version': CALC_VERSION, 'name': PRODUCT_NAME},
+           ], ENABLE_RUBY24], {}))
+else:
+    action('metrics calc: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb',  CALC_DEB_PACK_DIRS, ENABLE_RUBY24, CALC_VERSION, PRODUCT_NAME))
+
+    action('metrics calc: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', CALC_RPM_PACK_DIRS, ENABLE_RUBY24, CALC_VERSION, PRODUCT_NAME))
+
+if CALC_BENCHMARK:
+    action('metrics calc: benchmark',
+           stage=stage.PACK,
+           callfunc=(run_calc_benchmark, [pack_dir / 'bin' / 'metrics_calc_lite',
+                                          options['PACK_DIR'] / 'metrics_calc_benchmark.json'], {}))
 
 INSTALL_PKG_DATA_TO_ARCHIVE.extend([
     {
@@ -18,15 +18,25 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import sys
 from pathlib import Path
 
+sys.path.append(str(infra_path.parent / 'product-configs'))
+from config_helpers import ConfigHelpers, DeferredValues
+
+helpers = ConfigHelpers(options, args, log, product_type, get_commit_number, get_packing_cmd)
+
+
 OPENCL_REPO_NAME = 'opencl_runtime'
 # Codename for opencl_runtime is neo
 OPENCL_CODE_NAME = 'neo'
 
 # TODO: get OpenCL version from manifest
 OPENCL_REPO_DIR = options.get('REPOS_DIR') / OPENCL_REPO_NAME
-BUILD_NUM = get_commit_number(OPENCL_REPO_DIR)
+options['DEFERRED'] = DeferredValues({
+    'build_num': lambda repo_dir=OPENCL_REPO_DIR: helpers.get_cached_commit_number(repo_dir),
+})
+BUILD_NUM = '{DEFERRED[build_num]}'
 OPENCL_VERSION = manifest.get_component(OPENCL_REPO_NAME).version + f'.{BUILD_NUM}'
 
 DEPENDENCIES = [
@@ -48,32 +58,35 @@ OPENCL_LIB_INSTALL_DIRS = {
 }
 
 
+if helpers.tracing:
+    action = helpers.trace_actions(action, stage.BUILD)
+
+
 # Prepare dependencies
-GMMLIB_PATH = options['DEPENDENCIES_DIR'] / 'gmmlib' / 'usr' / 'local'
+GMMLIB_PATH = helpers.sysroot_dir / 'gmmlib'
 GMMLIB_PKG_CONFIG_PATH = GMMLIB_PATH / 'lib64' / 'pkgconfig'
-GMMLIB_PKG_CONFIG_RPM_PATTERN = {
-    '^prefix=.+': f'prefix={GMMLIB_PATH}',
-    '^includedir=.+': f'includedir={GMMLIB_PATH}/include/igdgmm',
-    '^libdir=.+': f'libdir={GMMLIB_PATH}/lib64'
+GMMLIB_PKG_CONFIG_UPDATES = {
+    '^includedir=.+': 'includedir=${prefix}/include/igdgmm',
+    '^libdir=.+': 'libdir=${prefix}/lib64'
 }
 
-action('Gmmlib: change pkgconfigs',
+action('Gmmlib: prepare sysroot',
        stage=stage.EXTRACT,
-       callfunc=(update_config, [GMMLIB_PKG_CONFIG_PATH, GMMLIB_PKG_CONFIG_RPM_PATTERN], {}))
+       callfunc=(helpers.prepare_dependency_sysroot, ['gmmlib', GMMLIB_PKG_CONFIG_UPDATES], {}))
 
-IGC_PATH = options['DEPENDENCIES_DIR'] / 'intel-graphics-compiler' / 'usr' / 'local'
+IGC_PATH = helpers.sysroot_dir / 'intel-graphics-compiler'
 IGC_PKG_CONFIG_PATH = IGC_PATH / 'lib64' / 'pkgconfig'
-IGC_PKG_CONFIG_RPM_PATTERN = {
-    '^prefix=.+': f'prefix={IGC_PATH}',
+IGC_PKG_CONFIG_UPDATES = {
     '^libdir=.+': 'libdir=${prefix}/lib64'
 }
 
-action('IGC: change pkgconfigs',
+action('IGC: prepare sysroot',
        stage=stage.EXTRACT,
-       callfunc=(update_config, [IGC_PKG_CONFIG_PATH, IGC_PKG_CONFIG_RPM_PATTERN], {}))
+       callfunc=(helpers.prepare_dependency_sysroot, ['intel-graphics-compiler', IGC_PKG_CONFIG_UPDATES], {}))
 
 # Build OpenCL
 cmake_command = ['cmake3',
+                 f'-G "{helpers.build_backend["generator"]}"',
                  '-DBUILD_TYPE=Release',
                  f'-DCMAKE_INSTALL_PREFIX={OPENCL_CENTOS_PREFIX}',
                  f'-DCMAKE_INSTALL_LIBDIR={OPENCL_LIB_INSTALL_DIRS["rpm"]}',
@@ -87,62 +100,90 @@ cmake_command = ['cmake3',
 cmake = ' '.join(cmake_command)
 
 
+if helpers.compiler_cache:
+    action('OpenCL: enable compiler cache',
+           callfunc=(helpers.enable_compiler_cache, [], {}))
+
 action('OpenCL: cmake',
        work_dir=options['BUILD_DIR'],
        cmd=cmake,
        env={'PKG_CONFIG_PATH': f'{GMMLIB_PKG_CONFIG_PATH}:{IGC_PKG_CONFIG_PATH}'})
 
 action('OpenCL: build',
-       cmd='make -j`nproc`')
+       cmd=helpers.with_compiler_cache_stats(helpers.build_backend['build'].format(jobs='`nproc`')))
+
+if helpers.build_backend['timing_log']:
+    action('OpenCL: build timing',
+           callfunc=(helpers.log_build_timing, [options['BUILD_DIR'], options['LOGS_DIR'] / 'build_timing.json'], {}))
 
 action('OpenCL: make install',
        stage=stage.INSTALL,
        work_dir=options['BUILD_DIR'],
-       cmd=f'make DESTDIR={options["INSTALL_DIR"]} install')
+       cmd=helpers.build_backend['install'].format(destdir=options['INSTALL_DIR']))
+
+action('OpenCL: track binary sizes',
+       stage=stage.INSTALL,
+       callfunc=(helpers.track_binary_sizes, [['lib*.so*']], {}))
 
 # OpenCL: rpm package
 pack_dir = options['INSTALL_DIR']
 
 # TODO: Hack of file intel.icd to resolve location of artifacts
-OPENCL_PACK_DIRS = [
+OPENCL_RPM_PACK_DIRS = [
     f'{pack_dir}/etc/=/etc/',
     f'{pack_dir}/{OPENCL_CENTOS_PREFIX.relative_to(OPENCL_CENTOS_PREFIX.root)}/{OPENCL_LIB_INSTALL_DIRS["rpm"]}/='
     f'{OPENCL_CENTOS_PREFIX}/{OPENCL_LIB_INSTALL_DIRS["rpm"]}',
     f'{pack_dir}/{OPENCL_CENTOS_PREFIX.relative_to(OPENCL_CENTOS_PREFIX.root)}/bin={OPENCL_CENTOS_PREFIX}',
 ]
 
-action('OpenCL: create rpm pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('rpm', OPENCL_PACK_DIRS, ENABLE_RUBY24, OPENCL_VERSION, OPENCL_CODE_NAME))
-
 # Update path to OpenCL on Ubuntu
 pkgconfig_deb_pattern = {
     str(OPENCL_CENTOS_PREFIX / OPENCL_LIB_INSTALL_DIRS['rpm']): str(OPENCL_DEB_PREFIX / OPENCL_LIB_INSTALL_DIRS['deb']),
 }
-path_to_config = options["INSTALL_DIR"] / 'etc/OpenCL/vendors/'
-action('OpenCL: change intel.icd for deb',
-       stage=stage.PACK,
-       callfunc=(update_config, [path_to_config,
-                                 pkgconfig_deb_pattern], {'pattern': '*.icd'}))
-
-path_to_config = options["INSTALL_DIR"] / 'etc/ld.so.conf.d/'
-action('OpenCL: change libintelopencl.conf for deb',
-       stage=stage.PACK,
-       callfunc=(update_config, [path_to_config,
-                                 pkgconfig_deb_pattern], {'pattern': '*.conf'}))
-
-OPENCL_PACK_DIRS = [
+OPENCL_ICD_DIR = options["INSTALL_DIR"] / 'etc/OpenCL/vendors/'
+OPENCL_LD_CONF_DIR = options["INSTALL_DIR"] / 'etc/ld.so.conf.d/'
+OPENCL_DEB_UPDATES = [
+    (OPENCL_ICD_DIR, pkgconfig_deb_pattern, {'pattern': '*.icd'}),
+    (OPENCL_LD_CONF_DIR, pkgconfig_deb_pattern, {'pattern': '*.conf'}),
+]
+
+OPENCL_DEB_PACK_DIRS = [
     f'{pack_dir}/etc/=/etc/',
     f'{pack_dir}/{OPENCL_CENTOS_PREFIX.relative_to(OPENCL_CENTOS_PREFIX.root)}/{OPENCL_LIB_INSTALL_DIRS["rpm"]}/='
     f'{OPENCL_DEB_PREFIX}/{OPENCL_LIB_INSTALL_DIRS["deb"]}',
     f'{pack_dir}/{OPENCL_CENTOS_PREFIX.relative_to(OPENCL_CENTOS_PREFIX.root)}/bin={OPENCL_DEB_PREFIX}',
 ]
 
-action('OpenCL: create deb pkg',
-       stage=stage.PACK,
-       work_dir=options['PACK_DIR'],
-       cmd=get_packing_cmd('deb', OPENCL_PACK_DIRS, ENABLE_RUBY24, OPENCL_VERSION, OPENCL_CODE_NAME))
+if helpers.parallel_pack:
+    action('OpenCL: create rpm and deb pkgs',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           callfunc=(helpers.pack_concurrently, [[
+               {'type': 'rpm', 'pack_dirs': OPENCL_RPM_PACK_DIRS, 'version': OPENCL_VERSION, 'name': OPENCL_CODE_NAME},
+               {'type': 'deb', 'pack_dirs': OPENCL_DEB_PACK_DIRS, 'version': OPENCL_VERSION, 'name': OPENCL_CODE_NAME,
+                'updates': OPENCL_DEB_UPDATES},
+           ], ENABLE_RUBY24], {}))
+else:
+    action('OpenCL: create rpm pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('rpm', OPENCL_RPM_PACK_DIRS, ENABLE_RUBY24, OPENCL_VERSION, OPENCL_CODE_NAME))
+
+    action('OpenCL: change intel.icd for deb',
+           stage=stage.PACK,
+           callfunc=(update_config, [OPENCL_ICD_DIR,
+                                     pkgconfig_deb_pattern], {'pattern': '*.icd'}))
+
+    action('OpenCL: change libintelopencl.conf for deb',
+           stage=stage.PACK,
+           callfunc=(update_config, [OPENCL_LD_CONF_DIR,
+                                     pkgconfig_deb_pattern], {'pattern': '*.conf'}))
+
+    action('OpenCL: create deb pkg',
+           stage=stage.PACK,
+           work_dir=options['PACK_DIR'],
+           cmd=get_packing_cmd('deb', OPENCL_DEB_PACK_DIRS, ENABLE_RUBY24, OPENCL_VERSION, OPENCL_CODE_NAME))
+
 
 INSTALL_PKG_DATA_TO_ARCHIVE.extend([
     {
@@ -0,0 +1,1332 @@
+# Copyright (c) 2020 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Helpers shared by product configurations
+
+Configurations are executed by build infrastructure, product-configs repository is extracted next to it,
+so configurations import this module as:
+
+    sys.path.append(str(infra_path.parent / 'product-configs'))
+    from config_helpers import ConfigHelpers
+
+    helpers = ConfigHelpers(options, args, log, product_type)
+
+Helpers which depend on globals of configuration are methods of ConfigHelpers,
+their settings are read from build args of configuration.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+
+# Build backends for cmake, chosen by build_backend arg
+BUILD_BACKENDS = {
+    'make': {
+        'generator': 'Unix Makefiles',
+        'build': 'make -j{jobs}',
+        'verbose_build': 'make VERBOSE=1 -j{jobs}',
+        'install': 'make DESTDIR={destdir} install',
+        'timing_log': None,
+    },
+    'ninja': {
+        'generator': 'Ninja',
+        'build': 'ninja-build -j{jobs}',
+        'verbose_build': 'ninja-build -v -j{jobs}',
+        'install': 'DESTDIR={destdir} ninja-build install',
+        'timing_log': '.ninja_log',
+    },
+}
+
+# Environment variables which change build output, only they get into cache keys
+BUILD_ENV_VARIABLES = ('CC', 'CXX', 'ASM', 'CPPFLAGS', 'CFLAGS', 'CXXFLAGS', 'ASMFLAGS', 'LDFLAGS')
+
+# Strings in `.comment` section written by compilers
+COMPILER_SIGNATURES = {
+    'gcc': 'GCC:',
+    'clang': 'clang version',
+}
+
+# JUnit report of ctest (--output-junit) is available since CTest 3.21, results are parsed from output of older ones
+CTEST_JUNIT_VERSION = (3, 21)
+
+BINARY_SIZES_HISTORY_LENGTH = 100
+BINARY_SIZE_GROWTH_WARNING = 0.01
+
+# Flags which cancel required flag if they follow it in command
+SDL_FLAG_OVERRIDES = {
+    '-D_FORTIFY_SOURCE=2': ['-U_FORTIFY_SOURCE', '-D_FORTIFY_SOURCE=0', '-D_FORTIFY_SOURCE=1'],
+    '-fstack-protector-strong': ['-fno-stack-protector', '-fstack-protector'],
+    '-Wformat-security': ['-Wno-format-security', '-Wno-format'],
+    '-z noexecstack': ['-z execstack'],
+    '-z relro': ['-z norelro'],
+    '-z now': ['-z lazy'],
+    '-pie': ['-no-pie'],
+}
+SDL_SOURCE_SUFFIXES = ('.c', '.cc', '.cpp', '.cxx')
+
+# Runs cmd of action read from stdin and appends its trace event to the trace
+ACTION_TRACER = """
+import json, os, resource, subprocess, sys, time
+trace_path, pid, name, stage_name = sys.argv[1:]
+cmd = sys.stdin.read()
+start = time.time()
+exit_code = subprocess.call(cmd, shell=True, stdin=subprocess.DEVNULL)
+end = time.time()
+usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+event = dict(name=name, cat=stage_name, ph='X', pid=int(pid), tid=1, ts=int(start * 1e6), dur=int((end - start) * 1e6),
+             args=dict(exit_code=exit_code, work_dir=os.getcwd(), cpu_time=round(usage.ru_utime + usage.ru_stime, 3)))
+os.makedirs(os.path.dirname(trace_path), exist_ok=True)
+with open(trace_path, 'a') as trace_file:
+    trace_file.write(('' if trace_file.tell() else '[\\n') + json.dumps(event) + ',\\n')
+sys.exit(exit_code)
+"""
+
+# Delimiter of here-document which passes traced command to ACTION_TRACER
+TRACED_CMD_DELIMITER = 'TRACED_ACTION_CMD'
+
+
+# Values which need populated sandbox or are expensive to compute are resolved only when actions run.
+# Action cmd refers to them as {DEFERRED[<name>]}, it is formatted by format_map(options) before execution
+class DeferredValues(dict):
+    """
+    Dict of values computed by providers on the first access
+    """
+
+    def __init__(self, providers):
+        super().__init__()
+        self.providers = providers
+
+    def __missing__(self, name):
+        self[name] = self.providers[name]()
+        return self[name]
+
+
+def hash_tree(path):
+    """
+    Files are not read, they are identified by size and modification time which are restored from package archives
+
+    :param path: dir
+    :return: sha256 of names, symlink targets, sizes and modification times of all items in dir
+    """
+
+    tree_hash = hashlib.sha256()
+    for item in sorted(path.rglob('*')):
+        tree_hash.update(str(item.relative_to(path)).encode())
+        if item.is_symlink():
+            tree_hash.update(os.readlink(item).encode())
+        elif item.is_file():
+            item_stat = item.stat()
+            tree_hash.update(f'{item_stat.st_size} {item_stat.st_mtime_ns}'.encode())
+    return tree_hash.hexdigest()
+
+
+def run_git(repo_dir, *git_args):
+    """
+    :param repo_dir: path to git repository
+    :param git_args: git command with arguments
+    :return: output of git command as bytes
+    """
+
+    return subprocess.run(['git', *git_args], cwd=repo_dir, check=True, stdout=subprocess.PIPE).stdout
+
+
+def hash_local_changes(repo_dir):
+    """
+    :param repo_dir: path to git repository
+    :return: sha256 of uncommitted changes and untracked files of repository
+    """
+
+    changes_hash = hashlib.sha256(run_git(repo_dir, 'diff', 'HEAD', '--binary'))
+    # Untracked files are not in diff, they are hashed by name and content
+    for path in sorted(run_git(repo_dir, 'ls-files', '--others', '--exclude-standard', '-z').split(b'\0')):
+        if not path:
+            continue
+        path = repo_dir / os.fsdecode(path)
+        changes_hash.update(bytes(path.relative_to(repo_dir)))
+        changes_hash.update(os.readlink(path).encode() if path.is_symlink() else path.read_bytes())
+    return changes_hash.hexdigest()
+
+
+def strip_root_dir(value, root_dir):
+    """
+    :param value: command or path
+    :param root_dir: ROOT_DIR of sandbox
+    :return: value as str where ROOT_DIR is replaced by its name, so it is the same in all sandboxes
+    """
+
+    return str(value).replace(str(root_dir), '$ROOT_DIR')
+
+
+def get_build_env(env, root_dir):
+    """
+    :param env: ENV of configuration
+    :param root_dir: ROOT_DIR of sandbox
+    :return: variables of env which change build output, without ccache wrapping of compilers and ROOT_DIR
+    """
+
+    return {variable: re.sub(r'^ccache ', '', strip_root_dir(env[variable], root_dir))
+            for variable in BUILD_ENV_VARIABLES if variable in env}
+
+
+def walk_archive_item(item_path, include, exclude, with_dirs=False):
+    """
+    Walks dir from DEV_PKG_DATA_TO_ARCHIVE item, patterns are matched with path relative to the item and with file name
+
+    :param item_path: dir of the item
+    :param include: glob patterns of archived files, all files are archived if it is empty
+    :param exclude: glob patterns of files and dirs which are not archived
+    :param with_dirs: yield dirs before their content, so empty dirs are archived too
+    :return: generator of relative paths of archived files and symlinks
+    """
+
+    def matches(relative_path, patterns):
+        return any(fnmatch.fnmatch(relative_path, pattern) or
+                   fnmatch.fnmatch(os.path.basename(relative_path), pattern)
+                   for pattern in patterns)
+
+    for root, dirs, files in os.walk(item_path):
+        relative_root = os.path.relpath(root, item_path)
+        relative_root = '' if relative_root == '.' else relative_root
+        if with_dirs and relative_root and not include:
+            yield relative_root
+        # Excluded dirs are not walked
+        dirs[:] = sorted(name for name in dirs if not matches(os.path.join(relative_root, name), exclude))
+        for name in sorted(files) + [name for name in dirs if os.path.islink(os.path.join(root, name))]:
+            relative_path = os.path.join(relative_root, name)
+            if matches(relative_path, exclude) or (include and not matches(relative_path, include)):
+                continue
+            yield relative_path
+
+
+def relocate_configs(config_dir, pattern, staging_config_dirs):
+    """
+    Rewrites configs for several packages in a single pass
+    Patterns are compiled once and every config is read once,
+    rewritten copies of the config are written to staging config dirs of all packages
+
+    :param config_dir: dir with original configs
+    :param pattern: glob pattern of configs
+    :param staging_config_dirs: dict {staging config dir: list of update data applied in order}
+    :return: None
+    """
+
+    import contextlib
+
+    compiled_patterns = {}
+    relocations = []
+    for staging_config_dir, updates in staging_config_dirs.items():
+        substitutions = []
+        for update_data in updates:
+            for regex, replacement in update_data.items():
+                if regex not in compiled_patterns:
+                    compiled_patterns[regex] = re.compile(regex)
+                substitutions.append((compiled_patterns[regex], replacement))
+        staging_config_dir.mkdir(parents=True, exist_ok=True)
+        relocations.append((staging_config_dir, substitutions))
+
+    for config in config_dir.glob(pattern):
+        with contextlib.ExitStack() as stack:
+            config_file = stack.enter_context(config.open())
+            outputs = [(stack.enter_context((staging_config_dir / f'{config.name}.tmp').open('w')), substitutions)
+                       for staging_config_dir, substitutions in relocations]
+            for line in config_file:
+                for output, substitutions in outputs:
+                    relocated_line = line
+                    for regex, replacement in substitutions:
+                        relocated_line = regex.sub(replacement, relocated_line)
+                    output.write(relocated_line)
+
+        # Replacing breaks hard links to original config
+        for staging_config_dir, _ in relocations:
+            shutil.copymode(config, staging_config_dir / f'{config.name}.tmp')
+            os.replace(staging_config_dir / f'{config.name}.tmp', staging_config_dir / config.name)
+
+
+def get_binary_sizes(lib_path, top_symbols_count=20):
+    """
+    Reads sizes of sections and the biggest symbols of library
+
+    :param lib_path: path to library
+    :param top_symbols_count: count of the biggest symbols to read
+    :return: dict {'size': ..., 'sections': {section: size}, 'symbols': {symbol: size}}
+    """
+
+    def run(*cmd):
+        return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              universal_newlines=True).stdout.splitlines()
+
+    sections = {}
+    # Format of lines: <section> <size> <address>
+    for line in run('size', '-A', '-d', str(lib_path)):
+        fields = line.split()
+        if len(fields) == 3 and fields[0].startswith('.'):
+            sections[fields[0]] = int(fields[1])
+
+    # Stripped library has dynamic symbols only
+    symbol_lines = run('nm', '-S', '-C', '--size-sort', '--defined-only', str(lib_path)) or \
+        run('nm', '-S', '-C', '--size-sort', '--defined-only', '-D', str(lib_path))
+    symbols = {}
+    # Format of lines: <address> <size> <type> <name>, sorted by size in ascending order
+    for line in reversed(symbol_lines):
+        fields = line.split(maxsplit=3)
+        if len(fields) == 4:
+            symbols[fields[3]] = int(fields[1], 16)
+            if len(symbols) == top_symbols_count:
+                break
+
+    return {'size': lib_path.stat().st_size, 'sections': sections, 'symbols': symbols}
+
+
+def get_binary_info(lib_path, version_marker):
+    """
+    Reads compilers from `.comment` section, build-id from notes and version strings from `.rodata` of library
+
+    :param lib_path: path to library
+    :param version_marker: substring of version strings
+    :return: dict {'compilers': [...], 'versions': [...], 'build_id': ...}
+    """
+
+    output = subprocess.run(['readelf', '-W', '-n', '-p', '.comment', '-p', '.rodata', str(lib_path)], check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode(errors='replace')
+
+    result = {'compilers': [], 'versions': [], 'build_id': None}
+    section = None
+    # Format of string dumps: "String dump of section '.comment':" and "  [    2d]  GCC: (GNU) 8.2.0" lines
+    for line in output.splitlines():
+        header = re.match(r"String dump of section '(.+)':", line)
+        if header or line.startswith('Displaying notes'):
+            section = header and header.group(1)
+            continue
+        build_id = re.search(r'Build ID: ([0-9a-f]+)', line)
+        if build_id:
+            result['build_id'] = build_id.group(1)
+        string = re.match(r'\s*\[\s*[0-9a-f]+\]  (.*)', line)
+        if not string:
+            continue
+        if section == '.comment':
+            result['compilers'].append(string.group(1))
+        elif section == '.rodata' and version_marker in string.group(1):
+            result['versions'].append(string.group(1))
+    return result
+
+
+def format_sizes_diff(old_sizes, new_sizes):
+    """
+    :return: lines with changed sizes, the biggest changes first
+    """
+
+    changes = sorted(((name, old_sizes.get(name, 0), new_sizes.get(name, 0))
+                      for name in set(old_sizes) | set(new_sizes)
+                      if old_sizes.get(name, 0) != new_sizes.get(name, 0)),
+                     key=lambda change: -abs(change[2] - change[1]))
+    return [f'    {name:<40} {old:>12} -> {new:>12} ({new - old:+})' for name, old, new in changes]
+
+
+def get_compiler_env(compiler):
+    """
+    :param compiler: compiler from compiler_matrix arg
+    :return: dict with CC, CXX and ASM environment variables
+    """
+
+    if compiler == 'system':
+        return {}
+    name, version = compiler.split('-', 1)
+    if name == 'gcc':
+        return {'CC': f'/usr/bin/gcc-{version}', 'CXX': f'/usr/bin/g++-{version}'}
+    return {'CC': f'/usr/bin/clang-{version}', 'CXX': f'/usr/bin/clang++-{version}', 'ASM': f'/usr/bin/clang-{version}'}
+
+
+def get_sdl_flags(command):
+    """
+    :param command: compilation or link command
+    :return: list of flags, `-Wl,` flags are split and `-z` options are joined with their values
+    """
+
+    flags = []
+    for token in command.split():
+        token = token.strip('"\'')
+        for flag in token[len('-Wl,'):].split(',') if token.startswith('-Wl,') else [token]:
+            if flags and flags[-1] == '-z':
+                flags[-1] = f'-z {flag}'
+            else:
+                flags.append(flag)
+    return flags
+
+
+def get_link_commands(build_dir):
+    """
+    :param build_dir: build dir of Ninja or CMake Makefiles
+    :return: list of commands which link shared libraries and executables
+    """
+
+    if (build_dir / 'build.ninja').exists():
+        commands = subprocess.run(['ninja-build', '-t', 'commands'], cwd=build_dir, check=True,
+                                  universal_newlines=True, stdout=subprocess.PIPE).stdout.splitlines()
+    else:
+        commands = [command for link_file in build_dir.glob('**/CMakeFiles/*.dir/link.txt')
+                    for command in link_file.read_text().splitlines()]
+    # Static libraries are created by ar and ranlib, they are not linked
+    return [command for command in commands
+            if ' -o ' in command and ' -c ' not in command and not re.match(r'\S*(ar|ranlib)\s', command)]
+
+
+class ConfigHelpers:
+    """
+    Helpers which use globals of configuration set by build infrastructure
+
+    Build args of configuration:
+        compiler_cache, ccache_dir - compile through ccache, cache dir can be shared between sandboxes
+        build_backend - make or ninja, see BUILD_BACKENDS
+        build_cache_dir, build_cache_max_size_gb - local cache of INSTALL_DIR content
+        binary_sizes_history_dir, binary_size_growth_limit - size history of shipped libraries in persistent dir,
+            sizes are only reported without it
+        ctest_jobs, ctest_timeout, ctest_timings_path - run unit tests by one ctest process in parallel, the longest
+            tests from previous runs are started first
+        compiler_matrix - compilers built at the same time from the same sources, for example: ['gcc-10', 'clang-11']
+        dependency_sysroots_dir, dependency_sysroots_max_size_gb - relocated prefixes of dependencies shared between
+            sandboxes
+        parallel_pack - pack deb and rpm packages in parallel instead of one after another
+        stream_archive, archive_compressor - stream package data to archives in PACK_DIR instead of archiving it
+            by infrastructure, archives are tar.gz by default or tar.zst with archive_compressor=zstd
+        sdl_strict - fail build on SDL flag violations instead of reporting them, it is on for release BUILD_TYPE
+        trace_actions - trace of actions in Chrome trace event format
+    """
+
+    def __init__(self, options, args, log, product_type, get_commit_number=None, get_packing_cmd=None,
+                 compiler_cache=False):
+        """
+        :param options, args, log, product_type, get_commit_number, get_packing_cmd: globals of configuration
+        :param compiler_cache: compile through ccache regardless of compiler_cache arg
+        """
+
+        self.options = options
+        self.args = args
+        self.log = log
+        self.product_type = product_type
+        self.get_commit_number = get_commit_number
+        self.get_packing_cmd = get_packing_cmd
+
+        # Git metadata of repositories shared by all stages and configs running in the sandbox
+        self.git_metadata_cache = options['ROOT_DIR'] / 'git_metadata_cache.json'
+
+        self.compiler_cache = args.get('compiler_cache', False) or compiler_cache
+        self.compiler_cache_dir = args.get('ccache_dir', options['ROOT_DIR'] / 'ccache')
+
+        self.build_backend = BUILD_BACKENDS[args.get('build_backend', 'make')]
+
+        self.build_cache_dir = args.get('build_cache_dir')
+        self.build_cache_max_size = int(args.get('build_cache_max_size_gb', 50)) * 1024 ** 3
+        self.build_cache_key_file = options['BUILD_DIR'] / '.build_cache_key'
+        self.build_cache_hit_marker = options['BUILD_DIR'] / '.build_cache_hit'
+
+        # History must outlive the sandbox, so it has no default in ROOT_DIR, sizes are only reported without it
+        self.binary_sizes_history_dir = args.get('binary_sizes_history_dir')
+        # Build fails if library grows more than this ratio, it is not checked by default
+        self.binary_size_growth_limit = args.get('binary_size_growth_limit')
+
+        self.ctest_jobs = int(args.get('ctest_jobs', 0))
+        self.ctest_timeout = int(args.get('ctest_timeout', 600))  # seconds
+        self.ctest_timings_path = pathlib.Path(
+            args.get('ctest_timings_path', options['ROOT_DIR'] / 'ctest_timings' / f'{product_type}.json'))
+
+        self.compiler_matrix = args.get('compiler_matrix', [])
+        for compiler in self.compiler_matrix:
+            if compiler != 'system' and compiler.split('-')[0] not in ('gcc', 'clang'):
+                raise Exception(f"Unknown compiler '{compiler}', possible: system, gcc-<version>, clang-<version>")
+
+        # Relocated prefixes of dependencies, they are prepared once per content of dependency and reused read-only
+        self.dependency_sysroots_dir = args.get('dependency_sysroots_dir', options['ROOT_DIR'] / 'sysroots')
+        self.dependency_sysroots_max_size = int(args.get('dependency_sysroots_max_size_gb', 10)) * 1024 ** 3
+        # Links to sysroots of dependencies used by this build
+        self.sysroot_dir = options['ROOT_DIR'] / 'sysroot'
+
+        self.parallel_pack = args.get('parallel_pack', False)
+        self.pack_views_dir = options['ROOT_DIR'] / 'pack_views'
+        self.archive_streaming = args.get('stream_archive', False)
+        # Streamed archives are tar.gz as archives of infrastructure, zstd is faster but needs it to unpack
+        self.archive_compressor = args.get('archive_compressor', 'gzip')
+        if self.archive_compressor not in ('gzip', 'zstd'):
+            raise Exception(f"Unknown archive compressor '{self.archive_compressor}', possible: gzip, zstd")
+
+        self.sdl_report_path = options['LOGS_DIR'] / 'sdl_report.json'
+        # Build fails on SDL violations and missing compile_commands.json, they are only reported for debug builds
+        self.sdl_strict = args.get('sdl_strict', options.get('BUILD_TYPE') == 'release')
+
+        self.tracing = args.get('trace_actions', False)
+        self.trace_path = options['LOGS_DIR'] / 'trace.json'
+
+    def get_cached_git_metadata(self, repo_path, key, compute):
+        """
+        Returns metadata of repository from git metadata cache of the sandbox
+        Metadata is computed only once for every HEAD of repository
+
+        :param repo_path: path to repository
+        :param key: name of metadata
+        :param compute: function without arguments which computes metadata
+        :return: metadata value
+        """
+
+        import fcntl
+
+        try:
+            head = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo_path, check=True, universal_newlines=True,
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            # Repository is not extracted yet
+            return compute()
+
+        cache_path = self.git_metadata_cache
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f'{cache_path}.lock', 'w') as lock:
+            # Lock is held during computation, so concurrent processes do not repeat it
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            cache = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+            if key not in cache.get(head, {}):
+                cache.setdefault(head, {})[key] = compute()
+                with open(f'{cache_path}.tmp', 'w') as cache_file:
+                    json.dump(cache, cache_file, indent=4)
+                os.replace(f'{cache_path}.tmp', cache_path)
+            return cache[head][key]
+
+    def get_cached_commit_number(self, repo_path):
+        return self.get_cached_git_metadata(repo_path, 'commit_number', lambda: self.get_commit_number(repo_path))
+
+    def enable_compiler_cache(self):
+        """
+        Wraps compilers from ENV to ccache
+        Paths under ROOT_DIR are hashed as relative ones, so builds in different sandboxes share cache entries
+
+        :return: None
+        """
+
+        env = self.options['ENV']
+        env.update({
+            'CCACHE_DIR': str(self.compiler_cache_dir),
+            'CCACHE_BASEDIR': str(self.options['ROOT_DIR']),
+            # Build dir is written only to debug info
+            'CCACHE_NOHASHDIR': 'true',
+        })
+        for variable, default_compiler in (('CC', 'cc'), ('CXX', 'c++'), ('ASM', None)):
+            compiler = env.get(variable, default_compiler)
+            if compiler and not compiler.startswith('ccache '):
+                env[variable] = f'ccache {compiler}'
+
+    def with_compiler_cache_stats(self, cmd):
+        if not self.compiler_cache:
+            return cmd
+        return f'ccache --zero-stats > /dev/null && ({cmd}); result=$?; ccache --show-stats; exit $result'
+
+    def log_build_timing(self, build_dir, report_path, top_count=20):
+        """
+        Logs the longest targets from timing log of build backend and writes timings of all targets to json report
+
+        :param build_dir: build dir with timing log
+        :param report_path: path to json report
+        :param top_count: count of targets to log
+        :return: None
+        """
+
+        timing_log = build_dir / self.build_backend['timing_log']
+        if not timing_log.exists():
+            self.log.warning(f'{timing_log} is not found')
+            return
+
+        # Format of .ninja_log lines: <start, ms>\t<end, ms>\t<mtime>\t<target>\t<command hash>
+        # Every build appends lines, so the last line of target is used
+        timings = {}
+        with timing_log.open() as timing_file:
+            for line in timing_file:
+                if line.startswith('#'):
+                    continue
+                start, end, _, target, _ = line.rstrip('\n').split('\t')
+                timings[target] = (int(end) - int(start)) / 1000
+
+        timings = dict(sorted(timings.items(), key=lambda item: -item[1]))
+        self.log.info(f'{len(timings)} targets, the longest ones:\n' +
+                      '\n'.join(f'{duration:10.1f}s  {target}'
+                                for target, duration in list(timings.items())[:top_count]))
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(timings, indent=4))
+
+    def run_ctest_concurrently(self, build_dir):
+        """
+        Runs tests by one ctest process, up to ctest_jobs tests at the same time
+
+        Durations of tests are stored to ctest_timings_path and restored to cost data of ctest by next runs,
+        so ctest starts the longest tests first and wall time is close to duration of the longest test.
+        Results of tests are read from JUnit report of ctest or from its output if ctest is older than 3.21.
+        Output of every test is written to LOGS_DIR/ctest/<test>.log, results of all tests to LOGS_DIR/ctest_report.json
+
+        :param build_dir: cmake build dir with tests
+        :return: None
+        """
+
+        import resource
+        import time
+        import xml.etree.ElementTree as ElementTree
+
+        logs_dir = self.options['LOGS_DIR'] / 'ctest'
+        logs_dir.mkdir(parents=True, exist_ok=True)
+        timings_path = self.ctest_timings_path
+        timings = json.loads(timings_path.read_text()) if timings_path.exists() else {}
+
+        # Format of first line: "ctest version 3.17.5"
+        version = subprocess.run(['ctest', '--version'], check=True, stdout=subprocess.PIPE,
+                                 universal_newlines=True).stdout
+        version = tuple(int(number) for number in re.search(r'(\d+)\.(\d+)', version).groups())
+        junit_report = version >= CTEST_JUNIT_VERSION
+
+        # Format of lines: "  Test  #1: <test name>"
+        listing = subprocess.run(['ctest', '-N'], cwd=build_dir, check=True, stdout=subprocess.PIPE,
+                                 universal_newlines=True).stdout
+        tests = re.findall(r'^\s*Test\s+#\d+: (.+)$', listing, re.MULTILINE)
+
+        # Format of cost data: "<test> <runs> <average duration>" lines, then "---" and names of tests which ctest
+        # starts before others. Tests without timings are started first as they can be the longest ones
+        cost_data_path = pathlib.Path(build_dir) / 'Testing' / 'Temporary' / 'CTestCostData.txt'
+        cost_data_path.parent.mkdir(parents=True, exist_ok=True)
+        cost_data_path.write_text(''.join(f'{name} 1 {timings[name]}\n' for name in tests if name in timings) +
+                                  '---\n' + ''.join(f'{name}\n' for name in tests if name not in timings))
+
+        junit_path = logs_dir / 'ctest_junit.xml'
+        ctest_log_path = logs_dir / 'ctest.log'
+        ctest_cmd = ['ctest', f'-j{self.ctest_jobs}', '--timeout', str(self.ctest_timeout)]
+        ctest_cmd += ['--output-junit', str(junit_path)] if junit_report else ['--output-on-failure']
+        start, usage_start = time.monotonic(), resource.getrusage(resource.RUSAGE_CHILDREN)
+        with ctest_log_path.open('w') as ctest_log:
+            process = subprocess.run(ctest_cmd, cwd=build_dir, stdout=ctest_log, stderr=subprocess.STDOUT)
+        wall_time, usage = time.monotonic() - start, resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu_time = usage.ru_utime + usage.ru_stime - usage_start.ru_utime - usage_start.ru_stime
+        ctest_output = ctest_log_path.read_text(errors='replace')
+
+        # Format of lines of ctest output: "4/5 Test #4: <test name> .......***Timeout   1.00 sec"
+        statuses = {name: (status, float(duration)) for name, status, duration in re.findall(
+            r'^\s*\d+/\d+ Test\s+#\d+: (.+?) \.+\s*(?:\*\*\*)?(.+?)\s+([\d.]+) sec', ctest_output, re.MULTILINE)}
+        if (junit_report and not junit_path.exists()) or (not junit_report and not statuses):
+            raise Exception(f'ctest exited with code {process.returncode} without results, output:\n{ctest_output}')
+
+        results = []
+        if junit_report:
+            for test_case in ElementTree.parse(junit_path).getroot().iter('testcase'):
+                name = test_case.get('name')
+                log_path = logs_dir / (re.sub(r'[^\w.-]', '_', name) + '.log')
+                log_path.write_text(test_case.findtext('system-out') or '')
+                # JUnit report does not distinguish timeouts, they are taken from ctest output
+                if test_case.get('status') == 'run':
+                    result = 'passed'
+                elif test_case.get('status') == 'notrun':
+                    result = 'skipped'
+                else:
+                    result = 'timeout' if statuses.get(name, ('',))[0] == 'Timeout' else 'failed'
+                results.append({'test': name, 'result': result, 'duration': round(float(test_case.get('time', 0)), 3),
+                                'log': str(log_path)})
+        else:
+            # Output of tests is not split by ctest, output of failed ones is in ctest log
+            for name, (status, duration) in statuses.items():
+                if status == 'Passed':
+                    result = 'passed'
+                elif status in ('Not Run', 'Skipped'):
+                    result = 'skipped'
+                else:
+                    result = 'timeout' if status == 'Timeout' else 'failed'
+                results.append({'test': name, 'result': result, 'duration': duration, 'log': str(ctest_log_path)})
+
+        for result in sorted(results, key=lambda result: -result['duration']):
+            self.log.info(f"{result['test']:<48} {result['duration']:8.1f}s  {result['result'].upper()}")
+        longest = max((result['duration'] for result in results), default=0)
+        self.log.info(f'{len(results)} tests in {self.ctest_jobs} jobs: wall time {wall_time:.1f}s, '
+                      f"the longest test {longest:.1f}s, sum of durations {sum(r['duration'] for r in results):.1f}s, "
+                      f'cpu time {cpu_time:.1f}s')
+
+        (self.options['LOGS_DIR'] / 'ctest_report.json').write_text(json.dumps(results, indent=4))
+        timings.update({result['test']: result['duration'] for result in results if result['result'] != 'skipped'})
+        timings_path.parent.mkdir(parents=True, exist_ok=True)
+        timings_path.write_text(json.dumps(timings, indent=4))
+
+        failed = [result for result in results if result['result'] in ('failed', 'timeout')]
+        if junit_report:
+            for result in failed:
+                self.log.info(f"Output of {result['test']}:\n{pathlib.Path(result['log']).read_text(errors='replace')}")
+        elif failed:
+            self.log.info(f'Output of ctest:\n{ctest_output}')
+        if failed:
+            raise Exception(f"Failed tests: {', '.join(result['test'] for result in failed)}")
+
+    def inspect_binaries(self, bin_dir, report_path, version_marker='mediasdk', expected_compiler=None):
+        """
+        Reads compiler, version strings and build-id of libraries by readelf, libraries are read in parallel,
+        results are logged and written to report_path as json
+
+        :param bin_dir: dir with libraries
+        :param report_path: path to json report
+        :param version_marker: substring of version strings in read-only data
+        :param expected_compiler: (optional) key of COMPILER_SIGNATURES, libraries built by other compiler are errors
+        :return: None
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        libs = sorted(bin_dir.glob('*.so'))
+        with ThreadPoolExecutor(max_workers=self.options['CPU_CORES']) as executor:
+            report = dict(zip((lib.name for lib in libs),
+                              executor.map(lambda lib: get_binary_info(lib, version_marker), libs)))
+
+        errors = []
+        for lib_name, result in report.items():
+            self.log.info(f"{lib_name}: build-id {result['build_id']}\n"
+                          f"    compilers: {'; '.join(result['compilers']) or 'not found'}\n"
+                          f"    versions: {'; '.join(result['versions']) or 'not found'}")
+            signature = COMPILER_SIGNATURES.get(expected_compiler)
+            if signature and not any(signature in compiler for compiler in result['compilers']):
+                errors.append(lib_name)
+
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=4))
+        if errors:
+            raise Exception(f"Libraries are not built by {expected_compiler}: {', '.join(errors)}")
+
+    def track_binary_sizes(self, lib_patterns):
+        """
+        Compares sizes of libraries with the previous build from binary sizes history and adds them to history
+        Report with sizes of sections and the biggest symbols is written to LOGS_DIR/binary_sizes.json,
+        sizes are not compared if binary_sizes_history_dir argument is not set
+
+        :param lib_patterns: glob patterns of shipped libraries in INSTALL_DIR
+        :return: None
+        """
+
+        import datetime
+
+        install_dir = self.options['INSTALL_DIR']
+        libs = {}
+        for pattern in lib_patterns:
+            for lib_path in install_dir.rglob(pattern):
+                if lib_path.is_file() and not lib_path.is_symlink():
+                    # Version suffix is dropped to compare libraries of different versions
+                    libs[re.sub(r'\.so(\.\d+)*$', '.so', lib_path.name)] = lib_path
+        if not libs:
+            self.log.warning(f'Libraries {", ".join(lib_patterns)} are not found in {install_dir}')
+            return
+
+        sizes = {lib: get_binary_sizes(lib_path) for lib, lib_path in sorted(libs.items())}
+        report_path = self.options['LOGS_DIR'] / 'binary_sizes.json'
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(sizes, indent=4))
+
+        if not self.binary_sizes_history_dir:
+            self.log.info(f'Sizes of {", ".join(sizes)} are written to {report_path}, '
+                          f'they are not compared as binary_sizes_history_dir is not set')
+            return
+
+        history_path = pathlib.Path(self.binary_sizes_history_dir) / f'{self.product_type}.json'
+        history = json.loads(history_path.read_text()) if history_path.exists() else []
+        baseline = history[-1]['libraries'] if history else {}
+
+        growth_limit = self.binary_size_growth_limit
+        exceeded = []
+        for lib, lib_sizes in sizes.items():
+            if lib not in baseline:
+                self.log.info(f'{lib}: {lib_sizes["size"]} bytes, there is no baseline')
+                continue
+            old_size, new_size = baseline[lib]['size'], lib_sizes['size']
+            if old_size:
+                growth = new_size / old_size - 1
+            else:
+                growth = float('inf') if new_size else 0.0
+            message = f'{lib}: {old_size} -> {new_size} bytes ({growth:+.2%})'
+            if growth <= BINARY_SIZE_GROWTH_WARNING:
+                self.log.info(message)
+                continue
+            self.log.warning('\n'.join([message, '  sections:',
+                                        *format_sizes_diff(baseline[lib]['sections'], lib_sizes['sections']),
+                                        '  the biggest symbols:',
+                                        *format_sizes_diff(baseline[lib]['symbols'], lib_sizes['symbols'])]))
+            if growth_limit is not None and growth > float(growth_limit):
+                exceeded.append(message)
+
+        if exceeded:
+            raise Exception(f'Libraries grew more than {float(growth_limit):.2%}:\n' + '\n'.join(exceeded))
+
+        history.append({'date': datetime.datetime.now().isoformat(timespec='seconds'), 'libraries': sizes})
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        history_path.write_text(json.dumps(history[-BINARY_SIZES_HISTORY_LENGTH:], indent=4))
+
+    def build_compiler_matrix(self, cmake_commands, env):
+        """
+        Builds the same sources by several compilers at the same time, CPU_CORES are split between the builds
+
+        Every compiler is built in ROOT_DIR/build_<compiler> with log in LOGS_DIR/compiler_matrix/<compiler>.log,
+        build times of compilers are compared in log and LOGS_DIR/compiler_matrix.json
+
+        :param cmake_commands: dict {compiler: cmake command}
+        :param env: additional environment variables of the builds
+        :return: None
+        """
+
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        options = self.options
+        logs_dir = options['LOGS_DIR'] / 'compiler_matrix'
+        logs_dir.mkdir(parents=True, exist_ok=True)
+        jobs = max(1, options['CPU_CORES'] // len(cmake_commands))
+
+        def build(compiler):
+            build_dir = options['ROOT_DIR'] / f'build_{compiler}'
+            compiler_env = get_compiler_env(compiler)
+            if self.compiler_cache:
+                compiler_env = {variable: f'ccache {compiler_path}' for variable, compiler_path in
+                                {'CC': 'cc', 'CXX': 'c++', **compiler_env}.items()}
+            build_env = {variable: value for variable, value in options['ENV'].items()
+                         if variable not in ('CC', 'CXX', 'ASM')}
+            build_env = dict(os.environ, **build_env, **env, **compiler_env)
+
+            result = {'compiler': compiler, 'status': 'passed', 'log': str(logs_dir / f'{compiler}.log')}
+            steps = [
+                ('cmake', f'rm -rf {build_dir} && mkdir -p {build_dir} && cd {build_dir} && '
+                          f'{cmake_commands[compiler]}'),
+                ('build', f'cd {build_dir} && {self.build_backend["build"].format(jobs=jobs)}'),
+            ]
+            with open(result['log'], 'w') as log_file:
+                for step, cmd in steps:
+                    start = time.monotonic()
+                    return_code = subprocess.run(cmd, shell=True, env=build_env, stdout=log_file,
+                                                 stderr=subprocess.STDOUT).returncode
+                    result[step] = round(time.monotonic() - start, 1)
+                    if return_code:
+                        result['status'] = f'{step} failed'
+                        break
+            return result
+
+        with ThreadPoolExecutor(max_workers=len(cmake_commands)) as executor:
+            results = list(executor.map(build, cmake_commands))
+
+        lines = [f"{'compiler':<16}{'cmake, s':>10}{'build, s':>10}  status ({jobs} jobs per build)"]
+        for result in results:
+            lines.append(f"{result['compiler']:<16}{result.get('cmake', '-'):>10}{result.get('build', '-'):>10}  "
+                         f"{result['status']}")
+        self.log.info('\n'.join(lines))
+        (options['LOGS_DIR'] / 'compiler_matrix.json').write_text(json.dumps(results, indent=4))
+
+        failed = [result['compiler'] for result in results if result['status'] != 'passed']
+        if failed:
+            raise Exception(f"Builds by {', '.join(failed)} failed, logs: {logs_dir}")
+
+    def verify_sdl_flags(self, component, build_dir, policy):
+        """
+        Checks that every translation unit from compile_commands.json and every link in build dir
+        have flags of SDL policy
+        Violations grouped by missing or overridden flag are written to LOGS_DIR/sdl_report.json,
+        build fails on them in strict mode only, see sdl_strict argument
+
+        :param component: component name for report
+        :param build_dir: build dir with compile_commands.json
+        :param policy: dict with keys:
+            compile - required flags of compilation
+            link - required flags of linking
+            shared_only - (optional) link flags are required for shared libraries only
+        :return: None
+        """
+
+        def check(flags, required):
+            problems = []
+            for flag in required:
+                if flag not in flags:
+                    problems.append(f'missing {flag}')
+                    continue
+                last = len(flags) - 1 - flags[::-1].index(flag)
+                overrides = [override for override in flags[last + 1:]
+                             if override in SDL_FLAG_OVERRIDES.get(flag, [])]
+                if overrides:
+                    problems.append(f'{flag} overridden by {overrides[-1]}')
+            return problems
+
+        if self.build_cache_hit_marker.exists():
+            self.log.info('Build is restored from build cache, SDL flags were verified by the cached build')
+            return
+
+        compile_commands_path = build_dir / 'compile_commands.json'
+        if not compile_commands_path.exists():
+            message = f'{compile_commands_path} is not found, SDL flags cannot be verified'
+            if self.sdl_strict:
+                raise Exception(message)
+            self.log.warning(message)
+            return
+
+        violations = {}
+        translation_units = 0
+        for entry in json.loads(compile_commands_path.read_text()):
+            source = pathlib.Path(entry['directory'], entry['file'])
+            if source.suffix not in SDL_SOURCE_SUFFIXES:
+                continue
+            translation_units += 1
+            command = entry.get('command') or ' '.join(entry['arguments'])
+            for problem in check(get_sdl_flags(command), policy['compile']):
+                violations.setdefault(problem, []).append(str(source))
+
+        links = 0
+        if policy['link']:
+            for command in get_link_commands(build_dir):
+                flags = get_sdl_flags(command)
+                if policy.get('shared_only') and '-shared' not in flags:
+                    continue
+                links += 1
+                target = flags[flags.index('-o') + 1]
+                for problem in check(flags, policy['link']):
+                    violations.setdefault(problem, []).append(target)
+
+        report_path = self.sdl_report_path
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps({'component': component, 'policy': policy,
+                                           'translation_units': translation_units, 'links': links,
+                                           'violations': violations}, indent=4))
+        self.log.info(f'{component}: SDL flags are checked in {translation_units} translation units and {links} links')
+        if violations:
+            message = f'SDL violations of {component}, report: {report_path}\n' + '\n'.join(
+                f'{problem}: {len(paths)} ({", ".join(paths[:5])}{", ..." if len(paths) > 5 else ""})'
+                for problem, paths in violations.items())
+            if self.sdl_strict:
+                raise Exception(message)
+            self.log.warning(message)
+
+    def trace_actions(self, action, default_stage):
+        """
+        Wraps action function to append trace event of every action to LOGS_DIR/trace.json
+
+        Event contains start, duration, stage, exit code, work dir and CPU time of child processes of the action.
+        Trace is appended by all stages, so it is a JSON array without closing bracket which is allowed by the format.
+        It can be opened in chrome://tracing or https://ui.perfetto.dev
+
+        :param action: action function of build infrastructure
+        :param default_stage: stage of actions without stage argument
+        :return: wrapped action function
+        """
+
+        import resource
+        import shlex
+        import time
+
+        pid = os.getpid()
+        trace_path = self.trace_path
+
+        def get_cpu_time():
+            return sum(resource.getrusage(who).ru_utime + resource.getrusage(who).ru_stime
+                       for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+        def traced_action(name, **action_kwargs):
+            action_stage = action_kwargs.get('stage', default_stage)
+            stage_name = str(getattr(action_stage, 'value', action_stage))
+
+            if action_kwargs.get('cmd'):
+                # Command is formatted by format_map(options) when action runs, so it is not quoted here:
+                # substituted values would break quoting. It is passed verbatim by here-document instead,
+                # and braces of the wrapper are escaped to survive formatting
+                tracer = ' '.join(shlex.quote(str(arg)) for arg in [
+                    'python3', '-c', ACTION_TRACER, trace_path, pid, name, stage_name])
+                tracer = tracer.replace('{', '{{').replace('}', '}}')
+                action_kwargs['cmd'] = (f"{tracer} <<'{TRACED_CMD_DELIMITER}'\n"
+                                        f"{action_kwargs['cmd']}\n{TRACED_CMD_DELIMITER}")
+            elif action_kwargs.get('callfunc'):
+                func, func_args, func_kwargs = action_kwargs['callfunc']
+
+                def traced_func(*call_args, **call_kwargs):
+                    start, cpu_time = time.time(), get_cpu_time()
+                    exit_code = 1
+                    try:
+                        result = func(*call_args, **call_kwargs)
+                        exit_code = 0
+                        return result
+                    finally:
+                        end, cpu_time = time.time(), get_cpu_time() - cpu_time
+                        event = {'name': name, 'cat': stage_name, 'ph': 'X', 'pid': pid, 'tid': 1,
+                                 'ts': int(start * 1e6), 'dur': int((end - start) * 1e6),
+                                 'args': {'exit_code': exit_code, 'cpu_time': round(cpu_time, 3),
+                                          'work_dir': str(action_kwargs.get('work_dir') or os.getcwd())}}
+                        trace_path.parent.mkdir(parents=True, exist_ok=True)
+                        with trace_path.open('a') as trace_file:
+                            trace_file.write(('' if trace_file.tell() else '[\n') + json.dumps(event) + ',\n')
+
+                action_kwargs['callfunc'] = (traced_func, func_args, func_kwargs)
+
+            return action(name, **action_kwargs)
+
+        return traced_action
+
+    def pack_concurrently(self, pack_jobs, packing_prefix):
+        """
+        Creates packages in parallel
+
+        Every job with config updates is packed from its own hard linked view of INSTALL_DIR,
+        so updates for one package type do not affect the others.
+        Configs of all views are rewritten in a single pass by relocate_configs.
+        INSTALL_DIR gets config updates of the last such job, as after sequential packing.
+
+        :param pack_jobs: list of dicts with keys:
+            type - package type: deb or rpm
+            pack_dirs - list of `<dir in INSTALL_DIR>=<install dir>` mappings
+            version, name - package version and name
+            updates - (optional) list of (config dir, update data, {'pattern': glob of configs}) applied in order
+        :param packing_prefix: command which prepares environment of packing tool
+        :return: None
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        options = self.options
+        install_dir = options['INSTALL_DIR']
+
+        def link_or_copy(src, dst):
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+        def get_view_dir(job):
+            return self.pack_views_dir / f"{job['name']}_{job['type']}"
+
+        updated_jobs = [job for job in pack_jobs if job.get('updates')]
+        relocations = {}
+        for job in updated_jobs:
+            view_dir = get_view_dir(job)
+            if view_dir.exists():
+                shutil.rmtree(view_dir)
+            shutil.copytree(install_dir, view_dir, symlinks=True, copy_function=link_or_copy)
+
+            for config_dir, update_data, kwargs in job['updates']:
+                staging_config_dirs = relocations.setdefault((config_dir, kwargs.get('pattern', '*.pc')), {})
+                staging_config_dirs.setdefault(view_dir / config_dir.relative_to(install_dir), []).append(update_data)
+
+        for (config_dir, pattern), staging_config_dirs in relocations.items():
+            relocate_configs(config_dir, pattern, staging_config_dirs)
+
+        def pack(job):
+            pack_dirs = job['pack_dirs']
+            if job.get('updates'):
+                view_dir = get_view_dir(job)
+                pack_dirs = [pack_dir.replace(str(install_dir), str(view_dir), 1) for pack_dir in pack_dirs]
+
+            cmd = self.get_packing_cmd(job['type'], pack_dirs, packing_prefix, job['version'], job['name'])
+            env = os.environ.copy()
+            env.update(options['ENV'])
+            return subprocess.run(cmd.format_map(options), shell=True, executable='/bin/bash',
+                                  cwd=options['PACK_DIR'], env=env, universal_newlines=True,
+                                  stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+        with ThreadPoolExecutor(max_workers=len(pack_jobs)) as executor:
+            results = list(executor.map(pack, pack_jobs))
+
+        failed = []
+        for job, result in zip(pack_jobs, results):
+            self.log.info(f"{job['name']}: {job['type']} package:\n{result.stdout}")
+            if result.returncode:
+                failed.append(f"{job['type']} (exit code {result.returncode})")
+        if failed:
+            raise Exception(f"Packing failed: {', '.join(failed)}")
+
+        if updated_jobs:
+            job = updated_jobs[-1]
+            for config_dir, _, kwargs in job['updates']:
+                view_config_dir = get_view_dir(job) / config_dir.relative_to(install_dir)
+                for config in view_config_dir.glob(kwargs.get('pattern', '*.pc')):
+                    shutil.copy2(config, config_dir / config.name)
+
+    def skip_on_build_cache_hit(self, cmd):
+        if not self.build_cache_dir:
+            return cmd
+        return f'test -f {self.build_cache_hit_marker} || ({cmd})'
+
+    def lookup_build_cache(self, repo_dirs, build_cmd, dependencies):
+        """
+        Computes cache key of the build and marks build as cached if the key is present in build cache
+        Key is computed from sources revision with local changes, build command, build variables of ENV
+        and dependencies. ROOT_DIR is stripped from them, so builds in different sandboxes share cache entries
+
+        :param repo_dirs: repositories which are built
+        :param build_cmd: final configuration command (cmake, meson)
+        :param dependencies: names of components from DEPENDENCIES_DIR
+        :return: None
+        """
+
+        root_dir = self.options['ROOT_DIR']
+
+        key_data = {
+            'revisions': {
+                repo_dir.name: [run_git(repo_dir, 'rev-parse', 'HEAD').decode().strip(), hash_local_changes(repo_dir)]
+                for repo_dir in repo_dirs
+            },
+            'build_cmd': strip_root_dir(build_cmd, root_dir),
+            'env': get_build_env(self.options['ENV'], root_dir),
+            'dependencies': {
+                dependency: hash_tree(self.options['DEPENDENCIES_DIR'] / dependency)
+                for dependency in dependencies
+            },
+        }
+        cache_key = hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+        self.build_cache_key_file.parent.mkdir(parents=True, exist_ok=True)
+        self.build_cache_key_file.write_text(cache_key)
+
+        cache_entry = pathlib.Path(self.build_cache_dir) / cache_key
+        if cache_entry.exists():
+            # Touch entry to keep it in cache, eviction removes least recently used entries
+            cache_entry.touch()
+            self.build_cache_hit_marker.touch()
+            self.log.info(f'Build cache hit: {cache_key}, build is skipped')
+        else:
+            # Marker of previous build in the same BUILD_DIR must not skip this one
+            if self.build_cache_hit_marker.exists():
+                self.build_cache_hit_marker.unlink()
+            self.log.info(f'Build cache miss: {cache_key}')
+
+    def sync_build_cache(self, dev_data=None):
+        """
+        Restores INSTALL_DIR from build cache on cache hit or stores INSTALL_DIR to build cache otherwise
+        Least recently used cache entries are removed if cache size exceeds build_cache_max_size_gb
+
+        Build is skipped on cache hit, so files of BUILD_DIR which go to developer package are cached too
+        and restored to BUILD_DIR on cache hit
+
+        :param dev_data: (optional) list in format of DEV_PKG_DATA_TO_ARCHIVE, its items from BUILD_DIR are cached
+        :return: None
+        """
+
+        import tempfile
+
+        def copy_content(src, dst):
+            subprocess.run(['cp', '-a', '--reflink=auto', f'{src}/.', str(dst)], check=True)
+
+        install_dir = self.options['INSTALL_DIR']
+        build_dir = self.options['BUILD_DIR']
+        cache_dir = pathlib.Path(self.build_cache_dir)
+        cache_entry = cache_dir / self.build_cache_key_file.read_text()
+
+        if self.build_cache_hit_marker.exists():
+            self.log.info(f'Restore {install_dir} from {cache_entry}')
+            # Files of previous install must not be mixed with cached ones
+            if install_dir.exists():
+                shutil.rmtree(install_dir)
+            install_dir.mkdir(parents=True)
+            copy_content(cache_entry / 'install', install_dir)
+            if (cache_entry / 'build').exists():
+                self.log.info(f'Restore developer package files of {build_dir} from {cache_entry}')
+                copy_content(cache_entry / 'build', build_dir)
+            return
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_entry = pathlib.Path(tempfile.mkdtemp(dir=cache_dir, prefix='.tmp_'))
+        (tmp_entry / 'install').mkdir()
+        copy_content(install_dir, tmp_entry / 'install')
+        for data in dev_data or []:
+            if data['from_path'] != build_dir:
+                continue
+            for item in data['relative']:
+                item_path = build_dir / item['path']
+                if item_path.is_dir() and not item_path.is_symlink():
+                    relative_paths = [pathlib.Path(item['path'], path) for path in
+                                      walk_archive_item(item_path, item.get('include', []), item.get('exclude', []))]
+                elif item_path.exists() or item_path.is_symlink():
+                    relative_paths = [pathlib.Path(item['path'])]
+                else:
+                    continue
+                for relative_path in relative_paths:
+                    if build_dir / relative_path in (self.build_cache_key_file, self.build_cache_hit_marker):
+                        continue
+                    (tmp_entry / 'build' / relative_path).parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(build_dir / relative_path, tmp_entry / 'build' / relative_path, follow_symlinks=False)
+        try:
+            tmp_entry.rename(cache_entry)
+            self.log.info(f'Store {install_dir} to {cache_entry}')
+        except OSError:
+            # Entry was stored by concurrent build
+            shutil.rmtree(tmp_entry)
+
+        entries = sorted((entry for entry in cache_dir.iterdir() if not entry.name.startswith('.tmp_')),
+                         key=lambda entry: entry.stat().st_mtime)
+        sizes = {entry: sum(item.stat().st_size for item in entry.rglob('*')
+                            if item.is_file() and not item.is_symlink())
+                 for entry in entries}
+        cache_size = sum(sizes.values())
+        for entry in entries:
+            if cache_size <= self.build_cache_max_size or entry == cache_entry:
+                break
+            self.log.info(f'Evict {entry} from build cache')
+            shutil.rmtree(entry)
+            cache_size -= sizes[entry]
+
+    def prepare_dependency_sysroot(self, dependency, pkgconfig_updates=None):
+        """
+        Links sysroot/<dependency> to relocated copy of prefix of the dependency from DEPENDENCIES_DIR
+
+        Copy is stored in dependency sysroots dir by content hash of the prefix and is not changed after that.
+        Prefix in its pkg-config files is relative to ${pcfiledir}, so the copy does not depend on its path.
+        Least recently used copies are removed if size of the dir exceeds dependency_sysroots_max_size_gb,
+        copies used during the last day are kept as running builds can use them.
+
+        :param dependency: name of component from DEPENDENCIES_DIR
+        :param pkgconfig_updates: (optional) dict {pattern: replacement} applied to pkg-config files after relocation
+        :return: None
+        """
+
+        import tempfile
+        import time
+
+        def relocate_pkgconfig(pc_file, sysroot):
+            content = pc_file.read_text()
+            old_prefix = re.search(r'^prefix=(.*)$', content, flags=re.MULTILINE)
+            if old_prefix:
+                content = re.sub(rf'^(\w+)={re.escape(old_prefix.group(1).strip())}(?=/|$)', r'\1=${prefix}',
+                                 content, flags=re.MULTILINE)
+                content = re.sub(r'^prefix=.*$', f'prefix=${{pcfiledir}}/{os.path.relpath(sysroot, pc_file.parent)}',
+                                 content, flags=re.MULTILINE)
+            for pattern, replacement in (pkgconfig_updates or {}).items():
+                content = re.sub(pattern, replacement, content, flags=re.MULTILINE)
+            pc_file.write_text(content)
+
+        prefix = self.options['DEPENDENCIES_DIR'] / dependency / 'usr' / 'local'
+        key_data = {'content': hash_tree(prefix), 'pkgconfig_updates': pkgconfig_updates}
+        sysroots_dir = pathlib.Path(self.dependency_sysroots_dir)
+        sysroot = sysroots_dir / f'{dependency}-{hashlib.sha256(json.dumps(key_data).encode()).hexdigest()[:16]}'
+
+        if sysroot.exists():
+            # Touch sysroot to keep it, eviction removes least recently used ones
+            sysroot.touch()
+            self.log.info(f'{dependency}: reuse sysroot {sysroot}')
+        else:
+            sysroots_dir.mkdir(parents=True, exist_ok=True)
+            tmp_sysroot = pathlib.Path(tempfile.mkdtemp(dir=sysroots_dir, prefix='.tmp_'))
+            subprocess.run(['cp', '-a', '--reflink=auto', f'{prefix}/.', str(tmp_sysroot)], check=True)
+            for pc_file in tmp_sysroot.rglob('*.pc'):
+                relocate_pkgconfig(pc_file, tmp_sysroot)
+            # cp -a copies modification time of prefix, the sysroot is used now
+            tmp_sysroot.touch()
+            try:
+                tmp_sysroot.rename(sysroot)
+                self.log.info(f'{dependency}: prepared sysroot {sysroot}')
+            except OSError:
+                # Sysroot was prepared by concurrent build
+                shutil.rmtree(tmp_sysroot)
+
+            sysroots = sorted((item for item in sysroots_dir.iterdir() if not item.name.startswith('.tmp_')),
+                              key=lambda item: item.stat().st_mtime)
+            sizes = {item: sum(path.lstat().st_size for path in item.rglob('*')) for item in sysroots}
+            sysroots_size = sum(sizes.values())
+            for item in sysroots:
+                if sysroots_size <= self.dependency_sysroots_max_size or \
+                        item == sysroot or time.time() - item.stat().st_mtime < 24 * 3600:
+                    break
+                self.log.info(f'Evict sysroot {item}')
+                shutil.rmtree(item)
+                sysroots_size -= sizes[item]
+
+        link = self.sysroot_dir / dependency
+        self.sysroot_dir.mkdir(parents=True, exist_ok=True)
+        if link.is_symlink() or link.exists():
+            link.unlink()
+        link.symlink_to(sysroot)
+
+    def stream_archive(self, archive_name, data_to_archive):
+        """
+        Streams files to tar archive through multi-threaded compressor without intermediate copy
+        Archive is tar.gz compressed by pigz or by gzip if pigz is not found,
+        with archive_compressor=zstd argument it is tar.zst
+
+        Items of `relative` lists support optional lists of glob patterns `include` and `exclude`,
+        patterns are matched with path relative to the item and with file name.
+        Missing items are skipped as by archiving of infrastructure
+
+        :param archive_name: name of archive in PACK_DIR without extension
+        :param data_to_archive: list in format of DEV_PKG_DATA_TO_ARCHIVE
+        :return: None
+        """
+
+        import tarfile
+        import time
+
+        if self.archive_compressor == 'zstd':
+            compressor, extension = ['zstd', '-T0', '-3', '-q', '-c'], 'tar.zst'
+        elif shutil.which('pigz'):
+            compressor, extension = ['pigz', '-c'], 'tar.gz'
+        else:
+            self.log.warning('pigz is not found, archive is compressed by single-threaded gzip')
+            compressor, extension = ['gzip', '-c'], 'tar.gz'
+
+        archive_path = self.options['PACK_DIR'] / f'{archive_name}.{extension}'
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        # Archive is written to temporary file, so failed archiving does not leave truncated archive
+        tmp_archive_path = archive_path.with_name(f'{archive_path.name}.tmp')
+
+        start_time = time.monotonic()
+        stats = {'bytes': 0, 'files': 0}
+
+        def add_items(tar):
+            for data in data_to_archive:
+                for item in data['relative']:
+                    item_path = data['from_path'] / item['path']
+                    pack_as = item.get('pack_as', item['path'])
+
+                    if not item_path.exists() and not item_path.is_symlink():
+                        self.log.info(f'{item_path} is not found, it is not archived')
+                        continue
+                    if not item_path.is_dir() or item_path.is_symlink():
+                        tar.add(str(item_path), arcname=pack_as or item_path.name, recursive=False)
+                        stats['bytes'] += item_path.lstat().st_size
+                        stats['files'] += 1
+                        continue
+
+                    if pack_as:
+                        tar.add(str(item_path), arcname=pack_as, recursive=False)
+                    for relative_path in walk_archive_item(item_path, item.get('include', []),
+                                                           item.get('exclude', []), with_dirs=True):
+                        file_path = os.path.join(item_path, relative_path)
+                        tar.add(file_path, arcname=os.path.join(pack_as, relative_path), recursive=False)
+                        if not os.path.isdir(file_path) or os.path.islink(file_path):
+                            stats['bytes'] += os.lstat(file_path).st_size
+                            stats['files'] += 1
+
+        try:
+            with tmp_archive_path.open('wb') as archive_file:
+                process = subprocess.Popen(compressor, stdin=subprocess.PIPE, stdout=archive_file)
+                try:
+                    with tarfile.open(fileobj=process.stdin, mode='w|') as tar:
+                        add_items(tar)
+                    process.stdin.close()
+                    if process.wait():
+                        raise Exception(f'{compressor[0]} failed with exit code {process.returncode}')
+                finally:
+                    # Compressor of failed archiving is stopped, it does not outlive the action
+                    if process.poll() is None:
+                        process.kill()
+                        process.wait()
+        except BaseException:
+            if tmp_archive_path.exists():
+                tmp_archive_path.unlink()
+            raise
+        tmp_archive_path.replace(archive_path)
+
+        duration = time.monotonic() - start_time
+        archive_size = archive_path.stat().st_size
+        self.log.info(f"{archive_path.name}: {stats['files']} files, {stats['bytes'] / 1024 ** 2:.1f}MB -> "
+                      f'{archive_size / 1024 ** 2:.1f}MB in {duration:.1f}s '
+                      f"({stats['bytes'] / 1024 ** 2 / max(duration, 1e-6):.1f}MB/s)")
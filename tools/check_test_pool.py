@@ -0,0 +1,150 @@
+# Copyright (c) 2020 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Checks the pool of tests of conf_media_test.py (`test_workers` argument) with stand-ins of test scripts
+
+Configuration is loaded by dry_run into a temporary sandbox where driver_tests/run_test.py, tests/ted.py
+and smoke_test/hevc_fei_smoke_test.py are replaced by stand-ins. Stand-ins of driver tests check that
+every test has its own temp dir as TMPDIR and PATH of tests is resolved, stand-ins of TED and fei test check
+that they are run alone. Failing tests are chosen by --fail.
+The check passes if all stand-ins pass their checks and exactly the chosen tests are reported as failed.
+
+Example:
+    python3 tools/check_test_pool.py --workers 3 --fail avc_cbr_001 mediasdk_ted
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import dry_run
+
+# Driver test stand-in: fails on shared temp dir or unresolved PATH, then exits with code from FAIL_TESTS
+DRIVER_TEST = """
+import os, sys, time
+test_id = sys.argv[1]
+running_test = os.path.join(os.environ['RUNNING_TESTS_DIR'], test_id)
+open(running_test, 'w').close()
+temp_dir = os.path.join(os.getcwd(), 'temp')
+errors = []
+if os.environ.get('TMPDIR') != temp_dir:
+    errors.append('TMPDIR is not temp dir of sandbox: %s' % os.environ.get('TMPDIR'))
+if os.listdir(temp_dir):
+    errors.append('temp dir is shared with: %s' % os.listdir(temp_dir))
+open(os.path.join(temp_dir, test_id), 'w').close()
+time.sleep(0.2)
+if os.listdir(temp_dir) != [test_id]:
+    errors.append('temp dir is shared with: %s' % os.listdir(temp_dir))
+if '$' in os.environ['PATH'] or not os.environ['PATH'].endswith('/mfx/samples'):
+    errors.append('PATH is not resolved: %s' % os.environ['PATH'])
+os.remove(running_test)
+for error in errors:
+    print('STAND-IN CHECK FAILED: ' + error)
+sys.exit(2 if errors else int(test_id in os.environ['FAIL_TESTS'].split()))
+"""
+
+# Stand-in of tests which are run without sandbox: fails if other tests are running at the same time
+SMOKE_TEST = """
+import os, sys, time
+test_name = sys.argv[1]
+running_dir = os.environ['RUNNING_TESTS_DIR']
+errors = []
+open(os.path.join(running_dir, test_name), 'w').close()
+for _ in range(2):
+    if os.listdir(running_dir) != [test_name]:
+        errors.append('test is run together with: %s' % sorted(set(os.listdir(running_dir)) - {test_name}))
+    time.sleep(0.2)
+os.remove(os.path.join(running_dir, test_name))
+for error in errors:
+    print('STAND-IN CHECK FAILED: ' + error)
+sys.exit(2 if errors else int(test_name in os.environ['FAIL_TESTS'].split()))
+"""
+
+
+def check_test_pool(workers, failing_tests):
+    """
+    Runs tests of conf_media_test.py in a pool of workers with stand-ins of test scripts
+
+    :param workers: count of workers
+    :param failing_tests: names of tests which stand-ins fail
+    :return: list of errors
+    """
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        root_dir = Path(root_dir)
+        manifest = dry_run.Manifest(dry_run.REPO_DIR / 'manifest.yml')
+        actions = dry_run.load_config(dry_run.REPO_DIR / 'conf_media_test.py', 'public_linux_test',
+                                      {'test_workers': workers}, root_dir, manifest)
+        func, func_args, func_kwargs = next(action['callfunc'] for action in actions if action['callfunc'])
+        tests = func_args[0]
+
+        infra_path = root_dir / 'infrastructure'
+        stand_ins = {
+            infra_path / 'driver_tests' / 'run_test.py': DRIVER_TEST,
+            root_dir / 'repos' / 'MediaSDK' / 'tests' / 'ted.py': SMOKE_TEST,
+            infra_path / 'smoke_test' / 'hevc_fei_smoke_test.py': SMOKE_TEST,
+        }
+        for script_path, script in stand_ins.items():
+            script_path.parent.mkdir(parents=True, exist_ok=True)
+            script_path.write_text(script)
+        # Smoke test stand-ins get name of the test to choose failing ones
+        for test in tests:
+            if not test.get('isolate'):
+                test['cmd'] += f" {test['name']}"
+
+        os.environ['FAIL_TESTS'] = ' '.join(failing_tests)
+        os.environ['RUNNING_TESTS_DIR'] = str(root_dir / 'running_tests')
+        (root_dir / 'running_tests').mkdir()
+        try:
+            func(*func_args, **func_kwargs)
+            reported_failures = set()
+        except Exception as error:
+            reported_failures = set(str(error).split('Failed tests: ')[1].split('.')[0].split(', '))
+
+        errors = []
+        for test in tests:
+            test_log = (root_dir / 'logs' / 'tests' / f"{test['name']}.log").read_text()
+            errors += [f"{test['name']}: {line}" for line in test_log.splitlines() if 'STAND-IN CHECK FAILED' in line]
+        if reported_failures != set(failing_tests):
+            errors.append(f'Reported failed tests {sorted(reported_failures)}, expected {sorted(failing_tests)}')
+        return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=3, help='Count of workers')
+    parser.add_argument('--fail', nargs='*', default=[], help='Names of tests which stand-ins fail')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    errors = check_test_pool(args.workers, args.fail)
+    for error in errors:
+        print(error)
+    print('Test pool check ' + ('failed' if errors else 'passed'))
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# Copyright (c) 2020 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compares sizes of libraries from two builds
+
+Reports are `logs/binary_sizes.json` files written by `track_binary_sizes` of product configurations
+or history files from `binary_sizes_history_dir`, the last build of history file is used.
+
+Example:
+    python3 tools/diff_binary_sizes.py old/logs/binary_sizes.json new/logs/binary_sizes.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def read_report(report_path):
+    """
+    :return: dict {library: {'size': ..., 'sections': {...}, 'symbols': {...}}}
+    """
+
+    report = json.loads(report_path.read_text())
+    if isinstance(report, list):
+        return report[-1]['libraries']
+    return report
+
+
+def diff_sizes(old_sizes, new_sizes):
+    """
+    :return: list of (name, old size, new size) with changed sizes, the biggest changes first
+    """
+
+    return sorted(((name, old_sizes.get(name, 0), new_sizes.get(name, 0))
+                   for name in set(old_sizes) | set(new_sizes)
+                   if old_sizes.get(name, 0) != new_sizes.get(name, 0)),
+                  key=lambda change: -abs(change[2] - change[1]))
+
+
+def print_diff(title, changes, indent='  '):
+    """
+    :return: None
+    """
+
+    print(f'{indent}{title}:')
+    for name, old, new in changes:
+        print(f'{indent}  {name:<48} {old:>12} -> {new:>12} ({new - old:+})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old', type=Path, help='Report of the old build')
+    parser.add_argument('new', type=Path, help='Report of the new build')
+    parser.add_argument('--symbols', action='store_true', help='Show changes of the biggest symbols')
+    args = parser.parse_args()
+
+    old_report, new_report = read_report(args.old), read_report(args.new)
+    for lib in sorted(set(old_report) | set(new_report)):
+        if lib not in old_report or lib not in new_report:
+            print(f"{lib}: {'added' if lib in new_report else 'removed'}")
+            continue
+        old_size, new_size = old_report[lib]['size'], new_report[lib]['size']
+        print(f'{lib}: {old_size} -> {new_size} bytes ({new_size / old_size - 1:+.2%})')
+        print_diff('sections', diff_sizes(old_report[lib]['sections'], new_report[lib]['sections']))
+        if args.symbols:
+            # Only the biggest symbols are stored, so a symbol can be missing in one of reports
+            print_diff('the biggest symbols', diff_sizes(old_report[lib]['symbols'], new_report[lib]['symbols']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
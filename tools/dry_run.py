@@ -0,0 +1,228 @@
+# Copyright (c) 2020 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Prints actions planned by product configurations without build infrastructure and sandbox
+
+Configuration is executed with stand-ins of infrastructure globals which record actions instead of running them.
+Values resolved when actions run are printed as placeholders: {DEFERRED[build_num]}, {ENV[API_VERSION]}.
+Dry run fails if configuration computes them during loading, for example calls get_commit_number.
+
+Examples:
+    python3 tools/dry_run.py conf_media_driver.py --product-type public_linux_driver_kernels_off
+    python3 tools/dry_run.py conf_igc.py --args '{"parallel_pack": true}' --stage pack
+    python3 tools/dry_run.py --all
+"""
+
+import argparse
+import enum
+import json
+import logging
+import sys
+import time
+import types
+from pathlib import Path
+
+import yaml
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+# Default product types of configurations for --all
+DEFAULT_PRODUCT_TYPES = {
+    'conf_linux_public.py': 'public_linux',
+    'conf_libva.py': 'public_linux_libva',
+    'conf_libva_utils.py': 'public_linux_libva_utils',
+    'conf_gmmlib.py': 'public_linux_gmmlib',
+    'conf_media_driver.py': 'public_linux_driver',
+    'conf_igc.py': 'public_linux_igc',
+    'conf_opencl.py': 'public_linux_opencl_runtime',
+    'conf_ffmpeg.py': 'public_linux_ffmpeg',
+    'conf_metrics_calc.py': 'public_linux_metrics_calc',
+    'conf_media_test.py': 'public_linux_test',
+    'conf_windows_public.py': 'public_windows',
+}
+# Examples of configuration API, they are not executable
+DOC_ONLY_CONFIGS = ['conf_how_to.py']
+
+
+class Stage(enum.Enum):
+    CLEAN = 'clean'
+    EXTRACT = 'extract'
+    BUILD = 'build'
+    INSTALL = 'install'
+    PACK = 'pack'
+    COPY = 'copy'
+
+
+class Manifest:
+    def __init__(self, manifest_path):
+        self.components = yaml.safe_load(manifest_path.read_text())['components']
+
+    def get_component(self, name):
+        return types.SimpleNamespace(name=name, **self.components[name])
+
+
+def not_available(name):
+    """
+    :return: stand-in of infrastructure function which must not be called during loading of configuration
+    """
+
+    def function(*args, **kwargs):
+        raise Exception(f'{name} is called during loading of configuration, it must be deferred to action')
+
+    function.__name__ = name
+    return function
+
+
+def load_config(config_path, product_type, config_args, root_dir, manifest):
+    """
+    Executes configuration with stand-ins of infrastructure globals
+
+    :return: list of dicts with planned actions
+    """
+
+    # Configuration imports config_helpers from product-configs next to infrastructure, it is not extracted here
+    if str(config_path.parent) not in sys.path:
+        sys.path.insert(0, str(config_path.parent))
+
+    actions = []
+
+    def action(name, stage=Stage.BUILD, cmd=None, work_dir=None, env=None, callfunc=None, verbose=False):
+        actions.append({'name': name, 'stage': stage, 'cmd': cmd, 'work_dir': work_dir, 'env': env,
+                        'callfunc': callfunc, 'verbose': verbose})
+
+    def vs_component(name, solution_path, vs_version, env=None, msbuild_args=None):
+        actions.append({'name': name, 'stage': Stage.BUILD, 'cmd': f'msbuild ({vs_version}) {solution_path} '
+                                                                  f'{json.dumps(msbuild_args)}',
+                        'work_dir': None, 'env': env, 'callfunc': None, 'verbose': False})
+
+    def get_packing_cmd(pack_type, pack_dirs, prefix, version, name):
+        return f'<{pack_type} package {name} {version}: {" ".join(pack_dirs)}>'
+
+    options = {
+        'ROOT_DIR': root_dir,
+        'REPOS_DIR': root_dir / 'repos',
+        'REPOS_FORKED_DIR': root_dir / 'repos_forked',
+        'BUILD_DIR': root_dir / 'build',
+        'INSTALL_DIR': root_dir / 'install',
+        'PACK_DIR': root_dir / 'pack',
+        'LOGS_DIR': root_dir / 'logs',
+        'DEPENDENCIES_DIR': root_dir / 'dependencies',
+        'BUILD_TYPE': 'release',
+        'CPU_CORES': 8,
+        'ENV': {},
+        'STRIP_BINARIES': False,
+    }
+    config_globals = {
+        'options': options,
+        'action': action,
+        'vs_component': vs_component,
+        'stage': Stage,
+        'args': config_args,
+        'product_type': product_type,
+        'build_event': 'commit',
+        'manifest': manifest,
+        'get_packing_cmd': get_packing_cmd,
+        'get_commit_number': not_available('get_commit_number'),
+        'get_api_version': not_available('get_api_version'),
+        'update_config': not_available('update_config'),
+        'copytree': not_available('copytree'),
+        'create_file': not_available('create_file'),
+        'log': logging.getLogger(config_path.name),
+        'infra_path': root_dir / 'infrastructure',
+        'PATH': '$PATH',
+        'DEV_PKG_DATA_TO_ARCHIVE': [],
+        'INSTALL_PKG_DATA_TO_ARCHIVE': [],
+    }
+    exec(compile(config_path.read_text(), str(config_path), 'exec'), config_globals)
+    return actions
+
+
+def print_actions(actions, stages=None):
+    """
+    Prints actions grouped by stages in order of execution
+
+    :return: None
+    """
+
+    for stage in Stage:
+        stage_actions = [action for action in actions if action['stage'] == stage]
+        if not stage_actions or (stages and stage.value not in stages):
+            continue
+        print(f'[{stage.value}]')
+        for action in stage_actions:
+            print(f"  {action['name']}")
+            if action['work_dir']:
+                print(f"    work dir: {action['work_dir']}")
+            if action['env']:
+                print(f"    env: {action['env']}")
+            if action['cmd']:
+                print(f"    cmd: {action['cmd']}")
+            if action['callfunc']:
+                func, func_args, func_kwargs = action['callfunc']
+                call_args = [repr(arg) for arg in func_args]
+                call_args += [f'{key}={value!r}' for key, value in func_kwargs.items()]
+                call = f"{getattr(func, '__name__', func)}({', '.join(call_args)})"
+                print(f"    call: {call if len(call) < 200 else call[:200] + '...'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('config', nargs='?', help='Product configuration, for example conf_igc.py')
+    parser.add_argument('--product-type', help='Product type, default product type of configuration by default')
+    parser.add_argument('--args', type=json.loads, default={}, help='Arguments of configuration as JSON')
+    parser.add_argument('--stage', nargs='*', help='Print actions of these stages only')
+    parser.add_argument('--root-dir', type=Path, default=Path('/sandbox'), help='Root dir of planned sandbox')
+    parser.add_argument('--manifest', type=Path, default=REPO_DIR / 'manifest.yml', help='Path to manifest.yml')
+    parser.add_argument('--all', action='store_true', help='Count actions of all configurations')
+    args = parser.parse_args()
+    if not args.config and not args.all:
+        parser.error('config or --all is required')
+
+    logging.basicConfig(level=logging.WARNING)
+    manifest = Manifest(args.manifest)
+
+    if args.all:
+        for config, product_type in DEFAULT_PRODUCT_TYPES.items():
+            start = time.perf_counter()
+            actions = load_config(REPO_DIR / config, product_type, args.args, args.root_dir, manifest)
+            duration = (time.perf_counter() - start) * 1000
+            print(f'{config:<26}{product_type:<32}{len(actions):>4} actions{duration:>8.1f}ms')
+        return 0
+
+    config_path = Path(args.config)
+    if not config_path.exists():
+        config_path = REPO_DIR / args.config
+    if config_path.name in DOC_ONLY_CONFIGS:
+        parser.error(f'{config_path.name} is an example of configuration API, it is not executable')
+    product_type = args.product_type or DEFAULT_PRODUCT_TYPES.get(config_path.name)
+    if not product_type:
+        parser.error(f'{config_path.name} has no default product type, use --product-type')
+    start = time.perf_counter()
+    actions = load_config(config_path, product_type, args.args, args.root_dir, manifest)
+    print_actions(actions, args.stage)
+    print(f'\n{len(actions)} actions of {config_path.name} ({product_type}) '
+          f'are planned in {(time.perf_counter() - start) * 1000:.1f}ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# Copyright (c) 2020 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Extracts repositories of manifest.yml components using a local cache of bare mirrors
+
+Every repository is fetched to `<mirror dir>/<repository>.git` once and updated by later runs,
+checkouts in `--repos-dir` borrow objects from the mirror through git alternates, so the second
+checkout of the same repository (for example to `repos_forked`) costs only its working tree.
+Mirrors are never pruned, so objects borrowed by checkouts are not removed from them.
+Without mirrors repositories are fetched with history of commits and trees (`--filter=blob:none`),
+files are fetched for the checked out revision only. With `--depth` repositories are fetched shallow
+and commit numbers are not computed, except VERSIONED_REPOSITORIES which are always fetched with history.
+
+Commit numbers of checked out revisions are computed on full history and written to
+git metadata cache of product configurations (`<root dir>/git_metadata_cache.json`),
+so `get_cached_commit_number` does not need history in checkouts.
+
+With `--sparse` repositories from SPARSE_PROFILES are checked out partially.
+
+Example:
+    python3 tools/extract_repos.py --components intel-graphics-compiler --repos-dir /localdisk/igc/repos \
+        --mirror-dir /localdisk/mirrors --git-metadata-cache /localdisk/igc/git_metadata_cache.json --sparse
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+# Commit numbers of these repositories are build numbers in versions of packages, so they need full history
+VERSIONED_REPOSITORIES = ['MediaSDK', 'libva', 'libva-utils', 'gmmlib', 'media-driver', 'intel-graphics-compiler',
+                          'opencl_runtime', 'FFmpeg', 'tools']
+
+# Paths of repositories which are used by builds, in format of .git/info/sparse-checkout
+SPARSE_PROFILES = {
+    # IGC builds llvm with clang only, other LLVM subprojects are not used
+    'llvm-project': ['/*', '!/*/', '/llvm/', '/clang/', '/cmake/'],
+}
+
+
+def git(*git_args, cwd=None):
+    """
+    :return: stdout of git command
+    """
+
+    return subprocess.run(['git', *git_args], cwd=cwd, check=True, universal_newlines=True,
+                          stdout=subprocess.PIPE).stdout.strip()
+
+
+def read_repositories(manifest_path, names=None):
+    """
+    :param manifest_path: path to manifest.yml
+    :param names: (optional) names of components, all components by default
+    :return: dict {repository: {'url': ..., 'revision': ...}}
+    """
+
+    manifest = yaml.safe_load(manifest_path.read_text())
+    repositories = {}
+    for component_name, component in manifest['components'].items():
+        if names and component_name not in names:
+            continue
+        for repo_name, repo in component['repository'].items():
+            if repo.get('type', 'git') != 'git':
+                continue
+            repositories[repo_name] = {'url': repo['url'], 'revision': repo.get('revision') or repo['branch']}
+    return repositories
+
+
+def update_mirror(mirror_path, url, revision):
+    """
+    Creates or updates bare mirror of repository
+    Fetch is skipped only for full SHA of commit which is already present, branches and tags can move
+
+    Checkouts use objects of mirror through alternates, so mirror is fetched without --prune
+    and gc of mirror does not remove unreachable objects
+
+    :return: None
+    """
+
+    # Concurrent extractions share mirrors
+    with open(f'{mirror_path}.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not mirror_path.exists():
+            git('clone', '--mirror', '--quiet', url, str(mirror_path))
+            git('config', 'gc.pruneExpire', 'never', cwd=mirror_path)
+        elif not re.fullmatch(r'[0-9a-f]{40}', revision) or subprocess.run(
+                ['git', 'cat-file', '-e', f'{revision}^{{commit}}'], cwd=mirror_path,
+                stderr=subprocess.DEVNULL).returncode:
+            git('fetch', '--quiet', 'origin', cwd=mirror_path)
+
+
+def write_commit_number(cache_path, sha, commit_number):
+    """
+    Writes commit number to git metadata cache in format of product configurations: {sha: {'commit_number': ...}}
+
+    :return: None
+    """
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(f'{cache_path}.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        cache = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+        cache.setdefault(sha, {})['commit_number'] = commit_number
+        with open(f'{cache_path}.tmp', 'w') as cache_file:
+            json.dump(cache, cache_file, indent=4)
+        os.replace(f'{cache_path}.tmp', cache_path)
+
+
+def extract(name, repo, args):
+    """
+    Checks out revision of repository to `<repos dir>/<name>`
+
+    :param name: repository name
+    :param repo: repository data from read_repositories
+    :param args: command line arguments
+    :return: dict with extraction results
+    """
+
+    start = time.monotonic()
+    repo_path = args.repos_dir / name
+    if repo_path.exists():
+        shutil.rmtree(repo_path)
+    repo_path.mkdir(parents=True)
+    git('init', '--quiet', cwd=repo_path)
+    git('remote', 'add', 'origin', repo['url'], cwd=repo_path)
+
+    sparse_profile = SPARSE_PROFILES.get(name) if args.sparse else None
+    if sparse_profile:
+        git('config', 'core.sparseCheckout', 'true', cwd=repo_path)
+        (repo_path / '.git' / 'info' / 'sparse-checkout').write_text('\n'.join(sparse_profile) + '\n')
+
+    commit_number = None
+    if args.mirror_dir:
+        mirror_path = args.mirror_dir / f'{name}.git'
+        update_mirror(mirror_path, repo['url'], repo['revision'])
+        # Branches of mirror are refs/heads/*, so revision is resolved in mirror
+        sha = git('rev-parse', f"{repo['revision']}^{{commit}}", cwd=mirror_path)
+        (repo_path / '.git' / 'objects' / 'info' / 'alternates').write_text(f'{mirror_path.resolve()}/objects\n')
+        commit_number = int(git('rev-list', '--count', sha, cwd=mirror_path))
+    elif args.depth and name not in VERSIONED_REPOSITORIES:
+        git('fetch', '--quiet', '--no-tags', f'--depth={args.depth}', 'origin', repo['revision'], cwd=repo_path)
+        sha = git('rev-parse', 'FETCH_HEAD^{commit}', cwd=repo_path)
+    else:
+        # Commits are enough to count them, trees are fetched with them as checkout needs trees
+        # and fetching them one by one on demand is slow. Servers without partial clone send everything
+        git('fetch', '--quiet', '--no-tags', '--filter=blob:none', 'origin', repo['revision'], cwd=repo_path)
+        sha = git('rev-parse', 'FETCH_HEAD^{commit}', cwd=repo_path)
+        commit_number = int(git('rev-list', '--count', sha, cwd=repo_path))
+    git('checkout', '--quiet', '--detach', sha, cwd=repo_path)
+
+    if commit_number is not None and args.git_metadata_cache:
+        write_commit_number(args.git_metadata_cache, sha, commit_number)
+
+    size = int(subprocess.run(['du', '-sk', str(repo_path)], check=True, universal_newlines=True,
+                              stdout=subprocess.PIPE).stdout.split()[0]) * 1024
+    return {'repository': name, 'revision': sha, 'commit_number': commit_number, 'sparse': bool(sparse_profile),
+            'duration': round(time.monotonic() - start, 1), 'size': size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repos-dir', type=Path, required=True, help='Dir for checkouts of repositories')
+    parser.add_argument('--manifest', type=Path, default=REPO_DIR / 'manifest.yml', help='Path to manifest.yml')
+    parser.add_argument('--components', nargs='*', help='Components to extract, all by default')
+    parser.add_argument('--mirror-dir', type=Path, help='Dir with bare mirrors of repositories, shared by builds')
+    parser.add_argument('--depth', type=int,
+                        help='Fetch shallow with this depth without mirrors, commit numbers are not computed, '
+                             'VERSIONED_REPOSITORIES are fetched with history anyway')
+    parser.add_argument('--sparse', action='store_true', help='Check out only paths from SPARSE_PROFILES')
+    parser.add_argument('--git-metadata-cache', type=Path,
+                        help='Git metadata cache of product configurations to store commit numbers')
+    parser.add_argument('--jobs', type=int, default=4, help='Count of repositories extracted at the same time')
+    args = parser.parse_args()
+
+    repositories = read_repositories(args.manifest, args.components)
+    if args.mirror_dir:
+        args.mirror_dir.mkdir(parents=True, exist_ok=True)
+    elif args.depth:
+        versioned = [name for name in repositories if name in VERSIONED_REPOSITORIES]
+        if versioned:
+            print(f"Warning: --depth is ignored for {', '.join(versioned)}, "
+                  f'their commit numbers are build numbers and need full history', file=sys.stderr)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(executor.map(lambda name: extract(name, repositories[name], args), repositories))
+
+    print(f"{'repository':<28}{'revision':<14}{'commit':>8}{'size, MB':>10}{'time, s':>9}")
+    for result in results:
+        commit_number = result['commit_number'] if result['commit_number'] is not None else '-'
+        sparse = '  sparse' if result['sparse'] else ''
+        print(f"{result['repository']:<28}{result['revision'][:12]:<14}{commit_number:>8}"
+              f"{result['size'] / 1024 ** 2:>10.1f}{result['duration']:>9.1f}{sparse}")
+    print(f'{len(results)} repositories in {time.monotonic() - start:.1f}s, '
+          f"{sum(result['size'] for result in results) / 1024 ** 2:.1f}MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
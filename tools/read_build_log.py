@@ -0,0 +1,117 @@
+# Copyright (c) 2020 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Reads output of actions from compressed build log written with `compressed_logs` option of product configurations
+
+Only frames of requested output are decompressed, their offsets are taken from the index next to the log.
+
+Examples:
+    python3 tools/read_build_log.py logs/build_log.gz --list
+    python3 tools/read_build_log.py logs/build_log.gz --action build
+    python3 tools/read_build_log.py logs/build_log.gz --errors --context 5
+"""
+
+import argparse
+import json
+import sys
+import zlib
+from pathlib import Path
+
+
+def read_index(index_path):
+    """
+    :return: tuple (dict {frame: frame record}, list of action records, list of error and warning records)
+    """
+
+    frames, actions, markers = {}, [], []
+    with index_path.open() as index_file:
+        for line in index_file:
+            record = json.loads(line)
+            if record['type'] == 'frame':
+                frames[record['frame']] = record
+            elif record['type'] == 'action':
+                actions.append(record)
+            else:
+                markers.append(record)
+    return frames, actions, markers
+
+
+def read_frame(log_file, frame):
+    """
+    :return: list of lines of frame
+    """
+
+    log_file.seek(frame['offset'])
+    # 16 + MAX_WBITS is for gzip header
+    return zlib.decompress(log_file.read(frame['size']), 16 + zlib.MAX_WBITS).decode(errors='replace').splitlines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', type=Path, help='Path to build_log.gz')
+    parser.add_argument('--index', type=Path, help='Path to index, <log name>.index.jsonl by default')
+    parser.add_argument('--list', action='store_true', help='List actions')
+    parser.add_argument('--action', help='Print output of action, the last one if there are several actions')
+    parser.add_argument('--errors', action='store_true', help='Print lines with errors')
+    parser.add_argument('--warnings', action='store_true', help='Print lines with warnings')
+    parser.add_argument('--context', type=int, default=0, help='Count of lines around errors and warnings')
+    args = parser.parse_args()
+
+    index_path = args.index or args.log.with_name(args.log.name.split('.')[0] + '.index.jsonl')
+    frames, actions, markers = read_index(index_path)
+
+    if args.list:
+        for action in actions:
+            print(f"{action['name']:<48} lines {action['first_line']:>10}-{action['first_line'] + action['lines']:<10} "
+                  f"exit code {action['exit_code']}")
+
+    with args.log.open('rb') as log_file:
+        if args.action:
+            matching = [action for action in actions if action['name'] == args.action]
+            if not matching:
+                print(f'Action {args.action} is not found, use --list', file=sys.stderr)
+                return 1
+            action = matching[-1]
+            for frame in range(action['first_frame'], action['first_frame'] + action['frames']):
+                for line in read_frame(log_file, frames[frame]):
+                    print(line)
+
+        types = {marker_type for marker_type, enabled in (('error', args.errors), ('warning', args.warnings))
+                 if enabled}
+        frame_lines = {}
+        for marker in markers:
+            if marker['type'] not in types:
+                continue
+            frame = frames[marker['frame']]
+            if marker['frame'] not in frame_lines:
+                # Lines of the last frame only are kept, markers are ordered by lines
+                frame_lines = {marker['frame']: read_frame(log_file, frame)}
+            lines = frame_lines[marker['frame']]
+            # Context is limited by frame
+            position = marker['line'] - frame['first_line']
+            context = lines[max(0, position - args.context):position + args.context + 1]
+            print(f"line {marker['line']}:\n" + '\n'.join(context) + ('\n--' if args.context else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,326 @@
+# Copyright (c) 2020 Intel Corporation
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Builds components from manifest.yml concurrently in accordance with their dependencies
+
+Dependencies of components are taken from `DEPENDENCIES` lists of product configurations.
+Component is started as soon as all its dependencies are built,
+components on the critical path (the longest chain of dependent builds) are started first.
+Install dir of built component is copied to `dependencies/<component>` dirs of its dependents.
+
+Every component is built by the command from `--build-cmd` template with placeholders:
+    {component} - component name from manifest
+    {product_type} - product type of the component
+    {config} - path to product configuration
+    {root_dir} - sandbox of the component: <work dir>/<component>
+    {dependencies_dir} - dir with dependencies of the component: <root_dir>/dependencies
+
+Example:
+    python3 tools/schedule_components.py --work-dir /localdisk/sandboxes --jobs 3 \
+        --build-cmd 'python3 build_runner.py --build-config {config} --root-dir {root_dir} --product-type {product_type}'
+"""
+
+import argparse
+import ast
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+import yaml
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+# Product configurations for product types from manifest
+PRODUCT_CONFIGS = {
+    'public_linux': 'conf_linux_public.py',
+    'public_linux_libva': 'conf_libva.py',
+    'public_linux_libva_utils': 'conf_libva_utils.py',
+    'public_linux_gmmlib': 'conf_gmmlib.py',
+    'public_linux_driver': 'conf_media_driver.py',
+    'public_linux_igc': 'conf_igc.py',
+    'public_linux_opencl_runtime': 'conf_opencl.py',
+    'public_linux_ffmpeg': 'conf_ffmpeg.py',
+    'public_linux_metrics_calc': 'conf_metrics_calc.py',
+}
+
+# Estimated build time of components in seconds, used for critical path if there are no durations of previous runs
+ESTIMATED_DURATIONS = {
+    'intel-graphics-compiler': 3600,
+    'opencl_runtime': 1200,
+    'media-driver': 900,
+    'mediasdk': 900,
+    'ffmpeg': 600,
+    'gmmlib': 180,
+    'libva': 120,
+    'libva-utils': 120,
+    'metrics-calc-lite': 60,
+}
+DEFAULT_DURATION = 300
+
+
+def read_dependencies(config_path):
+    """
+    Reads `DEPENDENCIES` list of product configuration without executing it
+
+    :param config_path: path to product configuration
+    :return: list of component names
+    """
+
+    tree = ast.parse(config_path.read_text(), str(config_path))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == 'DEPENDENCIES' for target in node.targets):
+            return ast.literal_eval(node.value)
+    return []
+
+
+def read_components(manifest_path, names=None):
+    """
+    Reads components which can be built by product configurations of this repository
+
+    :param manifest_path: path to manifest.yml
+    :param names: (optional) names of components to build, all components by default
+    :return: dict {component: {'product_type': ..., 'config': ..., 'dependencies': [...]}}
+    """
+
+    manifest = yaml.safe_load(manifest_path.read_text())
+    components = {}
+    configs = set()
+    for name, data in manifest['components'].items():
+        product_type = (data.get('build_info') or {}).get('product_type')
+        config = PRODUCT_CONFIGS.get(product_type)
+        # Several components (for example MediaSDK and infra) can be built by the same configuration
+        if config is None or config in configs or (names and name not in names):
+            continue
+        configs.add(config)
+        components[name] = {
+            'product_type': product_type,
+            'config': REPO_DIR / config,
+            'dependencies': read_dependencies(REPO_DIR / config),
+        }
+
+    for name, component in components.items():
+        missing = [dependency for dependency in component['dependencies'] if dependency not in components]
+        if missing:
+            raise Exception(f"Dependencies of {name} are not scheduled: {', '.join(missing)}")
+    return components
+
+
+def get_priorities(components, durations):
+    """
+    Computes priority of every component as the longest duration of a chain of builds starting from it
+
+    :param components: components from read_components
+    :param durations: dict {component: duration of its build}
+    :return: dict {component: priority}
+    """
+
+    dependents = {name: [] for name in components}
+    for name, component in components.items():
+        for dependency in component['dependencies']:
+            dependents[dependency].append(name)
+
+    priorities = {}
+    visiting = set()
+
+    def priority(name):
+        if name not in priorities:
+            if name in visiting:
+                raise Exception(f'Dependency cycle through {name}')
+            visiting.add(name)
+            priorities[name] = durations.get(name, ESTIMATED_DURATIONS.get(name, DEFAULT_DURATION)) + max(
+                (priority(dependent) for dependent in dependents[name]), default=0)
+            visiting.discard(name)
+        return priorities[name]
+
+    for name in components:
+        priority(name)
+    return priorities
+
+
+def get_critical_path(components, priorities):
+    """
+    :return: list of components on the critical path
+    """
+
+    path = [max(priorities, key=priorities.get)]
+    while True:
+        dependents = [name for name, component in components.items() if path[-1] in component['dependencies']]
+        if not dependents:
+            return path
+        path.append(max(dependents, key=priorities.get))
+
+
+def hand_over(component_root, dependent_root, component):
+    """
+    Copies install dir of the component to dependencies dir of the dependent
+
+    :return: None
+    """
+
+    dependency_dir = dependent_root / 'dependencies' / component
+    subprocess.run(['rm', '-rf', str(dependency_dir)], check=True)
+    dependency_dir.mkdir(parents=True)
+    install_dir = component_root / 'install'
+    if install_dir.exists():
+        # Dependents update pkgconfigs of dependencies, so hard links cannot be used
+        subprocess.run(['cp', '-a', '--reflink=auto', f'{install_dir}/.', str(dependency_dir)], check=True)
+
+
+def schedule(components, build_cmd, work_dir, jobs, durations):
+    """
+    Builds components concurrently
+
+    :param components: components from read_components
+    :param build_cmd: build command template
+    :param work_dir: dir for sandboxes of components
+    :param jobs: max count of components built at the same time
+    :param durations: dict {component: duration of its build} from previous runs
+    :return: list of dicts with build results in start order
+    """
+
+    priorities = get_priorities(components, durations)
+    remaining = {name: set(component['dependencies']) for name, component in components.items()}
+    results = {}
+    lock = threading.Lock()
+    start_time = time.monotonic()
+
+    def build(name):
+        component = components[name]
+        root_dir = work_dir / name
+        log_path = work_dir / f'{name}.log'
+        cmd = build_cmd.format(component=name, product_type=component['product_type'], config=component['config'],
+                               root_dir=root_dir, dependencies_dir=root_dir / 'dependencies')
+
+        started = time.monotonic() - start_time
+        with log_path.open('w') as log_file:
+            return_code = subprocess.run(cmd, shell=True, stdout=log_file, stderr=subprocess.STDOUT).returncode
+        finished = time.monotonic() - start_time
+
+        if not return_code:
+            for dependent, dependent_component in components.items():
+                if name in dependent_component['dependencies']:
+                    hand_over(root_dir, work_dir / dependent, name)
+        with lock:
+            results[name] = {'component': name, 'start': started, 'end': finished,
+                             'status': 'failed' if return_code else 'passed', 'log': str(log_path)}
+        return name
+
+    def skip_dependents(name, failed):
+        for dependent, dependencies in list(remaining.items()):
+            if name in dependencies and dependent in remaining:
+                del remaining[dependent]
+                results[dependent] = {'component': dependent, 'start': None, 'end': None,
+                                      'status': f'skipped ({failed} failed)', 'log': None}
+                skip_dependents(dependent, failed)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while remaining or running:
+            ready = sorted((name for name, dependencies in remaining.items() if not dependencies),
+                           key=lambda name: -priorities[name])
+            for name in ready[:jobs - len(running)]:
+                del remaining[name]
+                running[executor.submit(build, name)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                future.result()
+                if results[name]['status'] == 'passed':
+                    for dependencies in remaining.values():
+                        dependencies.discard(name)
+                else:
+                    # Dependents of failed component are not built
+                    skip_dependents(name, name)
+
+    return sorted(results.values(), key=lambda result: (result['start'] is None, result['start'] or 0))
+
+
+def print_schedule(results, critical_path):
+    """
+    Prints start and end time of every build and achieved parallelism
+
+    :return: None
+    """
+
+    print(f"{'component':<28}{'start, s':>10}{'end, s':>10}{'duration, s':>14}  status")
+    for result in results:
+        if result['start'] is None:
+            print(f"{result['component']:<28}{'-':>10}{'-':>10}{'-':>14}  {result['status']}")
+        else:
+            print(f"{result['component']:<28}{result['start']:>10.1f}{result['end']:>10.1f}"
+                  f"{result['end'] - result['start']:>14.1f}  {result['status']}")
+
+    built = [result for result in results if result['start'] is not None]
+    if built:
+        wall_time = max(result['end'] for result in built) - min(result['start'] for result in built)
+        busy_time = sum(result['end'] - result['start'] for result in built)
+        print(f'\nCritical path: {" -> ".join(critical_path)}')
+        print(f'Wall time: {wall_time:.1f}s, sum of build times: {busy_time:.1f}s, '
+              f'achieved parallelism: {busy_time / wall_time if wall_time else 1:.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--build-cmd', required=True, help='Build command template')
+    parser.add_argument('--work-dir', type=Path, required=True, help='Dir for sandboxes and logs of components')
+    parser.add_argument('--manifest', type=Path, default=REPO_DIR / 'manifest.yml', help='Path to manifest.yml')
+    parser.add_argument('--components', nargs='*', help='Components to build, all by default')
+    parser.add_argument('--jobs', type=int, default=2, help='Max count of components built at the same time')
+    parser.add_argument('--durations', type=Path,
+                        help='JSON file with build durations of components, it is updated after the run '
+                             'and used to find the critical path')
+    parser.add_argument('--dry-run', action='store_true', help='Print build order without building')
+    args = parser.parse_args()
+
+    components = read_components(args.manifest, args.components)
+    durations = {}
+    if args.durations and args.durations.exists():
+        durations = json.loads(args.durations.read_text())
+    priorities = get_priorities(components, durations)
+    critical_path = get_critical_path(components, priorities)
+
+    if args.dry_run:
+        for name in sorted(components, key=lambda name: -priorities[name]):
+            dependencies = ', '.join(components[name]['dependencies']) or '-'
+            print(f"{name:<28}{priorities[name]:>8.1f}  {components[name]['config'].name:<24}{dependencies}")
+        print(f'\nCritical path: {" -> ".join(critical_path)}')
+        return 0
+
+    args.work_dir.mkdir(parents=True, exist_ok=True)
+    results = schedule(components, args.build_cmd, args.work_dir, args.jobs, durations)
+    print_schedule(results, critical_path)
+
+    if args.durations:
+        durations.update({result['component']: result['end'] - result['start']
+                          for result in results if result['status'] == 'passed'})
+        args.durations.write_text(json.dumps(durations, indent=4))
+
+    return 0 if all(result['status'] == 'passed' for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())